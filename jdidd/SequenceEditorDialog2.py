@@ -1,8 +1,12 @@
+import re
+
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QDialogButtonBox,
     QLabel, QLineEdit, QTextEdit, QRadioButton, QButtonGroup, QMessageBox
 )
 
+from sequence_codec import encode_sequence
+
 class SequenceEditorDialog2(QDialog):
     def __init__(self, rule_data=None, parent=None):
         super().__init__(parent)
@@ -18,26 +22,31 @@ class SequenceEditorDialog2(QDialog):
         self.name_edit = QLineEdit(rule_data.get("name", ""))
         form_layout.addRow("1 -Trigger Name :", self.name_edit)
 
-        # Mode du trigger (ASCII/HEX/Decimal)
+        # Mode du trigger (ASCII/HEX/Decimal/Regex)
         mode_layout = QHBoxLayout()
         mode_layout.addWidget(QLabel("2 - Trigger mode :"))
         self.radio_ascii = QRadioButton("ASCII")
         self.radio_hex = QRadioButton("HEX")
         self.radio_decimal = QRadioButton("Decimal")
+        self.radio_regex = QRadioButton("Regex")
         self.mode_group = QButtonGroup(self)
         self.mode_group.addButton(self.radio_ascii)
         self.mode_group.addButton(self.radio_hex)
         self.mode_group.addButton(self.radio_decimal)
+        self.mode_group.addButton(self.radio_regex)
         current_mode = rule_data.get("mode", "ASCII")
         if current_mode == "HEX":
             self.radio_hex.setChecked(True)
         elif current_mode == "Decimal":
             self.radio_decimal.setChecked(True)
+        elif current_mode == "Regex":
+            self.radio_regex.setChecked(True)
         else:
             self.radio_ascii.setChecked(True)
         mode_layout.addWidget(self.radio_ascii)
         mode_layout.addWidget(self.radio_hex)
         mode_layout.addWidget(self.radio_decimal)
+        mode_layout.addWidget(self.radio_regex)
         mode_layout.addStretch()
         form_layout.addRow(mode_layout)
 
@@ -93,6 +102,7 @@ class SequenceEditorDialog2(QDialog):
     def get_mode(self):
         if self.radio_hex.isChecked(): return "HEX"
         if self.radio_decimal.isChecked(): return "Decimal"
+        if self.radio_regex.isChecked(): return "Regex"
         return "ASCII"
     def get_response_mode(self):
         if self.resp_radio_hex.isChecked(): return "HEX"
@@ -118,6 +128,13 @@ class SequenceEditorDialog2(QDialog):
         if mode == "ASCII":
             self.set_valid_style(self.trigger_edit)
             return
+        elif mode == "Regex":
+            try:
+                re.compile(text.strip())
+                self.set_valid_style(self.trigger_edit)
+            except re.error as e:
+                self.set_invalid_style(self.trigger_edit, f"Invalid regular expression: {e}")
+            return
         elif mode == "HEX":
             clean_text = "".join([c for c in text if c in "0123456789abcdefABCDEF "]).upper()
             clean_text = " ".join(clean_text.split())
@@ -152,7 +169,11 @@ class SequenceEditorDialog2(QDialog):
         mode = self.get_response_mode()
         text = self.response_edit.toPlainText()
         if mode == "ASCII":
-            self.set_valid_style(self.response_edit)
+            try:
+                encode_sequence(text, mode)
+                self.set_valid_style(self.response_edit)
+            except ValueError as e:
+                self.set_invalid_style(self.response_edit, f"Invalid escape or character: {e}")
             return
         elif mode == "HEX":
             clean_text = "".join([c for c in text if c in "0123456789abcdefABCDEF "]).upper()
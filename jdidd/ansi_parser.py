@@ -0,0 +1,221 @@
+# Fichier : ansi_parser.py
+
+import re
+
+# Attributs de style (bits de LogView.style_id)
+ATTR_BOLD = 1
+ATTR_ITALIC = 2
+ATTR_UNDERLINE = 4
+ATTR_STRIKE = 8
+
+# Palette des 16 couleurs de base (0-7 normales, 8-15 vives), en 0xRRGGBB
+ANSI_PALETTE_16 = (
+    0x000000, 0xc91b00, 0x00c200, 0xc7c400, 0x2222ee, 0xc930c7, 0x00c5c7, 0xc7c7c7,
+    0x686868, 0xff6c60, 0xa8ff60, 0xffffb6, 0x96cbfe, 0xff73fd, 0x5ffdff, 0xffffff,
+)
+
+
+def _build_palette_256():
+    palette = list(ANSI_PALETTE_16)
+    steps = (0, 95, 135, 175, 215, 255)
+    for r in steps:                      # cube 6x6x6 (16-231)
+        for g in steps:
+            for b in steps:
+                palette.append((r << 16) | (g << 8) | b)
+    for i in range(24):                  # niveaux de gris (232-255)
+        v = 8 + 10 * i
+        palette.append((v << 16) | (v << 8) | v)
+    return tuple(palette)
+
+
+ANSI_PALETTE_256 = _build_palette_256()
+
+# CSI complet : ESC [ paramètres intermédiaires final
+CSI_RE = re.compile(r'\x1b\[([0-9;:?<=>]*)[ -/]*([@-~])')
+# Autres séquences d'échappement à 2 caractères (ESC x) hors CSI/OSC
+ESC2_RE = re.compile(r'\x1b[^\[\]]')
+# OSC (titre de fenêtre, etc.) terminé par BEL ou ST
+OSC_RE = re.compile(r'\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)')
+# Tout ce qui doit être retiré / interprété, en une seule passe
+ESCAPE_RE = re.compile(f"{CSI_RE.pattern}|{OSC_RE.pattern}|{ESC2_RE.pattern}")
+
+MAX_PENDING_ESCAPE = 64   # au-delà, une séquence incomplète est abandonnée
+
+
+class AnsiParser:
+    """
+    Machine à états SGR incrémentale.
+
+    feed(texte) -> (texte_sans_escapes, runs) où runs = [(début, fin, style_id)]
+    (None si tout est dans le style par défaut). L'état (couleurs, attributs) et
+    une éventuelle séquence d'échappement coupée en fin de morceau sont conservés
+    d'un appel à l'autre. Les séquences non SGR (curseur, effacement, OSC) sont
+    retirées du texte.
+
+    style_id : callable(fg, bg, attrs) -> int fourni par la vue (style interné,
+    0 = style par défaut). Les couleurs sont des entiers 0xRRGGBB ou None.
+    """
+
+    DEFAULT_STATE = (None, None, 0, False, False, False)   # fg, bg, attrs, dim, inverse, hidden
+    MAX_TRANSITIONS = 4096
+
+    def __init__(self, style_id, default_fg: int = 0xc7c7c7, default_bg: int = 0x1e1e1e):
+        self._style_id = style_id
+        self.default_fg = default_fg
+        self.default_bg = default_bg
+        self._pending = ""
+        self._ids = {}          # état -> style_id (chaque style n'est interné qu'une fois)
+        self._transitions = {}  # (état, paramètres SGR) -> (nouvel état, style_id)
+        self.reset()
+
+    def reset(self) -> None:
+        """Revient au style par défaut (équivalent de ESC[0m)."""
+        self._state = self.DEFAULT_STATE
+        self._current = self._resolve(self._state)
+
+    # ---------- Style courant ----------
+    def _resolve(self, state) -> int:
+        sid = self._ids.get(state)
+        if sid is None:
+            fg, bg, attrs, dim, inverse, hidden = state
+            if inverse:
+                fg, bg = (bg if bg is not None else self.default_bg,
+                          fg if fg is not None else self.default_fg)
+            if dim:
+                c = fg if fg is not None else self.default_fg
+                fg = ((((c >> 16) & 0xff) * 2 // 3) << 16) | ((((c >> 8) & 0xff) * 2 // 3) << 8) | ((c & 0xff) * 2 // 3)
+            if hidden:
+                fg = bg if bg is not None else self.default_bg
+            sid = self._style_id(fg, bg, attrs)
+            self._ids[state] = sid
+        return sid
+
+    @staticmethod
+    def _extended_color(params, i):
+        """Lit 5;n ou 2;r;g;b à partir de params[i] ; retourne (couleur, index suivant)."""
+        if i < len(params) and params[i] == 5 and i + 1 < len(params):
+            n = params[i + 1]
+            return (ANSI_PALETTE_256[n] if 0 <= n < 256 else None), i + 2
+        if i < len(params) and params[i] == 2 and i + 3 < len(params):
+            r, g, b = (max(0, min(255, v)) for v in params[i + 1:i + 4])
+            return (r << 16) | (g << 8) | b, i + 4
+        return None, len(params)
+
+    def _apply_sgr(self, state, raw: str):
+        """Nouvel état après ESC[<raw>m (chemin lent, résultat mis en cache par feed)."""
+        if not raw:
+            return self.DEFAULT_STATE
+        try:
+            params = [int(p) if p else 0 for p in raw.replace(':', ';').split(';')]
+        except ValueError:
+            return state
+        fg, bg, attrs, dim, inverse, hidden = state
+        i = 0
+        n = len(params)
+        while i < n:
+            code = params[i]
+            i += 1
+            if code == 0:
+                fg, bg, attrs, dim, inverse, hidden = self.DEFAULT_STATE
+            elif code == 1:
+                attrs |= ATTR_BOLD
+            elif code == 2:
+                dim = True
+            elif code == 3:
+                attrs |= ATTR_ITALIC
+            elif code == 4:
+                attrs |= ATTR_UNDERLINE
+            elif code == 7:
+                inverse = True
+            elif code == 8:
+                hidden = True
+            elif code == 9:
+                attrs |= ATTR_STRIKE
+            elif code == 22:
+                attrs &= ~ATTR_BOLD
+                dim = False
+            elif code == 23:
+                attrs &= ~ATTR_ITALIC
+            elif code == 24:
+                attrs &= ~ATTR_UNDERLINE
+            elif code == 27:
+                inverse = False
+            elif code == 28:
+                hidden = False
+            elif code == 29:
+                attrs &= ~ATTR_STRIKE
+            elif 30 <= code <= 37:
+                fg = ANSI_PALETTE_16[code - 30]
+            elif code == 38:
+                fg, i = self._extended_color(params, i)
+            elif code == 39:
+                fg = None
+            elif 40 <= code <= 47:
+                bg = ANSI_PALETTE_16[code - 40]
+            elif code == 48:
+                bg, i = self._extended_color(params, i)
+            elif code == 49:
+                bg = None
+            elif 90 <= code <= 97:
+                fg = ANSI_PALETTE_16[code - 90 + 8]
+            elif 100 <= code <= 107:
+                bg = ANSI_PALETTE_16[code - 100 + 8]
+        return (fg, bg, attrs, dim, inverse, hidden)
+
+    def _transition(self, raw: str) -> int:
+        key = (self._state, raw)
+        hit = self._transitions.get(key)
+        if hit is None:
+            state = self._apply_sgr(self._state, raw)
+            if len(self._transitions) >= self.MAX_TRANSITIONS:
+                self._transitions.clear()
+            hit = self._transitions[key] = (state, self._resolve(state))
+        self._state, self._current = hit
+        return self._current
+
+    # ---------- Analyse ----------
+    def _split_pending(self, text: str) -> str:
+        """Met de côté une séquence d'échappement incomplète en fin de texte."""
+        esc = text.rfind('\x1b', max(0, len(text) - MAX_PENDING_ESCAPE))
+        if esc < 0:
+            return text
+        tail = text[esc:]
+        if ESCAPE_RE.match(tail):
+            return text
+        if len(tail) == 1 or (tail[1] == '[' and CSI_RE.match(tail + 'm') is not None) or tail[1] == ']':
+            self._pending = tail
+            return text[:esc]
+        return text
+
+    def feed(self, text: str):
+        if self._pending:
+            text = self._pending + text
+            self._pending = ""
+        if '\x1b' not in text:
+            # Chemin rapide : aucun échappement, un seul run au style courant
+            if self._current and text:
+                return text, [(0, len(text), self._current)]
+            return text, None
+        text = self._split_pending(text)
+
+        plain = []
+        runs = []
+        length = 0
+        pos = 0
+        current = self._current
+        for match in ESCAPE_RE.finditer(text):
+            start, end = match.span()
+            if start > pos:
+                if current:
+                    runs.append((length, length + start - pos, current))
+                plain.append(text[pos:start])
+                length += start - pos
+            if match.group(2) == 'm':
+                current = self._transition(match.group(1))
+            pos = end
+        if pos < len(text):
+            chunk = text[pos:]
+            if current:
+                runs.append((length, length + len(chunk), current))
+            plain.append(chunk)
+        return "".join(plain), (runs or None)
@@ -0,0 +1,155 @@
+# Fichier : auto_responder.py
+
+import time
+
+import serial
+
+from latency_stats import LatencyHistogram
+from sequence_codec import encode_sequence
+from trigger_matcher import (AhoCorasick, TriggerMatcher, parse_trigger_bytes,
+                             TRIGGER_ASCII, TRIGGER_HEX, TRIGGER_DECIMAL, TRIGGER_REGEX)
+
+MAX_LINE_BYTES = 64 * 1024      # borne du cumul d'une ligne découpée en morceaux
+
+
+def rule_label(index: int, rule: dict) -> str:
+    """Libellé affiché d'une règle : nom, à défaut trigger, à défaut numéro."""
+    return rule.get('name', '').strip() or rule.get('trigger', '') or f"#{index + 1}"
+
+
+def remap_stats(stats: dict, op: list) -> dict:
+    """
+    Statistiques par indice de règle après une opération du
+    ReceiveSequenceManager (["delete", i], ["move", src, dst], ["reset"]...) :
+    chaque histogramme suit sa règle.
+    """
+    kind = op[0] if op else None
+    if kind == "reset":
+        return {}
+    if kind == "delete":
+        removed = op[1]
+        return {i - (i > removed): h for i, h in stats.items() if i != removed}
+    if kind == "move":
+        source, dest = op[1], op[2]
+        order = list(range(max([source, dest, *stats]) + 1))
+        order.insert(dest, order.pop(source))
+        return {new: stats[old] for new, old in enumerate(order) if old in stats}
+    return stats
+
+
+class AutoResponseTable:
+    """
+    Instantané compilé des règles (construit côté GUI, lu par le thread RX) :
+    - triggers HEX / Decimal : automate d'Aho-Corasick parcouru en flux sur les
+      octets bruts (un motif à cheval sur deux lectures est reconnu) ;
+    - triggers ASCII / Regex : évalués sur chaque ligne complète du découpeur ;
+    - réponses déjà encodées (cache de sequence_codec).
+    Remplacé d'un bloc à chaque modification des règles (pas de verrou).
+    """
+
+    def __init__(self, rules):
+        self.labels = [rule_label(i, r) for i, r in enumerate(rules)]
+        self.responses = [None] * len(rules)
+        self.errors = []                  # [(indice, message)]
+        byte_patterns = []
+        for index, rule in enumerate(rules):
+            if not rule.get('enabled', True) or not rule.get('trigger', ''):
+                continue
+            try:
+                self.responses[index] = encode_sequence(rule.get('response', ''), rule.get('response_mode', 'ASCII'))
+                if rule.get('mode', TRIGGER_ASCII) in (TRIGGER_HEX, TRIGGER_DECIMAL):
+                    pattern = parse_trigger_bytes(rule['trigger'], rule['mode'])
+                    if pattern:
+                        byte_patterns.append((pattern, index))
+            except ValueError as e:
+                self.responses[index] = None
+                self.errors.append((index, str(e)))
+        self.stream = AhoCorasick(byte_patterns) if byte_patterns else None
+        self.lines = TriggerMatcher(rules, modes=(TRIGGER_ASCII, TRIGGER_REGEX))
+        self.errors.extend(self.lines.errors)
+        self.has_line_rules = self.lines.rule_count > 0
+
+
+class AutoResponder:
+    """
+    Réponses automatiques exécutées dans le thread RX : la réponse est écrite
+    sur le port (sous le verrou d'écriture partagé avec le TxWriter) dès que le
+    trigger est reconnu, sans passer par le GUI. notify(label, octets, latence_µs,
+    erreur) est appelé ensuite, pour l'affichage.
+
+    set_paused(True) suspend les réponses (port prêté à un transfert de
+    fichier ou au Calibrator) ; les triggers reconnus pendant ce temps sont ignorés.
+
+    La latence mesurée va du retour de la lecture contenant la fin du trigger
+    à la fin de l'écriture de la réponse ; un histogramme est tenu par règle,
+    indexé par la position de la règle (deux règles peuvent avoir le même
+    libellé) : le libellé n'est utilisé que pour l'affichage.
+    """
+
+    def __init__(self, serial_port, write_lock, notify=None):
+        self.serial_port = serial_port
+        self.write_lock = write_lock
+        self.notify = notify
+        self.table = None
+        self.paused = False
+        self.stats = {}                   # indice de règle -> LatencyHistogram
+        self._state_table = None          # table pour laquelle _state est valide
+        self._state = 0
+        self._line = bytearray()
+
+    def set_table(self, table) -> None:
+        self.table = table
+
+    def set_paused(self, paused: bool) -> None:
+        self.paused = paused
+
+    def on_data(self, data: bytes, t_rx: float) -> None:
+        """Octets bruts tels que lus : triggers d'octets, en flux."""
+        table = self.table
+        if table is None or table.stream is None:
+            return
+        state = self._state if table is self._state_table else 0
+        hits, self._state = table.stream.scan(data, state)
+        self._state_table = table
+        for _, index in hits:
+            self._respond(table, index, t_rx)
+
+    def on_frame(self, payload: bytes, partial: bool, t_rx: float) -> None:
+        """Trame du découpeur : triggers ASCII / Regex sur la ligne complète."""
+        table = self.table
+        if table is None or not table.has_line_rules:
+            self._line.clear()
+            return
+        if partial:
+            if len(self._line) + len(payload) <= MAX_LINE_BYTES:
+                self._line += payload
+            return
+        if self._line:
+            payload = bytes(self._line) + payload
+            self._line.clear()
+        index = table.lines.match(payload)
+        if index >= 0:
+            self._respond(table, index, t_rx)
+
+    def _respond(self, table, index: int, t_rx: float) -> None:
+        data = table.responses[index]
+        if data is None:
+            return
+        label = table.labels[index]
+        try:
+            with self.write_lock:
+                if self.paused:   # relu sous le verrou : aucune réponse entre deux blocs d'un transfert
+                    return
+                self.serial_port.write(data)
+        except (serial.SerialException, OSError, ValueError) as e:
+            if self.notify:
+                self.notify(label, data, 0.0, str(e))
+            return
+        latency_us = (time.perf_counter() - t_rx) * 1e6
+        stats = self.stats
+        hist = stats.get(index)
+        if hist is None:
+            hist = stats[index] = LatencyHistogram()
+        hist.add(latency_us)
+        if self.notify:
+            self.notify(label, data, latency_us, "")
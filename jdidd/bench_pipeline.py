@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+# Fichier : bench_pipeline.py
+"""
+Benchmark de bout en bout du pipeline série (Qt offscreen, sans matériel).
+
+Cas mesurés :
+  - rx       : émulateur (pty) -> SerialWorker -> SerialApp -> TerminalWidget
+               débit (octets/s, lignes/s), latence d'affichage p50/p99, retard accumulé
+  - tx       : SerialApp.write_to_serial -> TxWriter -> port  (latence file -> écriture)
+  - trigger  : ligne reçue -> réponse automatique vue côté device
+
+Chaque cas rapporte aussi le CPU consommé et la RSS. Les résultats sont écrits
+en JSON (bench_results/) avec la révision git, pour comparer les versions :
+
+    python bench_pipeline.py --quick
+    python bench_pipeline.py --bauds 115200 921600 --modes ASCII HEX --compare bench_results/ancien.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import pty
+import re
+import resource
+import select
+import subprocess
+import sys
+import threading
+import time
+import tty
+from datetime import datetime
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+os.chdir(HERE)                 # l'app charge ses icônes en relatif
+sys.path.insert(0, HERE)
+
+from PyQt6.QtCore import QEventLoop, QTimer          # noqa: E402
+from PyQt6.QtWidgets import QApplication             # noqa: E402
+
+from device_emulator import EmulatedDevice, ShellEmulator   # noqa: E402
+
+
+# ============================ Outils ============================
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    v = sorted(values)
+    k = min(len(v) - 1, max(0, int(round(p / 100.0 * (len(v) - 1)))))
+    return v[k]
+
+
+def rss_mb() -> float:
+    """RSS courante (Linux : /proc), sinon pic via getrusage."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return "unknown"
+
+
+def pump(app: QApplication, seconds: float) -> None:
+    """Fait tourner la boucle Qt pendant `seconds`."""
+    loop = QEventLoop()
+    QTimer.singleShot(int(seconds * 1000), loop.quit)
+    loop.exec()
+
+
+def settings_for(port: str, baud: int, **extra) -> dict:
+    s = {'port': port, 'baudrate': baud, 'bytesize': 8, 'parity': 'N', 'stopbits': 1}
+    s.update(extra)
+    return s
+
+
+def raw_pty() -> tuple[int, str]:
+    master, slave = pty.openpty()
+    tty.setraw(master)
+    tty.setraw(slave)
+    return master, os.ttyname(slave)
+
+
+ANSI_ESCAPE_RE = re.compile(r"\x1b\[[0-9;]*m")
+
+
+class DisplayProbe:
+    """
+    Intercepte les appels d'affichage du TerminalWidget et mesure, pour chaque
+    ligne de télémétrie "TLM <seq> <t_ns>", le délai émission -> affichage.
+    """
+
+    def __init__(self, terminal, mode: str) -> None:
+        self.mode = mode
+        self.count = 0
+        self.latencies_ms: list[float] = []
+        # Point de mesure : l'ajout effectif à la vue (une fois par frame, texte sans ANSI)
+        view = terminal.terminal_display
+        view.append_text = self._wrap(view.append_text)
+
+    def _decode(self, text: str) -> str:
+        # "hh:mm:ss.mmm [RX] -> <contenu>" : on récupère le contenu brut
+        _, _, content = ANSI_ESCAPE_RE.sub("", text).partition("-> ")
+        if self.mode == "HEX":
+            try:
+                return bytes.fromhex(content.strip()).decode("latin-1")
+            except ValueError:
+                return ""
+        if self.mode == "Decimal":
+            try:
+                return bytes(int(b) for b in content.split()).decode("latin-1")
+            except ValueError:
+                return ""
+        return content
+
+    def _wrap(self, original):
+        def wrapper(text, *args, **kwargs):
+            result = original(text, *args, **kwargs)
+            now = time.monotonic_ns()
+            for line in text.splitlines():
+                if "[RX]" not in line:
+                    continue
+                parts = self._decode(line).split()
+                if len(parts) >= 3 and parts[0].endswith("TLM"):
+                    try:
+                        self.latencies_ms.append((now - int(parts[2])) / 1e6)
+                        self.count += 1
+                    except ValueError:
+                        pass
+            return result
+        return wrapper
+
+
+# ============================ Cas ============================
+
+def bench_rx(app, baud: int, line_length: int, ansi_ratio: float, mode: str, duration: float) -> dict:
+    from main import SerialApp
+
+    dev = EmulatedDevice(ShellEmulator(), baudrate=baud)
+    url = dev.open_pty()
+    win = SerialApp()
+    win.serial_settings = settings_for(url, baud, tx_pacing="none")
+    win.terminal_display_mode = mode
+    probe = DisplayProbe(win.terminal_page, mode)
+    win.start_communication()
+    pump(app, 0.2)
+
+    cpu0, t0, rss0 = time.process_time(), time.perf_counter(), rss_mb()
+    dev.start_telemetry(0, line_length, ansi_ratio)
+    pump(app, duration)
+    wall = time.perf_counter() - t0
+    cpu = time.process_time() - cpu0
+    offered = dev.telemetry_lines
+    shown = probe.count
+    dev.close()
+    win.stop_communication()
+    win.close()
+    win.deleteLater()
+    pump(app, 0.1)
+
+    return {
+        "case": "rx", "baud": baud, "line_length": line_length, "ansi_ratio": ansi_ratio, "mode": mode,
+        "duration_s": round(wall, 3),
+        "offered_lines": offered,
+        "displayed_lines": shown,
+        "backlog_lines": offered - shown,
+        "lines_per_s": round(shown / wall, 1),
+        "bytes_per_s": round(shown * line_length / wall, 1),
+        "line_rate_bytes_per_s": baud / 10,
+        "latency_p50_ms": round(percentile(probe.latencies_ms, 50), 3),
+        "latency_p99_ms": round(percentile(probe.latencies_ms, 99), 3),
+        "cpu_percent": round(100.0 * cpu / wall, 1),
+        "rss_mb": round(rss_mb(), 1),
+        "rss_growth_mb": round(rss_mb() - rss0, 1),
+    }
+
+
+def bench_tx(app, baud: int, count: int) -> dict:
+    from main import SerialApp
+
+    master, port = raw_pty()
+    stop = threading.Event()
+    received = [0]
+
+    def sink():
+        while not stop.is_set():
+            r, _, _ = select.select([master], [], [], 0.05)
+            if r:
+                try:
+                    received[0] += len(os.read(master, 65536))
+                except OSError:
+                    break
+    threading.Thread(target=sink, daemon=True).start()
+
+    win = SerialApp()
+    win.serial_settings = settings_for(port, baud, tx_pacing="none")
+    win.start_communication()
+    pump(app, 0.2)
+
+    latencies: list[float] = []
+    enqueued: list[float] = []
+    win.tx_writer.sent.connect(lambda data, prefix: latencies.append(
+        (time.perf_counter() - enqueued[len(latencies)]) * 1000.0))
+    seq = {"name": "bench", "sequence": "AT+PING=0123456789\\r\\n", "mode": "ASCII"}
+
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    for _ in range(count):
+        enqueued.append(time.perf_counter())
+        win.write_to_serial(seq)
+    deadline = time.perf_counter() + 30
+    while len(latencies) < count and time.perf_counter() < deadline:
+        pump(app, 0.02)
+    wall = time.perf_counter() - t0
+    cpu = time.process_time() - cpu0
+    stop.set()
+    win.stop_communication()
+    win.close()
+    win.deleteLater()
+    os.close(master)
+    pump(app, 0.1)
+
+    return {
+        "case": "tx", "baud": baud, "items": count, "completed": len(latencies),
+        "items_per_s": round(len(latencies) / wall, 1),
+        "bytes_written": received[0],
+        "latency_p50_ms": round(percentile(latencies, 50), 3),
+        "latency_p99_ms": round(percentile(latencies, 99), 3),
+        "cpu_percent": round(100.0 * cpu / wall, 1),
+        "rss_mb": round(rss_mb(), 1),
+    }
+
+
+def bench_trigger(app, baud: int, rounds: int) -> dict:
+    from main import SerialApp
+
+    master, port = raw_pty()
+    win = SerialApp()
+    win.serial_settings = settings_for(port, baud, tx_pacing="none")
+    win.terminal_page.receive_manager.rules = [{
+        "name": "bench", "trigger": "PING", "mode": "ASCII",
+        "response": "PONG\\n", "response_mode": "ASCII", "enabled": True,
+    }]
+    win.start_communication()
+    pump(app, 0.2)
+
+    latencies: list[float] = []
+    done = threading.Event()
+
+    def device():
+        for _ in range(rounds):
+            t = time.perf_counter()
+            os.write(master, b"PING\n")
+            buf = b""
+            while b"PONG" not in buf:
+                r, _, _ = select.select([master], [], [], 2.0)
+                if not r:
+                    break
+                buf += os.read(master, 4096)
+            if b"PONG" in buf:
+                latencies.append((time.perf_counter() - t) * 1000.0)
+            time.sleep(0.01)
+        done.set()
+    threading.Thread(target=device, daemon=True).start()
+
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    while not done.is_set():
+        pump(app, 0.02)
+    wall = time.perf_counter() - t0
+    cpu = time.process_time() - cpu0
+    win.stop_communication()
+    win.close()
+    win.deleteLater()
+    os.close(master)
+    pump(app, 0.1)
+
+    return {
+        "case": "trigger", "baud": baud, "rounds": rounds, "answered": len(latencies),
+        "latency_p50_ms": round(percentile(latencies, 50), 3),
+        "latency_p99_ms": round(percentile(latencies, 99), 3),
+        "cpu_percent": round(100.0 * cpu / wall, 1),
+    }
+
+
+# ============================ Rapport ============================
+
+def case_key(r: dict) -> str:
+    keys = ("case", "baud", "line_length", "ansi_ratio", "mode")
+    return "/".join(str(r[k]) for k in keys if k in r)
+
+
+def print_result(r: dict, baseline: dict | None) -> None:
+    metrics = ("lines_per_s", "items_per_s", "latency_p50_ms", "latency_p99_ms", "backlog_lines", "cpu_percent", "rss_mb")
+    parts = []
+    for m in metrics:
+        if m not in r:
+            continue
+        txt = f"{m}={r[m]}"
+        if baseline and m in baseline and baseline[m]:
+            delta = 100.0 * (r[m] - baseline[m]) / abs(baseline[m])
+            txt += f" ({delta:+.0f}%)"
+        parts.append(txt)
+    print(f"{case_key(r):45s} " + "  ".join(parts))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark du pipeline série (Qt offscreen)")
+    ap.add_argument("--bauds", type=int, nargs="+", default=[115200, 460800, 921600])
+    ap.add_argument("--line-lengths", type=int, nargs="+", default=[32, 128])
+    ap.add_argument("--ansi", type=float, nargs="+", default=[0.0, 0.5])
+    ap.add_argument("--modes", nargs="+", default=["ASCII", "HEX", "Decimal"])
+    ap.add_argument("--duration", type=float, default=3.0, help="durée de chaque cas RX (s)")
+    ap.add_argument("--tx-items", type=int, default=500)
+    ap.add_argument("--trigger-rounds", type=int, default=100)
+    ap.add_argument("--cases", nargs="+", default=["rx", "tx", "trigger"])
+    ap.add_argument("--quick", action="store_true", help="un seul baud/longueur/mode, 1 s")
+    ap.add_argument("--out", help="fichier JSON de sortie (défaut: bench_results/bench-<date>.json)")
+    ap.add_argument("--compare", help="JSON d'une exécution précédente à comparer")
+    args = ap.parse_args()
+
+    if args.quick:
+        args.bauds, args.line_lengths, args.ansi, args.modes = [921600], [64], [0.5], ["ASCII"]
+        args.duration, args.tx_items, args.trigger_rounds = 1.0, 200, 30
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = {case_key(r): r for r in json.load(f)["results"]}
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    results = []
+    if "rx" in args.cases:
+        for baud in args.bauds:
+            for ll in args.line_lengths:
+                for ansi in args.ansi:
+                    for mode in args.modes:
+                        results.append(bench_rx(app, baud, ll, ansi, mode, args.duration))
+                        print_result(results[-1], baseline.get(case_key(results[-1])))
+    if "tx" in args.cases:
+        for baud in args.bauds:
+            results.append(bench_tx(app, baud, args.tx_items))
+            print_result(results[-1], baseline.get(case_key(results[-1])))
+    if "trigger" in args.cases:
+        results.append(bench_trigger(app, args.bauds[0], args.trigger_rounds))
+        print_result(results[-1], baseline.get(case_key(results[-1])))
+
+    out = args.out or os.path.join(HERE, "bench_results", f"bench-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump({
+            "revision": git_revision(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": sys.platform,
+            "results": results,
+        }, f, indent=4)
+    print(f"Résultats : {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+# Fichier : bench_triggers.py
+"""
+Benchmark du moteur de triggers (ReceiveSequenceManager), sans Qt ni matériel.
+
+Compare, pour 1k à 10k règles, le balayage règle par règle d'origine
+(re-décodage du trigger HEX à chaque ligne) au jeu compilé (TriggerMatcher) :
+coût par ligne reçue et temps de compilation. Vérifie aussi que les deux
+désignent la même règle pour chaque ligne.
+
+    python bench_triggers.py
+    python bench_triggers.py --rules 1000 5000 10000 --lines 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, HERE)
+
+from receive_sequence_manager import ReceiveSequenceManager   # noqa: E402
+from trigger_matcher import TriggerMatcher                     # noqa: E402
+
+
+def linear_scan(rules: list, data: bytes) -> int:
+    """Algorithme d'origine (ASCII ligne exacte, HEX sous-suite), pour référence."""
+    for index, rule in enumerate(rules):
+        if not rule.get('enabled', True):
+            continue
+        trigger = rule.get('trigger', '')
+        mode = rule.get('mode', 'ASCII')
+        if not trigger:
+            continue
+        try:
+            if mode == 'ASCII':
+                if trigger == data.decode('utf-8', errors='replace').strip():
+                    return index
+            elif mode == 'HEX':
+                hex_str = trigger.replace('0x', '').replace('0X', '').replace(',', ' ')
+                if bytes([int(b, 16) for b in hex_str.split() if b]) in data:
+                    return index
+        except ValueError:
+            pass
+    return -1
+
+
+def make_rules(count: int, rng: random.Random) -> list:
+    """Mélange réaliste : 60 % ASCII (réponses à des lignes), 40 % HEX (trames)."""
+    rules = []
+    for i in range(count):
+        if rng.random() < 0.6:
+            rules.append({'name': f'r{i}', 'mode': 'ASCII', 'trigger': f'EVENT {i} READY',
+                          'response': f'ACK {i}', 'response_mode': 'ASCII'})
+        else:
+            pattern = bytes([0xA5, (i >> 8) & 0xFF, i & 0xFF, rng.randrange(256)])
+            rules.append({'name': f'r{i}', 'mode': 'HEX', 'trigger': pattern.hex(' ').upper(),
+                          'response': '06', 'response_mode': 'HEX'})
+    return rules
+
+
+def make_lines(rules: list, count: int, hit_ratio: float, rng: random.Random) -> list:
+    lines = []
+    for n in range(count):
+        if rng.random() < hit_ratio:
+            rule = rng.choice(rules)
+            if rule['mode'] == 'ASCII':
+                lines.append(rule['trigger'].encode() + b'\r\n')
+            else:
+                lines.append(b'FRAME ' + bytes.fromhex(rule['trigger']) + b' END\n')
+        else:
+            lines.append(f'TLM {n} temp=21.{n % 10} hum=45 rssi=-{60 + n % 30}\r\n'.encode())
+    return lines
+
+
+def bench(count: int, n_lines: int, hit_ratio: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    rules = make_rules(count, rng)
+    lines = make_lines(rules, n_lines, hit_ratio, rng)
+
+    t0 = time.perf_counter()
+    TriggerMatcher(rules)
+    compile_ms = (time.perf_counter() - t0) * 1000.0
+
+    manager = ReceiveSequenceManager()
+    manager.rules = rules
+    manager.matcher()
+
+    t0 = time.perf_counter()
+    compiled = [manager.matcher().match(line) for line in lines]
+    compiled_us = (time.perf_counter() - t0) / n_lines * 1e6
+
+    # Le balayage d'origine est très lent sur 10k règles : on l'échantillonne
+    sample = lines[:max(50, n_lines // 10)]
+    t0 = time.perf_counter()
+    reference = [linear_scan(rules, line) for line in sample]
+    linear_us = (time.perf_counter() - t0) / len(sample) * 1e6
+
+    mismatches = sum(1 for a, b in zip(compiled, reference) if a != b)
+    return {
+        "rules": count,
+        "lines": n_lines,
+        "hit_ratio": hit_ratio,
+        "compile_ms": round(compile_ms, 2),
+        "compiled_us_per_line": round(compiled_us, 2),
+        "linear_us_per_line": round(linear_us, 2),
+        "speedup": round(linear_us / compiled_us, 1) if compiled_us else 0.0,
+        "mismatches": mismatches,
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Benchmark des triggers RX (compilés vs balayage)")
+    ap.add_argument("--rules", type=int, nargs="+", default=[1000, 2000, 5000, 10000])
+    ap.add_argument("--lines", type=int, default=5000)
+    ap.add_argument("--hit-ratio", type=float, default=0.2, help="part des lignes qui déclenchent une règle")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--json", help="écrit les résultats dans ce fichier")
+    args = ap.parse_args()
+
+    results = []
+    for count in args.rules:
+        r = bench(count, args.lines, args.hit_ratio, args.seed)
+        results.append(r)
+        print(f"rules={r['rules']:<6} compile={r['compile_ms']:>8.2f} ms  "
+              f"compiled={r['compiled_us_per_line']:>7.2f} us/line  "
+              f"linear={r['linear_us_per_line']:>10.2f} us/line  "
+              f"x{r['speedup']:<7} mismatches={r['mismatches']}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
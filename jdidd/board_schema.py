@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+# Fichier : board_schema.py
+"""
+Schéma des cartes (mcu_database.json) : héritage, validation, cache compilé.
+
+Format (compatible avec l'ancien : une carte = {module: {param: meta}}) :
+
+    {
+      "modules": {                              # définitions partagées (optionnel)
+        "NVM": { "MAX_LOG1": {"label": ..., "type": "text", "access": "get", "cache": "static"}, ... }
+      },
+      "cartes": {
+        "carte_a": {
+          "NVM": {"$extends": "NVM"},           # module partagé
+          "SYS": {"$extends": "SYS", "$exclude": ["RESET"], "EXTRA": {...}},
+          "GSM": { ... }                        # module propre à la carte
+        },
+        "carte_b": {"$extends": "carte_a", "$exclude": ["GSM"], "LoRaWAN": {...}}
+      }
+    }
+
+- "$extends" d'une carte : reprend les modules d'une autre carte (dans son
+  ordre) ; les modules déclarés ensuite remplacent ou s'ajoutent.
+- "$extends" d'un module : reprend un module de "modules" ; les paramètres
+  déclarés ensuite remplacent ou s'ajoutent.
+- "$exclude" : noms retirés de ce qui est hérité.
+- "cache" d'un paramètre : politique du cache de valeurs (voir param_cache).
+
+Le schéma résolu est validé une fois (PARAM_SCHEMA) puis compilé en
+BoardSchema : des ParamDef immuables, partagés entre toutes les cartes qui
+déclarent le même paramètre. Le résultat est mis en cache (pickle) ; le cache
+est valable tant que la date et la taille du JSON n'ont pas changé, ou, à
+défaut, tant que son empreinte SHA-256 est identique.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from param_cache import CACHE_POLICIES, CACHE_VOLATILE
+
+CACHE_VERSION = 2
+SCHEMA_FILE_NAMES = ("mcu_database.json", "menzu_config.json")
+
+EXTENDS = "$extends"
+EXCLUDE = "$exclude"
+
+PARAM_TYPES = ("text", "choice")
+PARAM_ACCESS = ("get", "set", "getset")
+
+# Schéma déclaré d'un paramètre : clé -> (types acceptés, obligatoire)
+PARAM_SCHEMA = {
+    "label": (str, False),
+    "type": (str, False),
+    "access": (str, False),
+    "choices": (dict, False),
+    "cache": ((str, int, float), False),   # politique de param_cache ou durée de vie (s)
+}
+
+
+@dataclass(frozen=True)
+class ParamDef:
+    label: str
+    ptype: str            # "text" | "choice"
+    access: str           # "get" | "set" | "getset"
+    choices: Optional[Dict[str, str]] = None  # pour type="choice"
+    cache: Any = CACHE_VOLATILE               # "static" | "session" | "volatile" | secondes
+
+    def to_meta(self) -> Dict[str, Any]:
+        meta: Dict[str, Any] = {"label": self.label, "type": self.ptype, "access": self.access}
+        if self.choices is not None:
+            meta["choices"] = dict(self.choices)
+        if self.cache != CACHE_VOLATILE:
+            meta["cache"] = self.cache
+        return meta
+
+
+class SchemaError(ValueError):
+    """Schéma invalide ; errors liste chaque problème avec son chemin."""
+
+    def __init__(self, errors: list[str]):
+        super().__init__("Schéma invalide :\n  - " + "\n  - ".join(errors))
+        self.errors = errors
+
+
+class BoardSchema:
+    """Schéma compilé : carte -> module -> clé -> ParamDef (ordre du JSON conservé)."""
+
+    def __init__(self, cards: Dict[str, Dict[str, Dict[str, ParamDef]]], source: str = "") -> None:
+        self.cards = cards
+        self.source = source
+
+    def card_names(self) -> list[str]:
+        return list(self.cards)
+
+    def module_names(self, card: str) -> list[str]:
+        return list(self.cards.get(card, {}))
+
+    def params(self, card: str, module: str) -> Dict[str, ParamDef]:
+        return self.cards.get(card, {}).get(module, {})
+
+    def param_count(self) -> int:
+        return sum(len(p) for modules in self.cards.values() for p in modules.values())
+
+    def unique_param_count(self) -> int:
+        return len({id(d) for modules in self.cards.values() for p in modules.values() for d in p.values()})
+
+    def to_config(self) -> Dict[str, Any]:
+        """Forme dict résolue {"cartes": {carte: {module: {clé: meta}}}} (ancien format)."""
+        return {"cartes": {
+            card: {module: {key: pdef.to_meta() for key, pdef in params.items()}
+                   for module, params in modules.items()}
+            for card, modules in self.cards.items()
+        }}
+
+
+# ============================ Résolution ============================
+
+def _normalize_schema(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Retourne un dict du type:
+      { "cartes": { <carte>: { <module>: { <param>: meta_dict }}}, "modules": {...} }
+    Essaie d'accepter quelques variantes (“boards”, “cards”).
+    """
+    if isinstance(raw, dict) and "cartes" in raw and isinstance(raw["cartes"], dict):
+        return raw
+    for alt in ("boards", "cards"):
+        if isinstance(raw, dict) and alt in raw and isinstance(raw[alt], dict):
+            return {"cartes": raw[alt], "modules": raw.get("modules", {})}
+    if isinstance(raw, dict) and raw and all(isinstance(v, dict) for v in raw.values()):
+        return {"cartes": raw}
+    raise ValueError("Schéma JSON non reconnu (clé 'cartes' absente ou invalide).")
+
+
+def _merge(inherited: Dict[str, Any], own: Dict[str, Any], path: str, errors: list[str]) -> Dict[str, Any]:
+    """inherited privé de own["$exclude"], puis complété / remplacé par les autres clés de own."""
+    excluded = own.get(EXCLUDE, [])
+    if not isinstance(excluded, list):
+        errors.append(f"{path}.{EXCLUDE}: liste attendue")
+        excluded = []
+    merged = {k: v for k, v in inherited.items() if k not in excluded}
+    merged.update((k, v) for k, v in own.items() if k not in (EXTENDS, EXCLUDE))
+    return merged
+
+
+def _resolve_module(name: str, module: Any, shared: Dict[str, Any], path: str, errors: list[str]) -> Any:
+    if not isinstance(module, dict) or EXTENDS not in module:
+        return module
+    base = module[EXTENDS]
+    if base not in shared or not isinstance(shared[base], dict):
+        errors.append(f"{path}: module partagé '{base}' inconnu")
+        return {}
+    return _merge(shared[base], module, path, errors)
+
+
+def _resolve_card(name: str, cards: Dict[str, Any], shared: Dict[str, Any], resolved: Dict[str, Any],
+                  errors: list[str], stack: Tuple[str, ...] = ()) -> Dict[str, Any]:
+    if name in resolved:
+        return resolved[name]
+    card = cards[name]
+    if not isinstance(card, dict):
+        errors.append(f"cartes.{name}: dict attendu")
+        resolved[name] = {}
+        return {}
+    inherited: Dict[str, Any] = {}
+    base = card.get(EXTENDS)
+    if base is not None:
+        if base in stack or base == name:
+            errors.append(f"cartes.{name}: héritage circulaire ({' -> '.join(stack + (name, base))})")
+        elif base not in cards:
+            errors.append(f"cartes.{name}: carte parente '{base}' inconnue")
+        else:
+            inherited = _resolve_card(base, cards, shared, resolved, errors, stack + (name,))
+    modules = _merge(inherited, card, f"cartes.{name}", errors)
+    result = {m: _resolve_module(m, params, shared, f"cartes.{name}.{m}", errors) for m, params in modules.items()}
+    resolved[name] = result
+    return result
+
+
+# ============================ Validation / compilation ============================
+
+def _validate_param(meta: Any, path: str, errors: list[str]) -> None:
+    if not isinstance(meta, dict):
+        errors.append(f"{path}: dict attendu, reçu {type(meta).__name__}")
+        return
+    for key, value in meta.items():
+        if key not in PARAM_SCHEMA:
+            errors.append(f"{path}: clé inconnue '{key}'")
+        elif not isinstance(value, PARAM_SCHEMA[key][0]) or isinstance(value, bool):
+            types = PARAM_SCHEMA[key][0]
+            names = " | ".join(t.__name__ for t in types) if isinstance(types, tuple) else types.__name__
+            errors.append(f"{path}.{key}: {names} attendu")
+    for key, (_, required) in PARAM_SCHEMA.items():
+        if required and key not in meta:
+            errors.append(f"{path}: clé '{key}' manquante")
+    ptype = meta.get("type", "text")
+    if ptype not in PARAM_TYPES:
+        errors.append(f"{path}.type: '{ptype}' (attendu {' | '.join(PARAM_TYPES)})")
+    access = str(meta.get("access", "getset")).lower()
+    if access not in PARAM_ACCESS:
+        errors.append(f"{path}.access: '{access}' (attendu {' | '.join(PARAM_ACCESS)})")
+    choices = meta.get("choices")
+    if ptype == "choice":
+        if not isinstance(choices, dict) or not choices:
+            errors.append(f"{path}.choices: obligatoire (dict non vide) pour type 'choice'")
+        elif not all(isinstance(v, str) for v in choices.values()):
+            errors.append(f"{path}.choices: libellés texte attendus")
+    cache = meta.get("cache", CACHE_VOLATILE)
+    if isinstance(cache, str) and cache not in CACHE_POLICIES:
+        errors.append(f"{path}.cache: '{cache}' (attendu {' | '.join(CACHE_POLICIES)} ou une durée en s)")
+    elif isinstance(cache, (int, float)) and not isinstance(cache, bool) and cache < 0:
+        errors.append(f"{path}.cache: durée négative")
+
+
+def compile_schema(raw: Dict[str, Any], source: str = "") -> BoardSchema:
+    """Résout l'héritage, valide tout le schéma puis le compile. Lève SchemaError (ou ValueError)."""
+    data = _normalize_schema(raw)
+    cards = data["cartes"]
+    shared = data.get("modules", {})
+    errors: list[str] = []
+    if not isinstance(shared, dict):
+        errors.append("modules: dict attendu")
+        shared = {}
+
+    resolved: Dict[str, Any] = {}
+    for name in cards:
+        _resolve_card(name, cards, shared, resolved, errors)
+
+    interned: Dict[Tuple, ParamDef] = {}
+    compiled: Dict[str, Dict[str, Dict[str, ParamDef]]] = {}
+    for card, modules in resolved.items():
+        compiled[card] = {}
+        for module, params in modules.items():
+            path = f"cartes.{card}.{module}"
+            if not isinstance(params, dict):
+                errors.append(f"{path}: dict attendu, reçu {type(params).__name__}")
+                continue
+            defs: Dict[str, ParamDef] = {}
+            for key, meta in params.items():
+                before = len(errors)
+                _validate_param(meta, f"{path}.{key}", errors)
+                if len(errors) != before:
+                    continue
+                ptype = meta.get("type", "text")
+                choices = meta.get("choices") if ptype == "choice" else None
+                identity = (meta.get("label", key), ptype, str(meta.get("access", "getset")).lower(),
+                            tuple(choices.items()) if choices else None, meta.get("cache", CACHE_VOLATILE))
+                pdef = interned.get(identity)
+                if pdef is None:
+                    pdef = interned[identity] = ParamDef(identity[0], identity[1], identity[2],
+                                                         dict(choices) if choices else None, identity[4])
+                defs[key] = pdef
+            compiled[card][module] = defs
+    if errors:
+        raise SchemaError(errors)
+    return BoardSchema(compiled, source)
+
+
+# ============================ Cache ============================
+
+def cache_path_for(json_path: str) -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    digest = hashlib.sha1(os.path.abspath(json_path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(base, "jdidd", f"board_schema-{digest}.pickle")
+
+
+def _read_cache(cache_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(cache_path, "rb") as f:
+            entry = pickle.load(f)
+    except Exception:           # absent, tronqué, classe renommée... : on recompile
+        return None
+    if not isinstance(entry, dict) or entry.get("version") != CACHE_VERSION:
+        return None
+    return entry
+
+
+def _write_cache(cache_path: str, entry: Dict[str, Any]) -> None:
+    """Écriture atomique ; un cache impossible à écrire n'est pas une erreur."""
+    try:
+        folder = os.path.dirname(cache_path)
+        os.makedirs(folder, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".tmp-", suffix=".pickle")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+    except OSError:
+        pass
+
+
+def load_schema_file(json_path: str, use_cache: bool = True) -> BoardSchema:
+    """Schéma compilé d'un fichier, depuis le cache si le fichier n'a pas changé."""
+    st = os.stat(json_path)
+    cache_path = cache_path_for(json_path)
+    entry = _read_cache(cache_path) if use_cache else None
+    if entry and entry["mtime_ns"] == st.st_mtime_ns and entry["size"] == st.st_size:
+        schema = entry["schema"]
+        schema.source = json_path
+        return schema
+
+    with open(json_path, "rb") as f:
+        content = f.read()
+    digest = hashlib.sha256(content).hexdigest()
+    if entry and entry["sha256"] == digest:
+        schema = entry["schema"]                  # fichier touché mais identique
+    else:
+        schema = compile_schema(json.loads(content.decode("utf-8")), json_path)
+    schema.source = json_path
+    if use_cache:
+        _write_cache(cache_path, {"version": CACHE_VERSION, "mtime_ns": st.st_mtime_ns, "size": st.st_size,
+                                  "sha256": digest, "schema": schema})
+    return schema
+
+
+def schema_candidates(json_path: Optional[str] = None) -> list[str]:
+    """
+    Chemins essayés, dans l'ordre :
+      1) json_path si fourni
+      2) CWD:  mcu_database.json  puis menzu_config.json
+      3) ICI:  mcu_database.json  puis menzu_config.json
+    """
+    candidates = [json_path] if json_path else []
+    here = os.path.dirname(os.path.abspath(__file__))
+    for bn in SCHEMA_FILE_NAMES:
+        for folder in (os.getcwd(), here):
+            p = os.path.join(folder, bn)
+            if p not in candidates:
+                candidates.append(p)
+    return candidates
+
+
+def load_board_schema(json_path: Optional[str] = None, use_cache: bool = True) -> BoardSchema:
+    """Premier schéma valide parmi schema_candidates(). Lève FileNotFoundError sinon."""
+    tried: list[str] = []
+    for p in schema_candidates(json_path):
+        if os.path.exists(p):
+            try:
+                return load_schema_file(p, use_cache)
+            except Exception as e:
+                tried.append(f"{p} -> {e}")
+
+    detail = "\n  - " + "\n  - ".join(tried) if tried else ""
+    raise FileNotFoundError(
+        "Impossible de charger un JSON valide parmi " + " / ".join(SCHEMA_FILE_NAMES) + "." + detail
+    )
+
+
+def load_config_any(json_path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Schéma résolu (héritage appliqué, validé) sous l'ancienne forme dict
+    {"cartes": ...} avec "_loaded_from". Sans Qt : utilisable par l'émulateur.
+    """
+    schema = load_board_schema(json_path)
+    data = schema.to_config()
+    data["_loaded_from"] = schema.source
+    return data
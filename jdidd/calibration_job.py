@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+# Fichier : calibration_job.py
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+
+@dataclass
+class CalibTask:
+    """Une lecture ("get") ou écriture ("set") de paramètre à exécuter par le job."""
+    module: str
+    key: str
+    op: str                      # "get" | "set"
+    value: Optional[str] = None  # pour "set"
+
+
+@dataclass
+class CalibSummary:
+    """Bilan d'un job (rendu par le signal finished)."""
+    op: str
+    total: int
+    done: int = 0
+    ok: int = 0
+    cached: int = 0              # lectures servies par le cache du backend
+    cancelled: bool = False
+    wall_ms: float = 0.0
+    latencies_ms: Dict[str, float] = field(default_factory=dict)   # "MODULE.KEY" -> ms
+
+
+class CalibrationJob(QObject):
+    """
+    Exécute un Get All / Set All dans un QThread (même schéma que SerialWorker).
+
+    Les tâches sont regroupées par chemin shell : chaque répertoire n'est
+    visité qu'une fois et son lot part en pipeline (backend.get_many/set_many).
+    Chaque résultat est remonté au GUI dès qu'il arrive. Les lectures passent
+    par le cache du backend, sauf refresh=True.
+    """
+
+    result_ready = pyqtSignal(int, str, bool, float, bool)   # index tâche, valeur, ok, latence ms, du cache
+    progress = pyqtSignal(int, int, float)             # faits, total, ETA (s)
+    finished = pyqtSignal(object)                      # CalibSummary
+
+    def __init__(self, backend: Any, tasks: List[CalibTask], window: int = 8, refresh: bool = False) -> None:
+        super().__init__()
+        self.backend = backend
+        self.tasks = tasks
+        self.window = window
+        self.refresh = refresh
+        self._cancel = threading.Event()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def _groups(self) -> List[tuple[str, List[int]]]:
+        """Indices des tâches regroupés par chemin shell (ordre de première apparition)."""
+        groups: Dict[str, List[int]] = {}
+        for i, t in enumerate(self.tasks):
+            path = self.backend._module_path(t.module) or f"?{t.module}"
+            groups.setdefault(path, []).append(i)
+        return list(groups.items())
+
+    def run(self) -> None:
+        op = self.tasks[0].op if self.tasks else "get"
+        summary = CalibSummary(op=op, total=len(self.tasks))
+        start = time.monotonic()
+        try:
+            for _, indices in self._groups():
+                if self._cancel.is_set():
+                    break
+                module = self.tasks[indices[0]].module
+
+                def on_result(j: int, res, indices=indices) -> None:
+                    task = self.tasks[indices[j]]
+                    summary.done += 1
+                    summary.ok += int(res.ok)
+                    summary.cached += int(res.cached)
+                    if not res.cached:
+                        summary.latencies_ms[f"{task.module}.{task.key}"] = res.elapsed_ms
+                    self.result_ready.emit(indices[j], res.value, res.ok, res.elapsed_ms, res.cached)
+                    elapsed = time.monotonic() - start
+                    eta = elapsed / summary.done * (summary.total - summary.done)
+                    self.progress.emit(summary.done, summary.total, eta)
+
+                if op == "set":
+                    items = [(self.tasks[i].key, self.tasks[i].value) for i in indices]
+                    self.backend.set_many(module, items, window=self.window,
+                                          on_result=on_result, should_stop=self._cancel.is_set)
+                else:
+                    keys = [self.tasks[i].key for i in indices]
+                    self.backend.get_many(module, keys, window=self.window, on_result=on_result,
+                                          should_stop=self._cancel.is_set, refresh=self.refresh)
+        finally:
+            summary.cancelled = self._cancel.is_set()
+            summary.wall_ms = (time.monotonic() - start) * 1000.0
+            self.finished.emit(summary)
@@ -3,83 +3,28 @@
 
 from __future__ import annotations
 
-import json
-import os
 import time
-from dataclasses import dataclass
-from typing import Any, Dict, Optional, Tuple, Iterable
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
 
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QPushButton, QComboBox,
-    QLineEdit, QTextEdit, QScrollArea, QGroupBox, QMessageBox, QSizePolicy
+    QLineEdit, QTextEdit, QScrollArea, QGroupBox, QMessageBox, QSizePolicy, QProgressBar, QStackedWidget,
+    QCheckBox, QMenu, QFileDialog, QApplication
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QThread, pyqtSignal
 
-# ========================= Modèle & utilitaires =========================
-
-@dataclass
-class ParamDef:
-    label: str
-    ptype: str            # "text" | "choice"
-    access: str           # "get" | "set" | "getset"
-    choices: Optional[Dict[str, str]] = None  # pour type="choice"
-
-
-def _load_json_raw(path: str) -> Dict[str, Any]:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
-
-
-def _normalize_schema(raw: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Retourne un dict du type:
-      { "cartes": { <carte>: { <module>: { <param>: meta_dict }}}}
-    Essaie d'accepter quelques variantes (“boards”, “cards”).
-    """
-    if isinstance(raw, dict) and "cartes" in raw and isinstance(raw["cartes"], dict):
-        return raw
-    for alt in ("boards", "cards"):
-        if isinstance(raw, dict) and alt in raw and isinstance(raw[alt], dict):
-            return {"cartes": raw[alt]}
-    if isinstance(raw, dict) and raw and all(isinstance(v, dict) for v in raw.values()):
-        return {"cartes": raw}
-    raise ValueError("Schéma JSON non reconnu (clé 'cartes' absente ou invalide).")
-
-
-def load_config_any(json_path: Optional[str]) -> Dict[str, Any]:
-    """
-    Essaie successivement:
-      1) json_path si fourni
-      2) CWD:  mcu_database.json  puis menzu_config.json
-      3) ICI:  mcu_database.json  puis menzu_config.json
-    Normalise et renvoie un dict avec 'cartes'.
-    """
-    tried: list[str] = []
-    candidates: list[str] = []
-
-    if json_path:
-        candidates.append(json_path)
+from calibration_job import CalibrationJob, CalibTask, CalibSummary
+from board_schema import BoardSchema, ParamDef, load_board_schema
+from fleet_dialog import FleetDialog
+from param_snapshot import (ParamSnapshot, normalize_value, is_error_reply, load_snapshot, save_snapshot,
+                            diff_snapshots, format_diff)
 
-    here = os.path.dirname(__file__)
-    for bn in ("mcu_database.json", "menzu_config.json"):
-        candidates.append(os.path.join(os.getcwd(), bn))
-        candidates.append(os.path.join(here, bn))
-
-    for p in candidates:
-        if os.path.exists(p):
-            try:
-                raw = _load_json_raw(p)
-                data = _normalize_schema(raw)
-                data["_loaded_from"] = p
-                return data
-            except Exception as e:
-                tried.append(f"{p} -> {e}")
+# ========================= Modèle & utilitaires =========================
 
-    detail = "\n  - " + "\n  - ".join(tried) if tried else ""
-    raise FileNotFoundError(
-        "Impossible de charger un JSON valide parmi mcu_database.json / menzu_config.json."
-        + detail
-    )
+def refresh_requested() -> bool:
+    """Maj enfoncée pendant le clic : relire sur le device en ignorant le cache."""
+    return bool(QApplication.keyboardModifiers() & Qt.KeyboardModifier.ShiftModifier)
 
 
 # ============================ ParamRow =============================
@@ -87,9 +32,12 @@ def load_config_any(json_path: Optional[str]) -> Dict[str, Any]:
 class ParamRow(QWidget):
     """
     Une ligne paramètre: label + input + boutons GET/SET.
-    Tout est loggé dans la console.
+    Tout est loggé dans la console. device_value(module, clé, valeur) est
+    émis quand un GET/SET unitaire fait connaître la valeur du device.
     """
 
+    device_value = pyqtSignal(str, str, str)
+
     def __init__(
         self,
         module_name: str,
@@ -133,6 +81,13 @@ class ParamRow(QWidget):
             self.input_widget.setPlaceholderText(self.pdef.label)
         grid.addWidget(self.input_widget, 0, 1)
 
+        # Modifié à la main depuis le dernier affichage d'une valeur lue / cible : seul cas écrit par Set All
+        self.edited = False
+        if isinstance(self.input_widget, QComboBox):
+            self.input_widget.activated.connect(self._on_user_edit)
+        else:
+            self.input_widget.textEdited.connect(self._on_user_edit)
+
         # Boutons
         self.btn_get = QPushButton("Get")
         self.btn_set = QPushButton("Set")
@@ -147,13 +102,20 @@ class ParamRow(QWidget):
         self.btn_get.setVisible(can_get)
         self.btn_set.setVisible(can_set)
 
+        self.btn_get.setToolTip("Maj+clic : relire sur le device (ignore le cache)")
+
         # Handlers
         self.btn_get.clicked.connect(self._on_get)
         self.btn_set.clicked.connect(self._on_set)
 
+        # Origine de la dernière valeur lue ("cache" si rien n'a été envoyé)
+        self.src_lbl = QLabel()
+        self.src_lbl.setStyleSheet("color:#999;")
+
         btns = QHBoxLayout()
         btns.addWidget(self.btn_get)
         btns.addWidget(self.btn_set)
+        btns.addWidget(self.src_lbl)
         btns.addStretch(1)
         grid.addLayout(btns, 0, 2)
 
@@ -167,54 +129,86 @@ class ParamRow(QWidget):
         self.console.ensureCursorVisible()
 
     # ---------- Actions ----------
+    def apply_get_reply(self, reply: str, cached: bool = False) -> None:
+        """Affiche une valeur lue (GET unitaire ou Get All en tâche de fond)."""
+        self._log(f"→ GET {self.module}.{self.key}")
+        self._log(f"← {reply} (cache)" if cached else f"← {reply}")
+        self.src_lbl.setText("cache" if cached else "")
+        self.src_lbl.setToolTip("Valeur servie par le cache ; Maj+Get pour relire" if cached else "")
+        idx_key = self.show_value(reply)
+        if idx_key is not None:
+            self._log(f"[INFO] {self.module}.{self.key} = {self.pdef.choices[idx_key]} (key='{idx_key}')")
+
+    def _on_user_edit(self, *_args) -> None:
+        self.edited = True
+
+    def show_value(self, reply: str) -> Optional[str]:
+        """Met la valeur (lue ou cible) dans le champ, sans log. Rend la clé de choix reconnue (ou None)."""
+        self.edited = False
+        # Si choix: mettre à jour la sélection selon la clé reçue
+        if self.pdef.ptype == "choice" and self.pdef.choices:
+            idx_key = (reply.split()[-1] if reply else "").strip()
+            if idx_key in (self.pdef.choices or {}):
+                for i in range(self.input_widget.count()):  # type: ignore
+                    if self.input_widget.itemData(i) == idx_key:  # type: ignore
+                        self.input_widget.setCurrentIndex(i)  # type: ignore
+                        break
+                return idx_key
+        else:
+            if hasattr(self.input_widget, "setText"):
+                self.input_widget.setText(reply)  # type: ignore
+        return None
+
     def _on_get(self) -> None:
         try:
-            reply = self.backend.do_get(self.module, self.key)
-            self._log(f"→ GET {self.module}.{self.key}")
-            self._log(f"← {reply}")
-
-            # Si choix: mettre à jour la sélection selon la clé reçue
-            if self.pdef.ptype == "choice" and self.pdef.choices:
-                idx_key = (reply.split()[-1] if reply else "").strip()
-                if idx_key in (self.pdef.choices or {}):
-                    for i in range(self.input_widget.count()):  # type: ignore
-                        if self.input_widget.itemData(i) == idx_key:  # type: ignore
-                            self.input_widget.setCurrentIndex(i)  # type: ignore
-                            break
-                    self._log(f"[INFO] {self.module}.{self.key} = {self.pdef.choices[idx_key]} (key='{idx_key}')")
-            else:
-                if hasattr(self.input_widget, "setText"):
-                    self.input_widget.setText(reply)  # type: ignore
+            reply = self.backend.do_get(self.module, self.key, refresh=refresh_requested())
+            self.apply_get_reply(reply, getattr(self.backend, "last_get_cached", False))
+            if not is_error_reply(reply):
+                self.device_value.emit(self.module, self.key, normalize_value(self.pdef, reply))
         except Exception as e:
             self._log(f"[ERREUR] GET {self.module}.{self.key}: {e}")
             QMessageBox.critical(self, "Erreur GET", f"Impossible de lire {self.key}:\n{e}")
 
-    def _on_set(self) -> None:
-        try:
-            if isinstance(self.input_widget, QComboBox):
-                value_key = self.input_widget.currentData()
-                value_display = self.input_widget.currentText()
-                if value_key is None:
-                    value_key = value_display
-            else:
-                value_key = self.input_widget.text().strip()  # type: ignore
-                value_display = value_key
+    def value_for_set(self) -> Optional[Tuple[str, str]]:
+        """(valeur brute, libellé affiché) à écrire, ou None si la valeur manque."""
+        if isinstance(self.input_widget, QComboBox):
+            value_key = self.input_widget.currentData()
+            value_display = self.input_widget.currentText()
+            if value_key is None:
+                value_key = value_display
+        else:
+            value_key = self.input_widget.text().strip()  # type: ignore
+            value_display = value_key
 
-            # Autoriser SET sans valeur pour les paramètres "set"-only
-            if not value_key:
-                if ("set" in self.pdef.access) and ("get" not in self.pdef.access):
-                    value_key = ""  # envoie 'set <key>' sans argument
-                else:
-                    QMessageBox.warning(self, "Valeur manquante", f"Veuillez fournir une valeur pour {self.key}.")
-                    return
+        # Autoriser SET sans valeur pour les paramètres "set"-only
+        if not value_key:
+            if ("set" in self.pdef.access) and ("get" not in self.pdef.access):
+                return "", value_display  # envoie 'set <key>' sans argument
+            return None
+        return str(value_key), value_display
 
-            reply = self.backend.do_set(self.module, self.key, str(value_key))
-            self._log(f"→ SET {self.module}.{self.key} = {value_display} (raw:{value_key})")
-            self._log(f"← {reply}")
+    def _on_set(self) -> None:
+        try:
+            value = self.value_for_set()
+            if value is None:
+                QMessageBox.warning(self, "Valeur manquante", f"Veuillez fournir une valeur pour {self.key}.")
+                return
+            value_key, value_display = value
+            reply = self.backend.do_set(self.module, self.key, value_key)
+            self.log_set_reply(value_key, value_display, reply)
+            if not is_error_reply(reply):
+                self.edited = False
+            if not is_error_reply(reply) and "get" in self.pdef.access:
+                self.device_value.emit(self.module, self.key, value_key)
         except Exception as e:
             self._log(f"[ERREUR] SET {self.module}.{self.key}: {e}")
             QMessageBox.critical(self, "Erreur SET", f"Impossible d'écrire {self.key}:\n{e}")
 
+    def log_set_reply(self, value_key: str, value_display: str, reply: str) -> None:
+        self._log(f"→ SET {self.module}.{self.key} = {value_display} (raw:{value_key})")
+        self._log(f"← {reply}")
+        self.src_lbl.setText("")
+
 
 # =========================== Page embarquable ===========================
 
@@ -223,15 +217,53 @@ class MenzuCalibratorPage(QWidget):
     Onglet Calibrator.
     - Utilise UN backend série partagé (injecté par main.py).
     - Aucun bouton connecter/déconnecter ici (géré par le Terminal).
+    - Get All / Set All tournent dans un QThread ; busy_changed prévient
+      l'app pour qu'elle ne reprenne pas le port pendant ce temps.
+    - Chaque page (carte, module) est construite à la première visite puis
+      gardée dans un QStackedWidget : revenir sur un module ne recrée aucun
+      widget et conserve les valeurs affichées. Au-delà de PAGE_CACHE_SIZE
+      pages, la moins récemment vue est détruite ; les valeurs connues sont
+      réaffichées si elle est reconstruite.
+    - Get All lit toute la carte et tient un instantané des valeurs du device
+      (param_snapshot), enregistrable et comparable à un fichier. Un profil
+      chargé fixe les valeurs cibles ; Set All n'écrit, en un seul job, que
+      les paramètres dont la cible diffère de la valeur connue du device
+      (case "Écarts seulement").
+    - Les valeurs des paramètres déclarés "static"/"session" dans le schéma
+      sont servies par le cache du backend (mention "cache") ; Maj+clic sur
+      Get / Get All force la relecture.
+    - "Production..." applique un profil à plusieurs cartes en parallèle,
+      chacune sur son port (fleet_dialog / fleet_provisioning).
+    - Les messages [DEBUG] ne sont écrits dans la console que si le debug
+      est activé (case "Debug", désactivée par défaut).
     """
 
+    busy_changed = pyqtSignal(bool)
+
+    PAGE_CACHE_SIZE = 16
+
+    # Ordre imposé pour quelques modules
+    PREFERRED_ORDERS = {
+        "LoRaWAN_at": ["APPKEY", "DEUI", "NWKKEY", "ACT", "CLASS", "NJS", "CFM"],
+        "NVM": [
+            "MAX_LOG1","MAX_LOG2","MAX_LOG3","MAX_LOG4","MAX_LOG5",
+            "LOG1_WRITE","LOG2_WRITE","LOG3_WRITE","LOG4_WRITE","LOG5_WRITE",
+            "LOG1_READ","LOG2_READ","LOG3_READ","LOG4_READ","LOG5_READ",
+            "LOG1_UNREAD","LOG2_UNREAD","LOG3_UNREAD","LOG4_UNREAD","LOG5_UNREAD",
+            "CLEAR_LOG1","CLEAR_LOG2","CLEAR_LOG3","CLEAR_LOG4","CLEAR_LOG5"
+        ],
+        "MODBUS_Master": ["PORT","SPEED","PARITY","HOST"],
+    }
+
     def __init__(
         self,
         json_path: Optional[str] = None,
         backend: Optional[Any] = None,
         parent: Optional[QWidget] = None,
+        debug: bool = False,
     ) -> None:
         super().__init__(parent)
+        self.debug = debug
 
         # Backend : injecté par main.py (recommandé). Sinon, fallback autonome.
         if backend is None:
@@ -240,7 +272,15 @@ class MenzuCalibratorPage(QWidget):
             backend = SerialBackend()
         self.backend = backend
 
-        self.data: Dict[str, Any] = {}
+        self.schema = BoardSchema({})
+
+        # Pages construites : (carte, module) -> (page, lignes), ordre = moins récemment vue d'abord
+        self._pages: "OrderedDict[Tuple[str, str], Tuple[QWidget, list[ParamRow]]]" = OrderedDict()
+        self._current_rows: list[ParamRow] = []
+
+        # Valeurs du device par carte (Get All, GET/SET réussis) et profil cible chargé
+        self._snapshots: Dict[str, ParamSnapshot] = {}
+        self._profile: Optional[ParamSnapshot] = None
 
         root = QVBoxLayout(self)
         root.setContentsMargins(10, 10, 10, 10)
@@ -251,6 +291,11 @@ class MenzuCalibratorPage(QWidget):
         self.status_lbl = QLabel()
         self.status_lbl.setStyleSheet("color:#999;")
         status_bar.addWidget(self.status_lbl, 1)
+        self.chk_debug = QCheckBox("Debug")
+        self.chk_debug.setToolTip("Détail de la construction des pages dans la console")
+        self.chk_debug.setChecked(self.debug)
+        self.chk_debug.toggled.connect(self.set_debug)
+        status_bar.addWidget(self.chk_debug)
         root.addLayout(status_bar)
 
         # --- Sélection Carte/Module ---
@@ -265,28 +310,57 @@ class MenzuCalibratorPage(QWidget):
         sel.addWidget(self.cmb_module, 1)
         root.addLayout(sel)
 
-        # --- Zone paramètres (scroll) ---
-        self.params_scroll = QScrollArea()
-        self.params_scroll.setWidgetResizable(True)
-        self.params_host = QWidget()
-        self.params_layout = QVBoxLayout(self.params_host)
-        self.params_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-        self.params_layout.setSpacing(6)
-        self.params_layout.setContentsMargins(6, 6, 6, 6)
-        self.params_scroll.setWidget(self.params_host)
-        root.addWidget(self.params_scroll, 1)
+        # --- Zone paramètres : une page (scroll) par (carte, module) ---
+        self.params_stack = QStackedWidget()
+        self._empty_page = QWidget()
+        self.params_stack.addWidget(self._empty_page)
+        root.addWidget(self.params_stack, 1)
 
         # --- Boutons globaux ---
         bulk = QHBoxLayout()
         self.btn_get_all = QPushButton("Get All")
+        self.btn_get_all.setToolTip("Maj+clic : tout relire sur le device (ignore le cache)")
         self.btn_set_all = QPushButton("Set All")
+        self.btn_cancel_job = QPushButton("Annuler")
+        self.btn_cancel_job.setVisible(False)
+        self.job_progress = QProgressBar()
+        self.job_progress.setVisible(False)
+        self.job_eta_lbl = QLabel()
+        self.job_eta_lbl.setStyleSheet("color:#999;")
         self.btn_get_all.clicked.connect(self._on_get_all)
         self.btn_set_all.clicked.connect(self._on_set_all)
+        self.btn_cancel_job.clicked.connect(self._on_cancel_job)
+        bulk.addWidget(self.job_progress, 1)
+        bulk.addWidget(self.job_eta_lbl)
         bulk.addStretch(1)
+        self.btn_snapshot = QPushButton("Instantané")
+        snapshot_menu = QMenu(self.btn_snapshot)
+        snapshot_menu.addAction("Enregistrer l'instantané...", self._on_save_snapshot)
+        snapshot_menu.addAction("Charger un profil...", self._on_load_profile)
+        snapshot_menu.addAction("Comparer à un fichier...", self._on_diff_file)
+        snapshot_menu.addAction("Oublier le profil", self._on_clear_profile)
+        self.btn_snapshot.setMenu(snapshot_menu)
+        self.chk_delta = QCheckBox("Écarts seulement")
+        self.chk_delta.setChecked(True)
+        self.chk_delta.setToolTip("Set All n'écrit que les paramètres dont la valeur diffère de la dernière valeur lue")
+        self.btn_fleet = QPushButton("Production...")
+        self.btn_fleet.setToolTip("Appliquer un profil à plusieurs cartes en parallèle (un port par carte)")
+        self.btn_fleet.clicked.connect(self._on_fleet)
+        bulk.addWidget(self.btn_cancel_job)
+        bulk.addWidget(self.btn_fleet)
+        bulk.addWidget(self.btn_snapshot)
         bulk.addWidget(self.btn_get_all)
+        bulk.addWidget(self.chk_delta)
         bulk.addWidget(self.btn_set_all)
         root.addLayout(bulk)
 
+        # Job Get All / Set All en tâche de fond
+        self._job: Optional[CalibrationJob] = None
+        self._job_thread: Optional[QThread] = None
+        self._job_card = ""
+        self._job_tasks: list[CalibTask] = []
+        self._job_values: list[Tuple[str, str]] = []
+
         # --- Console ---
         grp = QGroupBox("Console")
         v = QVBoxLayout(grp)
@@ -295,20 +369,22 @@ class MenzuCalibratorPage(QWidget):
         v.addWidget(self.console)
         root.addWidget(grp, 1)
 
-        # --- Charger JSON ---
+        self.load_schema(json_path)
+
+    def load_schema(self, json_path: Optional[str] = None) -> bool:
+        """(Re)charge la base des cartes ; les pages construites avec l'ancienne sont détruites."""
         try:
-            self.data = load_config_any(json_path)
-            src = self.data.pop("_loaded_from", None)
-            if src:
-                self.console.append(f"[INFO] JSON chargé: {src}")
+            schema = load_board_schema(json_path)
         except Exception as e:
             self.console.append(f"[ERREUR] Chargement JSON: {e}")
             QMessageBox.critical(self, "JSON invalide", str(e))
             self._update_status_label()
-            return
+            return False
+        self.schema = schema
+        self.console.append(f"[INFO] JSON chargé: {self.schema.source}")
 
         # Remplir cartes
-        cards = list(self.data.get("cartes", {}).keys())
+        cards = self.schema.card_names()
         self.cmb_carte.blockSignals(True)
         self.cmb_module.blockSignals(True)
         self.cmb_carte.clear()
@@ -316,6 +392,7 @@ class MenzuCalibratorPage(QWidget):
         self.cmb_carte.addItems(cards)
         self.cmb_carte.blockSignals(False)
         self.cmb_module.blockSignals(False)
+        self.clear_page_cache()
 
         # Etat initial
         self._update_status_label()
@@ -323,6 +400,7 @@ class MenzuCalibratorPage(QWidget):
             self._on_card_changed(cards[0])
         else:
             self.console.append("[WARN] Aucune carte trouvée.")
+        return True
 
     # ---------- Helpers UI ----------
     def _update_status_label(self) -> None:
@@ -333,37 +411,49 @@ class MenzuCalibratorPage(QWidget):
 
         if connected:
             port = getattr(self.backend, "port", None)
-            self.status_lbl.setText(f"Backend: connecté à {port}")
+            text = f"Backend: connecté à {port}"
+            cache = getattr(self.backend, "cache", None)
+            if cache is not None:
+                stats = cache.stats()
+                text += f" — cache: {stats['entries']} valeur(s), {stats['hits']} hit(s) / {stats['misses']} miss"
+            self.status_lbl.setText(text)
         else:
             self.status_lbl.setText("Backend: hors-ligne (utilise le port du Terminal lorsque connecté)")
 
+    def set_debug(self, enabled: bool) -> None:
+        self.debug = bool(enabled)
+
+    def _debug(self, text: str) -> None:
+        if self.debug:
+            self.console.append(f"[DEBUG] {text}")
+
     def _clear_params(self) -> None:
-        while True:
-            item = self.params_layout.takeAt(0)
-            if item is None:
-                break
-            w = item.widget()
-            if w is not None:
-                w.deleteLater()
-
-    def _iter_rows(self) -> Iterable[ParamRow]:
-        for i in range(self.params_layout.count()):
-            it = self.params_layout.itemAt(i)
-            if it:
-                w = it.widget()
-                if isinstance(w, ParamRow):
-                    yield w
+        """Affiche une zone vide (les pages construites restent en cache)."""
+        self.params_stack.setCurrentWidget(self._empty_page)
+        self._current_rows = []
+
+    def clear_page_cache(self) -> None:
+        """Détruit toutes les pages construites puis reconstruit celle du module affiché."""
+        self._clear_params()
+        while self._pages:
+            self._evict_oldest()
+        module = self.cmb_module.currentText()
+        if module:
+            self._on_module_changed(module)
+
+    def _evict_oldest(self) -> None:
+        page_key, (page, rows) = self._pages.popitem(last=False)
+        self.params_stack.removeWidget(page)
+        page.deleteLater()
+        self._debug(f"Page évincée: {page_key[0]}.{page_key[1]}")
 
     # ---------- Cartes / Modules ----------
     def _on_card_changed(self, card_name: str) -> None:
-        modules_dict = self.data.get("cartes", {}).get(card_name, {})
-        if not isinstance(modules_dict, dict):
-            self.console.append(f"[ERREUR] Les modules de '{card_name}' ne sont pas un dict.")
-            self._clear_params()
-            return
-
-        modules = list(modules_dict.keys())
-        self.console.append(f"[DEBUG] Modules pour '{card_name}': {modules}")
+        modules = self.schema.module_names(card_name)
+        self._debug(f"Modules pour '{card_name}': {modules}")
+        if hasattr(self.backend, "configure_cache"):
+            self.backend.configure_cache({(m, k): pdef.cache for m in modules
+                                          for k, pdef in self.schema.params(card_name, m).items()})
 
         self.cmb_module.blockSignals(True)
         self.cmb_module.clear()
@@ -377,89 +467,354 @@ class MenzuCalibratorPage(QWidget):
             self._clear_params()
 
     def _on_module_changed(self, module_name: str) -> None:
-        self._clear_params()
-
         card_name = self.cmb_carte.currentText()
-        params = self.data.get("cartes", {}).get(card_name, {}).get(module_name, {})
-        if not isinstance(params, dict):
-            self.console.append(f"[ERREUR] Paramètres '{card_name}.{module_name}' non-dict.")
-            return
+        page_key = (card_name, module_name)
+        entry = self._pages.get(page_key)
+        if entry is None:
+            entry = self._build_page(card_name, module_name)
+            if entry is None:
+                self._clear_params()
+                return
+            self._pages[page_key] = entry
+            self.params_stack.addWidget(entry[0])
+            while len(self._pages) > self.PAGE_CACHE_SIZE:
+                self._evict_oldest()
+        else:
+            self._pages.move_to_end(page_key)
+        page, rows = entry
+        self.params_stack.setCurrentWidget(page)
+        self._current_rows = rows
+
+    def _build_page(self, card_name: str, module_name: str) -> Optional[Tuple[QWidget, list[ParamRow]]]:
+        """Construit la page d'un module (lignes ParamRow dans une zone défilante)."""
+        params = self.schema.params(card_name, module_name)
         if not params:
             self.console.append(f"[WARN] Aucun paramètre sous '{card_name}.{module_name}'.")
-            return
+            return None
 
-        # Ordre imposé pour quelques modules
-        preferred_orders = {
-            "LoRaWAN_at": ["APPKEY", "DEUI", "NWKKEY", "ACT", "CLASS", "NJS", "CFM"],
-            "NVM": [
-                "MAX_LOG1","MAX_LOG2","MAX_LOG3","MAX_LOG4","MAX_LOG5",
-                "LOG1_WRITE","LOG2_WRITE","LOG3_WRITE","LOG4_WRITE","LOG5_WRITE",
-                "LOG1_READ","LOG2_READ","LOG3_READ","LOG4_READ","LOG5_READ",
-                "LOG1_UNREAD","LOG2_UNREAD","LOG3_UNREAD","LOG4_UNREAD","LOG5_UNREAD",
-                "CLEAR_LOG1","CLEAR_LOG2","CLEAR_LOG3","CLEAR_LOG4","CLEAR_LOG5"
-            ],
-            "MODBUS_Master": ["PORT","SPEED","PARITY","HOST"],
-        }
         keys = list(params.keys())
-        if module_name in preferred_orders:
-            order = preferred_orders[module_name]
+        if module_name in self.PREFERRED_ORDERS:
+            order = self.PREFERRED_ORDERS[module_name]
             keys = [k for k in order if k in params] + [k for k in keys if k not in order]
 
-        self.console.append(f"[DEBUG] Params clés (ordonnés): {keys}")
+        self._debug(f"Params clés (ordonnés): {keys}")
 
-        created = 0
-        for key in keys:
-            meta = params.get(key)
-            if not isinstance(meta, dict):
-                self.console.append(f"[WARN] Param '{key}' ignoré: type {type(meta)}")
-                continue
-
-            pdef = ParamDef(
-                label=meta.get("label", key),
-                ptype=meta.get("type", "text"),
-                access=str(meta.get("access", "getset")).lower(),
-                choices=meta.get("choices") if meta.get("type") == "choice" else None,
-            )
+        page = QScrollArea()
+        page.setWidgetResizable(True)
+        host = QWidget()
+        layout = QVBoxLayout(host)
+        layout.setAlignment(Qt.AlignmentFlag.AlignTop)
+        layout.setSpacing(6)
+        layout.setContentsMargins(6, 6, 6, 6)
 
+        device = self._snapshots.get(card_name)
+        profile = self._profile if self._profile is not None and self._profile.card == card_name else None
+        rows: list[ParamRow] = []
+        for key in keys:
+            pdef = params[key]          # validé et partagé (board_schema)
             try:
                 row = ParamRow(module_name, key, pdef, self.backend, self.console)
-                self.params_layout.addWidget(row)
-                created += 1
-                self.console.append(f"[DEBUG] Ligne créée: {module_name}.{key} (access={pdef.access}, type={pdef.ptype})")
             except Exception as e:
                 self.console.append(f"[ERREUR] Création ligne '{key}': {e}")
+                continue
+            # Valeur cible du profil, sinon dernière valeur connue du device
+            value = profile.get(module_name, key) if profile else None
+            if value is None and device is not None:
+                value = device.get(module_name, key)
+            if value is not None:
+                row.show_value(value)
+            row.device_value.connect(lambda m, k, v, card=card_name: self._record(card, m, k, v))
+            layout.addWidget(row)
+            rows.append(row)
+            self._debug(f"Ligne créée: {module_name}.{key} (access={pdef.access}, type={pdef.ptype})")
 
         # Un seul stretch pour pousser le reste vers le haut
-        self.params_layout.addStretch(1)
-        self.console.append(f"[INFO] Lignes créées: {created}/{len(keys)} pour {card_name}.{module_name}")
+        layout.addStretch(1)
+        page.setWidget(host)
+        self._debug(f"Lignes créées: {len(rows)}/{len(keys)} pour {card_name}.{module_name}")
+        return page, rows
+
+    # ---------- Instantanés / profils ----------
+    def reset_device_snapshots(self) -> None:
+        """Oublie les valeurs connues du device (nouvelle connexion : peut-être une autre carte), pages comprises."""
+        self._snapshots.clear()
+        self.clear_page_cache()
+
+    def _record(self, card: str, module: str, key: str, value: str) -> None:
+        snap = self._snapshots.get(card)
+        if snap is None:
+            snap = self._snapshots[card] = ParamSnapshot(card=card)
+        snap.set(module, key, value)
+
+    def _find_row(self, card: str, module: str, key: str) -> Optional[ParamRow]:
+        """Ligne d'une page déjà construite (None si la page n'existe pas : rien n'est construit ici)."""
+        entry = self._pages.get((card, module))
+        if entry is None:
+            return None
+        for row in entry[1]:
+            if row.key == key:
+                return row
+        return None
+
+    def _on_save_snapshot(self) -> None:
+        card = self.cmb_carte.currentText()
+        snap = self._snapshots.get(card)
+        if not snap:
+            QMessageBox.information(self, "Instantané", "Aucune valeur lue pour cette carte : faites d'abord un Get All.")
+            return
+        default = f"{card}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+        path, _ = QFileDialog.getSaveFileName(self, "Enregistrer l'instantané", default, "JSON (*.json)")
+        if not path:
+            return
+        try:
+            save_snapshot(path, snap)
+        except OSError as e:
+            self.console.append(f"[ERREUR] Instantané: {e}")
+            QMessageBox.critical(self, "Instantané", str(e))
+            return
+        self.console.append(f"[INFO] Instantané enregistré: {path} ({len(snap)} paramètres)")
+
+    def _ask_snapshot_file(self, title: str) -> Optional[ParamSnapshot]:
+        path, _ = QFileDialog.getOpenFileName(self, title, "", "JSON (*.json)")
+        if not path:
+            return None
+        try:
+            return load_snapshot(path)
+        except (OSError, ValueError) as e:
+            self.console.append(f"[ERREUR] {path}: {e}")
+            QMessageBox.warning(self, title, f"Fichier illisible :\n{e}")
+            return None
+
+    def load_profile(self, profile: ParamSnapshot) -> bool:
+        """Fixe les valeurs cibles (affichées dans les champs, utilisées par Set All)."""
+        card = profile.card or self.cmb_carte.currentText()
+        if card not in self.schema.cards:
+            self.console.append(f"[ERREUR] Profil: carte '{card}' inconnue")
+            return False
+        profile.card = card
+        unknown = [f"{m}.{k}" for m, k, _ in profile.items() if k not in self.schema.params(card, m)]
+        if unknown:
+            self.console.append(f"[WARN] Profil: {len(unknown)} paramètre(s) inconnu(s) ignoré(s): {', '.join(unknown[:10])}")
+        self._profile = profile
+        if self.cmb_carte.currentText() != card:
+            self.cmb_carte.setCurrentText(card)
+        for (page_card, _), (_, rows) in self._pages.items():
+            if page_card == card:
+                for row in rows:
+                    value = profile.get(row.module, row.key)
+                    if value is not None:
+                        row.show_value(value)
+        self.console.append(f"[INFO] Profil chargé: {profile.source or '-'} ({len(profile)} paramètres, carte {card})")
+        return True
+
+    def _on_load_profile(self) -> None:
+        profile = self._ask_snapshot_file("Charger un profil")
+        if profile is not None:
+            self.load_profile(profile)
+
+    def _on_clear_profile(self) -> None:
+        self._profile = None
+        self.console.append("[INFO] Profil oublié (Set All utilise les valeurs des champs)")
+
+    def _on_diff_file(self) -> None:
+        card = self.cmb_carte.currentText()
+        device = self._snapshots.get(card)
+        if not device:
+            QMessageBox.information(self, "Comparer", "Aucune valeur lue pour cette carte : faites d'abord un Get All.")
+            return
+        other = self._ask_snapshot_file("Comparer à un fichier")
+        if other is None:
+            return
+        diffs = diff_snapshots(device, other)
+        changed = [d for d in diffs if d.old is not None and d.new is not None]
+        only_device = sum(1 for d in diffs if d.new is None)
+        only_file = sum(1 for d in diffs if d.old is None)
+        self.console.append(f"[INFO] Comparaison device -> {other.source}: {len(changed)} écart(s), "
+                            f"{only_device} absent(s) du fichier, {only_file} absent(s) de l'instantané")
+        for d in changed:
+            self.console.append(f"    {format_diff(d)}")
+
+    def _on_fleet(self) -> None:
+        """Mode production : le port du Terminal reste à l'app, les autres ports sont ouverts par le dialogue."""
+        dlg = FleetDialog(self.schema, self.cmb_carte.currentText(), self._profile,
+                          busy_ports=[getattr(self.backend, "port", None)],
+                          baudrate=getattr(self.backend, "baudrate", 115200), parent=self)
+        dlg.exec()
+
+    # ---------- Get/Set All (tâche de fond) ----------
+    def _is_job_running(self) -> bool:
+        return self._job is not None or self._job_thread is not None
+
+    def _set_busy(self, busy: bool) -> None:
+        """Verrouille l'UI qui touche au backend pendant un job."""
+        for w in (self.btn_get_all, self.btn_set_all, self.btn_snapshot, self.btn_fleet,
+                  self.cmb_carte, self.cmb_module, self.params_stack):
+            w.setEnabled(not busy)
+        self.btn_cancel_job.setVisible(busy)
+        self.btn_cancel_job.setEnabled(busy)
+        self.job_progress.setVisible(busy)
+        self.busy_changed.emit(busy)
+
+    def _start_job(self, card: str, tasks: list[CalibTask], refresh: bool = False) -> None:
+        self._job_card = card
+        self._job_tasks = tasks
+        self._job = CalibrationJob(self.backend, tasks, refresh=refresh)
+        self._job_thread = QThread()
+        self._job.moveToThread(self._job_thread)
+        self._job_thread.started.connect(self._job.run)
+        self._job.result_ready.connect(self._on_job_result)
+        self._job.progress.connect(self._on_job_progress)
+        self._job.finished.connect(self._on_job_finished)
+        self._job.finished.connect(self._job_thread.quit)
+        self._job.finished.connect(self._job.deleteLater)
+        self._job_thread.finished.connect(self._job_thread.deleteLater)
+        self._job_thread.finished.connect(self._on_job_thread_done)
+
+        self.job_progress.setRange(0, len(tasks))
+        self.job_progress.setValue(0)
+        self.job_eta_lbl.setText("")
+        self._set_busy(True)
+        self._job_thread.start()
+
+    def _on_job_result(self, index: int, value: str, ok: bool, latency_ms: float, cached: bool) -> None:
+        task = self._job_tasks[index]
+        row = self._find_row(self._job_card, task.module, task.key)
+        if not ok:
+            self.console.append(f"[ERREUR] {task.module}.{task.key}: pas de réponse complète ({value or 'vide'})")
+            return
+        if self._job_values:
+            value_key, value_display = self._job_values[index]
+            if row is not None:
+                row.log_set_reply(value_key, value_display, value)
+            else:
+                self.console.append(f"→ SET {task.module}.{task.key} = {value_display} (raw:{value_key})")
+                self.console.append(f"← {value}")
+            if not is_error_reply(value):
+                if row is not None:
+                    row.edited = False
+                if "get" in self.schema.params(self._job_card, task.module)[task.key].access:
+                    self._record(self._job_card, task.module, task.key, value_key)
+        else:
+            if row is not None:
+                row.apply_get_reply(value, cached)
+            else:
+                self.console.append(f"→ GET {task.module}.{task.key}")
+                self.console.append(f"← {value} (cache)" if cached else f"← {value}")
+            if not is_error_reply(value):
+                pdef = self.schema.params(self._job_card, task.module)[task.key]
+                self._record(self._job_card, task.module, task.key, normalize_value(pdef, value))
+
+    def _on_job_progress(self, done: int, total: int, eta_s: float) -> None:
+        self.job_progress.setValue(done)
+        self.job_eta_lbl.setText(f"{done}/{total} — ETA {eta_s:.1f} s")
+
+    def _on_cancel_job(self) -> None:
+        if self._job is not None:
+            self.btn_cancel_job.setEnabled(False)
+            self._job.cancel()
+
+    def _on_job_thread_done(self) -> None:
+        self._job_thread = None
+
+    def _on_job_finished(self, summary: CalibSummary) -> None:
+        self._job = None
+        self._job_tasks = []
+        self._job_values = []
+        self._set_busy(False)
+        self.job_eta_lbl.setText("")
+
+        label = "Set All" if summary.op == "set" else "Get All"
+        state = " (annulé)" if summary.cancelled else ""
+        verb = "écrits" if summary.op == "set" else "lus"
+        from_cache = f" (dont {summary.cached} depuis le cache)" if summary.cached else ""
+        self.console.append(
+            f"[INFO] {label}{state}: {summary.ok}/{summary.total} paramètres {verb}{from_cache} "
+            f"en {summary.wall_ms:.0f} ms"
+        )
+        self._update_status_label()
+        if summary.latencies_ms:
+            lat = sorted(summary.latencies_ms.items(), key=lambda kv: kv[1], reverse=True)
+            mean = sum(v for _, v in lat) / len(lat)
+            slowest = ", ".join(f"{k}={v:.1f}" for k, v in lat[:3])
+            self.console.append(f"[INFO] Latence par paramètre: moyenne {mean:.1f} ms, plus lents (ms): {slowest}")
 
-    # ---------- Get/Set All ----------
     def _on_get_all(self) -> None:
+        """
+        Lit tous les paramètres lisibles de la carte (tous modules) : nouvel instantané du device.
+        Les valeurs cachables valides viennent du cache ; Maj+clic relit tout.
+        """
+        refresh = refresh_requested()
         if not getattr(self.backend, "is_connected", lambda: False)():
             QMessageBox.warning(self, "Non connecté", "Veuillez d'abord démarrer la communication (onglet Terminal).")
             return
-        count = 0
-        for row in self._iter_rows():
-            if "get" in row.pdef.access:
-                row._on_get()
-                count += 1
-        self.console.append(f"[INFO] Get All: {count} paramètres lus")
+        if self._is_job_running():
+            return
+        card = self.cmb_carte.currentText()
+        tasks = [CalibTask(module, key, "get")
+                 for module in self.schema.module_names(card)
+                 for key, pdef in self.schema.params(card, module).items() if "get" in pdef.access]
+        if not tasks:
+            return
+        self._job_values = []
+        self._start_job(card, tasks, refresh)
+
+    def set_all_plan(self, card: str, delta: bool = True) -> Tuple[list[CalibTask], list[Tuple[str, str]], int]:
+        """
+        Écritures de Set All pour la carte : (tâches, (valeur, libellé) par tâche, nb ignorés car à jour).
+        Seules les valeurs voulues sont écrites : champ modifié à la main, sinon
+        valeur du profil chargé. Un champ jamais touché (défaut d'un choix,
+        valeur lue) n'est pas écrit, ni une action ("set" seul, ex. CLEAR_LOG).
+        En mode delta, une cible identique à la valeur connue du device est ignorée.
+        """
+        device = self._snapshots.get(card) if delta else None
+        profile = self._profile if self._profile is not None and self._profile.card == card else None
+        tasks: list[CalibTask] = []
+        values: list[Tuple[str, str]] = []
+        unchanged = 0
+        for module in self.schema.module_names(card):
+            for key, pdef in self.schema.params(card, module).items():
+                if pdef.access != "getset":
+                    continue
+                row = self._find_row(card, module, key)
+                if row is not None and row.edited:
+                    value = row.value_for_set()
+                    if value is None:
+                        self.console.append(f"[WARN] {module}.{key}: valeur manquante, ignoré")
+                        continue
+                elif profile is not None and profile.get(module, key) is not None:
+                    target = profile.get(module, key)
+                    value = (target, pdef.choices.get(target, target) if pdef.choices else target)
+                else:
+                    continue
+                if device is not None and device.get(module, key) == value[0]:
+                    unchanged += 1
+                    continue
+                tasks.append(CalibTask(module, key, "set", value[0]))
+                values.append(value)
+        return tasks, values, unchanged
 
     def _on_set_all(self) -> None:
         if not getattr(self.backend, "is_connected", lambda: False)():
             QMessageBox.warning(self, "Non connecté", "Veuillez d'abord démarrer la communication (onglet Terminal).")
             return
+        if self._is_job_running():
+            return
+        card = self.cmb_carte.currentText()
+        delta = self.chk_delta.isChecked()
+        tasks, values, unchanged = self.set_all_plan(card, delta)
+        if not tasks:
+            QMessageBox.information(self, "Set All", f"Rien à écrire : aucun champ modifié ni valeur de profil "
+                                                     f"à appliquer ({unchanged} paramètre(s) déjà à jour).")
+            return
+        question = f"Écrire {len(tasks)} paramètre(s) sur {card} ?"
+        if delta:
+            question += f"\n{unchanged} paramètre(s) déjà à jour ne seront pas réécrits."
         reply = QMessageBox.question(
-            self, "Confirmation",
-            "Voulez-vous vraiment écrire tous les paramètres modifiables ?",
+            self, "Confirmation", question,
             QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No,
             QMessageBox.StandardButton.No
         )
         if reply != QMessageBox.StandardButton.Yes:
             return
-        count = 0
-        for row in self._iter_rows():
-            if "set" in row.pdef.access:
-                row._on_set()
-                count += 1
-        self.console.append(f"[INFO] Set All: {count} paramètres écrits")
+        self._job_values = values
+        self._start_job(card, tasks)
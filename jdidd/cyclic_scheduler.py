@@ -0,0 +1,180 @@
+# Fichier : cyclic_scheduler.py
+
+import heapq
+import math
+import random
+import time
+
+from latency_stats import LatencyHistogram
+
+MIN_PERIOD_MS = 1.0
+SPIN_S = 0.0002         # fin d'attente en attente active : précision sub-milliseconde sans timer fin
+ECHO_MIN_PERIOD_S = 0.1  # en dessous, les envois cycliques ne sont pas recopiés un par un dans le terminal
+# Intervalle de bascule du GIL pendant les envois cycliques (5 ms par défaut : un thread GUI
+# occupé en Python retarderait chaque échéance jusqu'à 5 ms)
+GIL_SWITCH_INTERVAL_S = 0.0005
+
+
+class CyclicJob:
+    """
+    Envoi périodique d'une séquence, exécuté dans le thread TX.
+
+    Échéances absolues : départ + phase + k * période (+ gigue tirée à chaque
+    envoi, sans cumul). Un envoi en retard d'une période ou plus compte les
+    échéances sautées dans `missed` (pas de rattrapage en rafale). Arrêt après
+    `count` envois ou `duration_ms` (0 = illimité).
+    """
+
+    __slots__ = ("job_id", "label", "data", "period_s", "count", "duration_s", "phase_s", "jitter_s",
+                 "echo", "start", "end_at", "k", "due", "sent", "missed", "lateness", "first_sent",
+                 "last_sent", "min_period_s", "max_period_s", "error", "done")
+
+    def __init__(self, job_id: int, label: str, data: bytes, period_ms: float, count: int = 0,
+                 duration_ms: float = 0, phase_ms: float = 0, jitter_ms: float = 0):
+        self.job_id = job_id
+        self.label = label
+        self.data = bytes(data)
+        self.period_s = max(MIN_PERIOD_MS, period_ms) / 1000.0
+        self.count = max(0, int(count))
+        self.duration_s = max(0.0, duration_ms) / 1000.0
+        self.phase_s = max(0.0, phase_ms) / 1000.0
+        self.jitter_s = min(max(0.0, jitter_ms) / 1000.0, self.period_s / 2)
+        self.echo = self.period_s >= ECHO_MIN_PERIOD_S
+        self.sent = 0
+        self.missed = 0
+        self.lateness = LatencyHistogram()      # retard de chaque envoi sur son échéance (µs)
+        self.first_sent = self.last_sent = None
+        self.min_period_s = math.inf
+        self.max_period_s = 0.0
+        self.error = None
+        self.done = False
+
+    def arm(self, now: float) -> None:
+        self.start = now + self.phase_s
+        self.end_at = self.start + self.duration_s if self.duration_s else None
+        self.k = 0
+        self.due = self._slot(0)
+
+    def _slot(self, k: int) -> float:
+        due = self.start + k * self.period_s
+        if self.jitter_s:
+            due += random.uniform(-self.jitter_s, self.jitter_s)
+        return max(due, self.start)
+
+    def record(self, sent_at: float) -> None:
+        """Envoi effectué à sent_at : statistiques puis échéance suivante (done si terminé)."""
+        late = sent_at - self.due
+        self.lateness.add(max(0.0, late) * 1e6)
+        if self.last_sent is not None:
+            interval = sent_at - self.last_sent
+            if interval < self.min_period_s:
+                self.min_period_s = interval
+            if interval > self.max_period_s:
+                self.max_period_s = interval
+        else:
+            self.first_sent = sent_at
+        self.last_sent = sent_at
+        self.sent += 1
+
+        nominal = self.start + self.k * self.period_s
+        skipped = int((sent_at - nominal) // self.period_s) if sent_at > nominal else 0
+        self.missed += skipped
+        self.k += 1 + skipped
+        self.due = self._slot(self.k)
+        if (self.count and self.sent >= self.count) or (self.end_at is not None and self.due > self.end_at):
+            self.done = True
+
+    def shift(self, delta: float) -> None:
+        """Décale tous les instants de delta (reprise après suspension : la pause ne compte ni en retard ni en durée)."""
+        self.start += delta
+        self.due += delta
+        if self.end_at is not None:
+            self.end_at += delta
+        if self.first_sent is not None:
+            self.first_sent += delta
+            self.last_sent += delta
+
+    def achieved_period_ms(self) -> float:
+        if self.sent < 2:
+            return 0.0
+        return (self.last_sent - self.first_sent) / (self.sent - 1) * 1000.0
+
+    def stats(self) -> dict:
+        return {
+            'id': self.job_id,
+            'label': self.label,
+            'period_ms': self.period_s * 1000.0,
+            'achieved_ms': self.achieved_period_ms(),
+            'min_ms': self.min_period_s * 1000.0 if self.sent > 1 else 0.0,
+            'max_ms': self.max_period_s * 1000.0,
+            'sent': self.sent,
+            'missed': self.missed,
+            'late_p50_us': self.lateness.percentile(50),
+            'late_p99_us': self.lateness.percentile(99),
+            'late_max_us': self.lateness.max_us,
+            'error': self.error,
+            'done': self.done,
+        }
+
+
+def format_cyclic_stats(s: dict) -> str:
+    """Résumé d'une tâche cyclique : période demandée / obtenue, échéances manquées, retard."""
+    text = (f"{s['label']}: requested {s['period_ms']:.3f} ms, achieved {s['achieved_ms']:.3f} ms "
+            f"(min {s['min_ms']:.3f} / max {s['max_ms']:.3f}), sent {s['sent']}, missed {s['missed']}, "
+            f"lateness p50≤{s['late_p50_us']:.0f} µs p99≤{s['late_p99_us']:.0f} µs max {s['late_max_us']:.0f} µs")
+    if s['error']:
+        text += f", error: {s['error']}"
+    return text
+
+
+class CyclicScheduler:
+    """File d'échéances (tas) des tâches cycliques actives. Utilisée par un seul thread."""
+
+    def __init__(self):
+        self.jobs = {}
+        self._heap = []          # (échéance, id) ; entrées périmées ignorées au dépilage
+
+    def __bool__(self):
+        return bool(self.jobs)
+
+    def add(self, job: CyclicJob, now: float = None) -> None:
+        job.arm(time.perf_counter() if now is None else now)
+        self.jobs[job.job_id] = job
+        heapq.heappush(self._heap, (job.due, job.job_id))
+
+    def remove(self, job_id: int):
+        return self.jobs.pop(job_id, None)
+
+    def next_deadline(self):
+        heap = self._heap
+        while heap:
+            due, job_id = heap[0]
+            job = self.jobs.get(job_id)
+            if job is not None and job.due == due:
+                return due
+            heapq.heappop(heap)
+        return None
+
+    def pop_due(self, now: float) -> list:
+        """Tâches dont l'échéance est passée, par ordre d'échéance."""
+        due_jobs = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            due, job_id = heapq.heappop(heap)
+            job = self.jobs.get(job_id)
+            if job is not None and job.due == due:
+                due_jobs.append(job)
+        return due_jobs
+
+    def shift(self, delta: float) -> None:
+        """Décale toutes les échéances (reprise après suspension)."""
+        for job in self.jobs.values():
+            job.shift(delta)
+        self._heap = [(job.due, job.job_id) for job in self.jobs.values()]
+        heapq.heapify(self._heap)
+
+    def reschedule(self, job: CyclicJob) -> None:
+        if job.done:
+            self.jobs.pop(job.job_id, None)
+        else:
+            heapq.heappush(self._heap, (job.due, job.job_id))
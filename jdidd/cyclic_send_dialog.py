@@ -0,0 +1,80 @@
+# Fichier : cyclic_send_dialog.py
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QFormLayout, QDialogButtonBox, QLabel, QSpinBox, QDoubleSpinBox
+)
+
+from cyclic_scheduler import MIN_PERIOD_MS
+
+
+class CyclicSendDialog(QDialog):
+    """Paramètres d'un envoi cyclique (une ou plusieurs séquences sélectionnées)."""
+
+    def __init__(self, names, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Cyclic Send")
+        self.setMinimumWidth(380)
+
+        main_layout = QVBoxLayout(self)
+        form_layout = QFormLayout()
+
+        shown = ", ".join(names[:5]) + (f" (+{len(names) - 5})" if len(names) > 5 else "")
+        form_layout.addRow("Sequences :", QLabel(shown))
+
+        self.period_spin = QDoubleSpinBox()
+        self.period_spin.setDecimals(3)
+        self.period_spin.setRange(MIN_PERIOD_MS, 3_600_000.0)
+        self.period_spin.setSuffix(" ms")
+        self.period_spin.setValue(100.0)
+        form_layout.addRow("Period :", self.period_spin)
+
+        self.count_spin = QSpinBox()
+        self.count_spin.setRange(0, 1_000_000_000)
+        self.count_spin.setSpecialValueText("Unlimited")
+        form_layout.addRow("Count :", self.count_spin)
+
+        self.duration_spin = QDoubleSpinBox()
+        self.duration_spin.setDecimals(1)
+        self.duration_spin.setRange(0.0, 7 * 24 * 3600.0)
+        self.duration_spin.setSuffix(" s")
+        self.duration_spin.setSpecialValueText("Unlimited")
+        form_layout.addRow("Duration :", self.duration_spin)
+
+        self.phase_spin = QDoubleSpinBox()
+        self.phase_spin.setDecimals(3)
+        self.phase_spin.setRange(0.0, 3_600_000.0)
+        self.phase_spin.setSuffix(" ms")
+        self.phase_spin.setToolTip("Delay before the first send.")
+        form_layout.addRow("Phase :", self.phase_spin)
+
+        self.phase_step_spin = QDoubleSpinBox()
+        self.phase_step_spin.setDecimals(3)
+        self.phase_step_spin.setRange(0.0, 3_600_000.0)
+        self.phase_step_spin.setSuffix(" ms")
+        self.phase_step_spin.setToolTip("Additional phase offset between consecutive selected sequences.")
+        self.phase_step_spin.setEnabled(len(names) > 1)
+        form_layout.addRow("Phase step :", self.phase_step_spin)
+
+        self.jitter_spin = QDoubleSpinBox()
+        self.jitter_spin.setDecimals(3)
+        self.jitter_spin.setRange(0.0, 1_800_000.0)
+        self.jitter_spin.setSuffix(" ms")
+        self.jitter_spin.setToolTip("Random offset (±) applied to each send, without drift. Limited to half the period.")
+        form_layout.addRow("Jitter :", self.jitter_spin)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+
+        main_layout.addLayout(form_layout)
+        main_layout.addWidget(buttons)
+
+    def get_params(self):
+        return {
+            "period_ms": self.period_spin.value(),
+            "count": self.count_spin.value(),
+            "duration_ms": self.duration_spin.value() * 1000.0,
+            "phase_ms": self.phase_spin.value(),
+            "phase_step_ms": self.phase_step_spin.value(),
+            "jitter_ms": self.jitter_spin.value(),
+        }
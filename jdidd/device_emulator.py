@@ -0,0 +1,361 @@
+# -*- coding: utf-8 -*-
+# Fichier : device_emulator.py
+"""
+Émulateur de carte Menzu (shell embarqué) pour tester sans matériel.
+
+- Shell "cd / get / set" construit depuis mcu_database.json, avec prompt et echo.
+- Transports : pseudo-terminal Linux (pty) ou serveur TCP (pyserial "socket://").
+- Latence de réponse, débit limité au baud rate, injection de bruit optionnelle.
+- Flux de télémétrie synthétique (lignes horodatées) pour les benchmarks.
+
+Usage :
+    python device_emulator.py --pty --card menzu_ijen_samd21j18a --latency-ms 2
+    python device_emulator.py --tcp 7777 --telemetry-hz 1000
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import queue
+import random
+import socket
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from board_schema import load_config_any
+from serial_backend import SerialBackend
+
+
+# ============================ Shell ============================
+
+class ShellEmulator:
+    """
+    Logique pure du shell : reçoit des octets, rend les octets à renvoyer.
+    Aucune E/S ici (testable et réutilisable par les transports).
+    """
+
+    def __init__(self, schema: Optional[Dict[str, Any]] = None, card: Optional[str] = None,
+                 hostname: str = "menzu", user: str = "user", echo: bool = True) -> None:
+        self.hostname = hostname
+        self.user = user
+        self.echo = echo
+        self.cwd = ""                                   # "" = racine
+        self.values: Dict[str, Dict[str, str]] = {}     # chemin -> clé -> valeur
+        self.access: Dict[str, Dict[str, str]] = {}     # chemin -> clé -> "get"/"set"/"getset"
+        self._inbuf = bytearray()
+        self.commands_handled = 0
+        if schema is not None:
+            self.load_schema(schema, card)
+
+    def load_schema(self, schema: Dict[str, Any], card: Optional[str] = None) -> None:
+        """Crée les paramètres d'une carte (la première si card est None)."""
+        cartes = schema.get("cartes", schema)
+        if not cartes:
+            return
+        card = card or next(iter(cartes))
+        for module, params in cartes.get(card, {}).items():
+            path = SerialBackend.MODULE_PATHS.get(module.strip(), "")
+            if not path or not isinstance(params, dict):
+                continue
+            for key, meta in params.items():
+                if not isinstance(meta, dict):
+                    continue
+                default = "0"
+                if meta.get("type") == "choice" and meta.get("choices"):
+                    default = next(iter(meta["choices"]))
+                self.values.setdefault(path, {})[key] = default
+                self.access.setdefault(path, {})[key] = str(meta.get("access", "getset")).lower()
+
+    @property
+    def prompt(self) -> str:
+        return f"{self.user}@{self.hostname}:/{self.cwd}$ "
+
+    def banner(self) -> bytes:
+        return self.prompt.encode("utf-8")
+
+    # ---------- Commandes ----------
+    def _cd(self, arg: str) -> str:
+        if not arg or arg == "/":
+            self.cwd = ""
+            return ""
+        target = arg.strip("/") if arg.startswith("/") else "/".join(p for p in (self.cwd, arg.strip("/")) if p)
+        parts = []
+        for p in target.split("/"):
+            if p == "..":
+                if parts:
+                    parts.pop()
+            elif p and p != ".":
+                parts.append(p)
+        target = "/".join(parts)
+        known = target == "" or any(path == target or path.startswith(target + "/") for path in self.values)
+        if not known:
+            return f"cd: {arg}: No such directory\r\n"
+        self.cwd = target
+        return ""
+
+    def execute(self, line: str) -> str:
+        """Exécute une ligne et retourne la sortie (sans echo ni prompt)."""
+        self.commands_handled += 1
+        parts = line.strip().split(None, 2)
+        if not parts:
+            return ""
+        cmd, args = parts[0], parts[1:]
+        here = self.values.get(self.cwd, {})
+        if cmd == "cd":
+            return self._cd(args[0] if args else "/")
+        if cmd == "ls":
+            return "".join(f"{k}\r\n" for k in here)
+        if cmd == "get":
+            if not args or args[0] not in here:
+                return f"ERR unknown key {args[0] if args else ''}\r\n"
+            if "get" not in self.access[self.cwd][args[0]]:
+                return f"ERR {args[0]} is write-only\r\n"
+            return f"{here[args[0]]}\r\n"
+        if cmd == "set":
+            if not args or args[0] not in here:
+                return f"ERR unknown key {args[0] if args else ''}\r\n"
+            if "set" not in self.access[self.cwd][args[0]]:
+                return f"ERR {args[0]} is read-only\r\n"
+            here[args[0]] = args[1] if len(args) > 1 else ""
+            return "OK\r\n"
+        return f"{cmd}: command not found\r\n"
+
+    def feed(self, data: bytes) -> list[bytes]:
+        """Consomme des octets reçus ; retourne une réponse complète par ligne terminée."""
+        self._inbuf.extend(data)
+        out = []
+        while True:
+            idx = min((i for i in (self._inbuf.find(b"\r"), self._inbuf.find(b"\n")) if i >= 0), default=-1)
+            if idx < 0:
+                break
+            line = self._inbuf[:idx].decode("utf-8", errors="replace")
+            # \r\n compte pour une seule fin de ligne
+            skip = 2 if self._inbuf[idx:idx + 2] == b"\r\n" else 1
+            del self._inbuf[:idx + skip]
+            resp = (line + "\r\n") if self.echo else ""
+            resp += self.execute(line)
+            out.append((resp + self.prompt).encode("utf-8"))
+        return out
+
+
+# ============================ Transport ============================
+
+class EmulatedDevice:
+    """
+    Relie un ShellEmulator à un transport (pty ou TCP) dans des threads démon.
+
+    latency_ms     : délai entre la réception d'une commande et sa réponse ; comme sur
+                     un vrai lien (USB, RTOS), il ne bloque pas le traitement des
+                     commandes suivantes (ligne à retard)
+    baudrate       : débit simulé (10 bits/octet) ; 0 = pas de limitation
+    noise_rate     : probabilité d'insérer des octets parasites dans une réponse
+    """
+
+    def __init__(self, shell: ShellEmulator, latency_ms: float = 0.0, baudrate: int = 115200,
+                 noise_rate: float = 0.0, seed: Optional[int] = None) -> None:
+        self.shell = shell
+        self.latency_s = latency_ms / 1000.0
+        self.baudrate = baudrate
+        self.noise_rate = noise_rate
+        self._rng = random.Random(seed)
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._fd: Optional[int] = None          # maître pty
+        self._sock: Optional[socket.socket] = None
+        self._server: Optional[socket.socket] = None
+        self._telemetry_thread: Optional[threading.Thread] = None
+        self._outq: "queue.Queue[tuple[float, bytes]]" = queue.Queue()   # (échéance, réponse)
+        threading.Thread(target=self._delay_line_loop, daemon=True).start()
+        self.url: Optional[str] = None          # à passer à serial.Serial / serial_for_url
+        self.bytes_sent = 0
+        self.telemetry_lines = 0
+
+    # ---------- Ouverture ----------
+    def open_pty(self) -> str:
+        """Crée un pty et retourne le chemin esclave à ouvrir comme un port série."""
+        import pty
+        import tty
+        master, slave = pty.openpty()
+        tty.setraw(master)
+        tty.setraw(slave)
+        self._fd = master
+        self._slave_fd = slave           # gardé ouvert : évite EIO quand le client ferme
+        self.url = os.ttyname(slave)
+        threading.Thread(target=self._pty_loop, daemon=True).start()
+        return self.url
+
+    def open_tcp(self, port: int = 0, host: str = "127.0.0.1") -> str:
+        """Écoute en TCP et retourne l'URL pyserial (socket://host:port)."""
+        self._server = socket.create_server((host, port))
+        self.url = f"socket://{host}:{self._server.getsockname()[1]}"
+        threading.Thread(target=self._tcp_accept_loop, daemon=True).start()
+        return self.url
+
+    def close(self) -> None:
+        self._stop.set()
+        for s in (self._sock, self._server):
+            if s is not None:
+                try:
+                    s.close()
+                except OSError:
+                    pass
+        for fd in (self._fd, getattr(self, "_slave_fd", None)):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._fd = None
+
+    # ---------- E/S bas niveau ----------
+    def _raw_write(self, data: bytes) -> None:
+        if self._fd is not None:
+            view = memoryview(data)
+            while view:
+                n = os.write(self._fd, view)
+                view = view[n:]
+        elif self._sock is not None:
+            self._sock.sendall(data)
+
+    def write(self, data: bytes) -> None:
+        """Écrit en respectant le baud rate simulé (pacing par échéance, par paquets de 64 octets)."""
+        if self.noise_rate and self._rng.random() < self.noise_rate:
+            pos = self._rng.randrange(len(data) + 1)
+            garbage = bytes(self._rng.randrange(256) for _ in range(self._rng.randint(1, 4)))
+            data = data[:pos] + garbage + data[pos:]
+        with self._write_lock:
+            if not self.baudrate:
+                self._raw_write(data)
+            else:
+                byte_time = 10.0 / self.baudrate
+                t = time.perf_counter()
+                for i in range(0, len(data), 64):
+                    chunk = data[i:i + 64]
+                    self._raw_write(chunk)
+                    t += len(chunk) * byte_time
+                    delay = t - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+            self.bytes_sent += len(data)
+
+    def _handle_input(self, data: bytes) -> None:
+        due = time.perf_counter() + self.latency_s
+        for resp in self.shell.feed(data):
+            self._outq.put((due, resp))
+
+    def _delay_line_loop(self) -> None:
+        while not self._stop.is_set():
+            due, resp = self._outq.get()
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                self.write(resp)
+            except OSError:
+                pass
+
+    def _pty_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                data = os.read(self._fd, 4096)
+            except (OSError, TypeError):
+                break
+            if data:
+                self._handle_input(data)
+
+    def _tcp_accept_loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                break
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._sock = conn
+            while not self._stop.is_set():
+                try:
+                    data = conn.recv(4096)
+                except OSError:
+                    break
+                if not data:
+                    break
+                self._handle_input(data)
+            self._sock = None
+            conn.close()
+
+    # ---------- Télémétrie ----------
+    def start_telemetry(self, rate_hz: float = 0.0, line_length: int = 64, ansi_ratio: float = 0.0,
+                        count: int = 0) -> None:
+        """
+        Émet des lignes "TLM <seq> <monotonic_ns> <remplissage>".
+        rate_hz = 0 : au débit maximal permis par le baud rate. count = 0 : sans fin.
+        ansi_ratio : proportion de lignes colorées (séquences SGR).
+        """
+        def loop() -> None:
+            period = 1.0 / rate_hz if rate_hz > 0 else 0.0
+            next_t = time.perf_counter()
+            seq = 0
+            while not self._stop.is_set() and (count <= 0 or seq < count):
+                head = f"TLM {seq} {time.monotonic_ns()} "
+                fill = "x" * max(0, line_length - len(head) - 2)
+                if ansi_ratio and self._rng.random() < ansi_ratio:
+                    line = f"{head}\x1b[1;3{seq % 7 + 1}m{fill}\x1b[0m\r\n"
+                else:
+                    line = f"{head}{fill}\r\n"
+                try:
+                    self.write(line.encode("ascii"))
+                except OSError:
+                    break
+                seq += 1
+                self.telemetry_lines = seq
+                if period:
+                    next_t += period
+                    delay = next_t - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+        self._telemetry_thread = threading.Thread(target=loop, daemon=True)
+        self._telemetry_thread.start()
+
+    def wait_telemetry(self, timeout: Optional[float] = None) -> None:
+        if self._telemetry_thread:
+            self._telemetry_thread.join(timeout)
+
+
+def create_device(card: Optional[str] = None, json_path: Optional[str] = None, **kwargs) -> EmulatedDevice:
+    """Raccourci : shell chargé depuis mcu_database.json + transport non ouvert."""
+    schema = load_config_any(json_path)
+    schema.pop("_loaded_from", None)
+    return EmulatedDevice(ShellEmulator(schema, card), **kwargs)
+
+
+# ============================ CLI ============================
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Émulateur de carte Menzu (shell cd/get/set)")
+    ap.add_argument("--card", help="carte de mcu_database.json (défaut : la première)")
+    ap.add_argument("--json", help="chemin du schéma JSON")
+    ap.add_argument("--pty", action="store_true", help="exposer un pseudo-terminal (Linux)")
+    ap.add_argument("--tcp", type=int, metavar="PORT", help="exposer socket://127.0.0.1:PORT")
+    ap.add_argument("--latency-ms", type=float, default=1.0)
+    ap.add_argument("--baud", type=int, default=115200, help="0 = pas de limitation")
+    ap.add_argument("--noise", type=float, default=0.0, help="probabilité de bruit par réponse")
+    ap.add_argument("--telemetry-hz", type=float, default=-1, help="0 = débit max, <0 = désactivé")
+    ap.add_argument("--line-length", type=int, default=64)
+    args = ap.parse_args()
+
+    dev = create_device(args.card, args.json, latency_ms=args.latency_ms, baudrate=args.baud,
+                        noise_rate=args.noise)
+    url = dev.open_tcp(args.tcp) if args.tcp is not None else dev.open_pty()
+    print(f"Émulateur prêt : {url}  (prompt: {dev.shell.prompt!r})")
+    if args.telemetry_hz >= 0:
+        dev.start_telemetry(args.telemetry_hz, args.line_length)
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        dev.close()
+
+
+if __name__ == "__main__":
+    main()
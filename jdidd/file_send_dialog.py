@@ -0,0 +1,115 @@
+# Fichier : file_send_dialog.py
+
+import os
+
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QDialogButtonBox, QLineEdit, QPushButton,
+    QComboBox, QSpinBox, QDoubleSpinBox, QFileDialog, QMessageBox
+)
+
+from file_transfer import (PROTOCOL_RAW, PROTOCOL_XMODEM, PROTOCOL_XMODEM_1K, PROTOCOL_YMODEM,
+                           FLOW_NONE, FLOW_RTSCTS, FLOW_XONXOFF, DEFAULT_CHUNK_SIZE)
+
+# Libellé UI -> valeur
+PROTOCOL_LABELS = {
+    "Raw stream": PROTOCOL_RAW,
+    "XMODEM (128)": PROTOCOL_XMODEM,
+    "XMODEM-1K": PROTOCOL_XMODEM_1K,
+    "YMODEM": PROTOCOL_YMODEM,
+}
+FLOW_LABELS = {
+    "None": FLOW_NONE,
+    "RTS/CTS (hardware)": FLOW_RTSCTS,
+    "XON/XOFF (software)": FLOW_XONXOFF,
+}
+
+
+class FileSendDialog(QDialog):
+    """Paramètres d'un envoi de fichier (flux brut ou X/YMODEM)."""
+
+    def __init__(self, last_params=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Send File")
+        self.setMinimumWidth(460)
+        last_params = last_params or {}
+
+        main_layout = QVBoxLayout(self)
+        form_layout = QFormLayout()
+
+        path_layout = QHBoxLayout()
+        self.path_edit = QLineEdit(last_params.get('path', ''))
+        browse_button = QPushButton("Browse...")
+        browse_button.clicked.connect(self._browse)
+        path_layout.addWidget(self.path_edit)
+        path_layout.addWidget(browse_button)
+        form_layout.addRow("File :", path_layout)
+
+        self.protocol_combo = QComboBox()
+        self.protocol_combo.addItems(PROTOCOL_LABELS.keys())
+        self._select(self.protocol_combo, PROTOCOL_LABELS, last_params.get('protocol', PROTOCOL_RAW))
+        form_layout.addRow("Protocol :", self.protocol_combo)
+
+        self.chunk_spin = QSpinBox()
+        self.chunk_spin.setRange(1, 1 << 20)
+        self.chunk_spin.setSuffix(" bytes")
+        self.chunk_spin.setValue(last_params.get('chunk_size', DEFAULT_CHUNK_SIZE))
+        form_layout.addRow("Chunk size :", self.chunk_spin)
+
+        self.delay_spin = QDoubleSpinBox()
+        self.delay_spin.setDecimals(1)
+        self.delay_spin.setRange(0.0, 60_000.0)
+        self.delay_spin.setSuffix(" ms")
+        self.delay_spin.setToolTip("Pause after each chunk, once it has left the port.")
+        self.delay_spin.setValue(last_params.get('delay_ms', 0.0))
+        form_layout.addRow("Inter-chunk delay :", self.delay_spin)
+
+        self.flow_combo = QComboBox()
+        self.flow_combo.addItems(FLOW_LABELS.keys())
+        self._select(self.flow_combo, FLOW_LABELS, last_params.get('flow_control', FLOW_NONE))
+        form_layout.addRow("Flow control :", self.flow_combo)
+
+        self.protocol_combo.currentTextChanged.connect(self._update_enabled)
+        self._update_enabled()
+
+        buttons = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        buttons.accepted.connect(self.validate_and_accept)
+        buttons.rejected.connect(self.reject)
+
+        main_layout.addLayout(form_layout)
+        main_layout.addWidget(buttons)
+
+    @staticmethod
+    def _select(combo, labels, value):
+        for label, v in labels.items():
+            if v == value:
+                combo.setCurrentText(label)
+
+    def _browse(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Send File", self.path_edit.text())
+        if path:
+            self.path_edit.setText(path)
+
+    def _update_enabled(self):
+        # En X/YMODEM, la taille des blocs et le rythme sont fixés par le protocole
+        raw = PROTOCOL_LABELS[self.protocol_combo.currentText()] == PROTOCOL_RAW
+        self.chunk_spin.setEnabled(raw)
+        self.delay_spin.setEnabled(raw)
+
+    def validate_and_accept(self):
+        params = self.get_params()
+        if not os.path.isfile(params['path']):
+            QMessageBox.warning(self, "Send File", "Please select an existing file.")
+            return
+        if params['protocol'] != PROTOCOL_RAW and params['flow_control'] == FLOW_XONXOFF:
+            QMessageBox.warning(self, "Send File", "XON/XOFF flow control cannot be used with a binary protocol.")
+            return
+        self.accept()
+
+    def get_params(self):
+        return {
+            'path': self.path_edit.text().strip(),
+            'protocol': PROTOCOL_LABELS[self.protocol_combo.currentText()],
+            'chunk_size': self.chunk_spin.value(),
+            'delay_ms': self.delay_spin.value(),
+            'flow_control': FLOW_LABELS[self.flow_combo.currentText()],
+        }
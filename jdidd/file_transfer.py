@@ -0,0 +1,341 @@
+# Fichier : file_transfer.py
+
+import binascii
+import mmap
+import os
+import threading
+import time
+
+import serial
+from PyQt6.QtCore import QObject, pyqtSignal
+
+# Protocoles d'envoi
+PROTOCOL_RAW = "raw"                # flux brut découpé en morceaux
+PROTOCOL_XMODEM = "xmodem"          # blocs de 128 octets, checksum ou CRC selon le récepteur
+PROTOCOL_XMODEM_1K = "xmodem-1k"    # blocs de 1024 octets, CRC
+PROTOCOL_YMODEM = "ymodem"          # XMODEM-1K + bloc 0 (nom, taille) + bloc nul de fin de lot
+
+PROTOCOLS = (PROTOCOL_RAW, PROTOCOL_XMODEM, PROTOCOL_XMODEM_1K, PROTOCOL_YMODEM)
+
+# Contrôle de flux pendant le transfert (réglage du port restauré à la fin)
+FLOW_NONE = "none"
+FLOW_RTSCTS = "rtscts"
+FLOW_XONXOFF = "xonxoff"            # flux brut uniquement : les protocoles X/YMODEM sont binaires
+
+FLOW_CONTROLS = (FLOW_NONE, FLOW_RTSCTS, FLOW_XONXOFF)
+
+DEFAULT_CHUNK_SIZE = 1024
+
+SOH, STX, EOT, ACK, NAK, CAN, CRC_REQUEST = b"\x01", b"\x02", b"\x04", b"\x06", b"\x15", b"\x18", b"C"
+PAD = 0x1A                          # bourrage du dernier bloc (CP/M EOF)
+
+
+def line_rate(baudrate: int, bytesize: int = 8, parity: str = serial.PARITY_NONE,
+              stopbits: float = serial.STOPBITS_ONE) -> float:
+    """Débit théorique de la ligne en octets/s (bit de start + données + parité + stop)."""
+    bits = 1 + bytesize + (0 if parity == serial.PARITY_NONE else 1) + stopbits
+    return baudrate / bits
+
+
+def xmodem_packet(seq: int, block: bytes, size: int, crc: bool) -> bytes:
+    """Bloc X/YMODEM : en-tête, numéro et complément, données bourrées, CRC-16 ou checksum."""
+    data = block.ljust(size, bytes([PAD]))
+    header = (STX if size == 1024 else SOH) + bytes([seq & 0xFF, 0xFF - (seq & 0xFF)])
+    if crc:
+        return header + data + binascii.crc_hqx(data, 0).to_bytes(2, 'big')
+    return header + data + bytes([sum(data) & 0xFF])
+
+
+def ymodem_header(name: str, size: int, mtime: float) -> bytes:
+    """Bloc 0 YMODEM : "nom\\0taille mtime(octal)" bourré de zéros (bloc nul si name vide)."""
+    info = b"" if not name else name.encode('latin-1', 'replace') + b"\0" + f"{size} {int(mtime):o}".encode()
+    block_size = 128 if len(info) < 128 else 1024
+    return xmodem_packet(0, info.ljust(block_size, b"\0"), block_size, crc=True)
+
+
+class TransferError(Exception):
+    pass
+
+
+class TransferCancelled(TransferError):
+    pass
+
+
+class FileTransfer(QObject):
+    """
+    Envoi d'un fichier sur le port, dans son propre thread (QObject + moveToThread).
+
+    Le fichier est projeté en mémoire (mmap) : seul le morceau en cours est
+    copié, le fichier n'est jamais lu en entier. Chaque écriture prend le
+    verrou d'écriture partagé (TxWriter, réponses automatiques) : les autres
+    envois s'intercalent entre deux morceaux, jamais au milieu.
+
+    En flux brut, chunk_size et delay_ms règlent le découpage et la pause entre
+    morceaux (le port est vidé avant la pause). En X/YMODEM, le récepteur
+    cadence l'envoi par ACK/NAK, lus via un abonnement RX (RxSubscription).
+
+    progress (au plus toutes les PROGRESS_INTERVAL_S) et finished portent un
+    dict ; le débit utile y est rapporté au débit théorique de la ligne.
+    cancel() est sûr depuis le GUI : il interrompt aussi une écriture bloquée
+    (contrôle de flux matériel).
+    """
+
+    progress = pyqtSignal(dict)
+    finished = pyqtSignal(dict)
+
+    PROGRESS_INTERVAL_S = 0.1
+    START_TIMEOUT_S = 60.0          # attente du 'C' / NAK initial du récepteur
+    REPLY_TIMEOUT_S = 10.0          # attente de l'ACK d'un bloc
+    MAX_RETRIES = 10
+
+    def __init__(self, serial_port, path: str, protocol: str = PROTOCOL_RAW,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, delay_ms: float = 0, flow_control: str = FLOW_NONE,
+                 line_rate_bps: float = 0.0, rx=None, write_lock=None):
+        super().__init__()
+        self.serial_port = serial_port
+        self.path = path
+        self.protocol = protocol if protocol in PROTOCOLS else PROTOCOL_RAW
+        self.chunk_size = max(1, int(chunk_size))
+        self.delay_s = max(0.0, delay_ms) / 1000.0
+        self.flow_control = flow_control if flow_control in FLOW_CONTROLS else FLOW_NONE
+        self.line_rate = line_rate_bps      # octets/s ; 0 = inconnu
+        self.rx = rx                        # RxSubscription (obligatoire pour X/YMODEM)
+        self.write_lock = write_lock or threading.Lock()
+        self._cancel_event = threading.Event()
+        self._writing = False
+        self.total = 0
+        self.sent = 0                       # octets du fichier envoyés (acquittés en X/YMODEM)
+        self.wire_bytes = 0                 # octets écrits, en-têtes et répétitions compris
+        self.retries = 0
+        self._started = None
+        self._next_progress = 0.0
+
+    # ---------- API (thread GUI) ----------
+    def cancel(self) -> None:
+        self._cancel_event.set()
+        if self.rx is not None:
+            self.rx.close()
+        if self._writing:
+            cancel_write = getattr(self.serial_port, "cancel_write", None)
+            if cancel_write:
+                try:
+                    cancel_write()
+                except Exception:
+                    pass
+
+    # ---------- Mesures ----------
+    def _elapsed(self) -> float:
+        return time.perf_counter() - self._started if self._started else 0.0
+
+    def _report(self, force: bool = False) -> dict:
+        elapsed = self._elapsed()
+        rate = self.sent / elapsed if elapsed > 0 else 0.0
+        info = {
+            'path': self.path,
+            'protocol': self.protocol,
+            'total': self.total,
+            'sent': self.sent,
+            'wire_bytes': self.wire_bytes,
+            'retries': self.retries,
+            'elapsed_s': elapsed,
+            'rate': rate,
+            'line_rate': self.line_rate,
+            'line_fraction': rate / self.line_rate if self.line_rate else 0.0,
+            'eta_s': (self.total - self.sent) / rate if rate > 0 else None,
+        }
+        now = time.monotonic()
+        if force or now >= self._next_progress:
+            self._next_progress = now + self.PROGRESS_INTERVAL_S
+            self.progress.emit(info)
+        return info
+
+    # ---------- E/S ----------
+    def _check_cancel(self) -> None:
+        if self._cancel_event.is_set():
+            raise TransferCancelled("cancelled")
+
+    def _write(self, data) -> None:
+        self._check_cancel()
+        if self._started is None:
+            self._started = time.perf_counter()
+        with self.write_lock:
+            self._writing = True
+            try:
+                self.serial_port.write(data)
+            finally:
+                self._writing = False
+        self._check_cancel()            # écriture interrompue par cancel()
+        self.wire_bytes += len(data)
+
+    def _read_control(self, timeout: float) -> bytes:
+        """Prochain octet de contrôle du récepteur (ACK, NAK, 'C', CAN) ou b"" à l'expiration."""
+        deadline = time.monotonic() + timeout
+        while True:
+            self._check_cancel()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return b""
+            byte = self.rx.read(1, timeout=min(remaining, 0.1))
+            if byte == CAN:
+                # Annulation = deux CAN consécutifs (un seul peut être du bruit)
+                if self.rx.read(1, timeout=1.0) == CAN:
+                    raise TransferError("cancelled by the receiver")
+                continue
+            if byte in (ACK, NAK, CRC_REQUEST):
+                return byte
+
+    # ---------- Flux brut ----------
+    def _send_raw(self, data) -> None:
+        chunk = self.chunk_size
+        for offset in range(0, self.total, chunk):
+            block = data[offset:offset + chunk]
+            self._write(block)
+            self.sent += len(block)
+            if self.delay_s:
+                with self.write_lock:
+                    self.serial_port.flush()    # la pause se mesure à partir de la fin d'émission
+                if self._cancel_event.wait(self.delay_s):
+                    self._check_cancel()
+            self._report()
+        with self.write_lock:
+            self.serial_port.flush()
+
+    # ---------- X/YMODEM ----------
+    def _wait_start(self, crc_only: bool) -> bool:
+        """Attend la demande du récepteur : True pour 'C' (CRC), False pour NAK (checksum)."""
+        deadline = time.monotonic() + self.START_TIMEOUT_S
+        while time.monotonic() < deadline:
+            byte = self._read_control(deadline - time.monotonic())
+            if byte == CRC_REQUEST:
+                return True
+            if byte == NAK and not crc_only:
+                return False
+        raise TransferError("receiver did not start (no 'C' or NAK)")
+
+    def _send_block(self, packet: bytes, label: str) -> None:
+        for _ in range(self.MAX_RETRIES):
+            self.rx.clear()                 # 'C' / NAK en trop d'avant ce bloc
+            self._write(packet)
+            reply = self._read_control(self.REPLY_TIMEOUT_S)
+            if reply == ACK:
+                return
+            self.retries += 1
+        raise TransferError(f"{label}: no ACK after {self.MAX_RETRIES} attempts")
+
+    def _send_eot(self) -> None:
+        # Le récepteur peut répondre NAK au premier EOT (YMODEM) : on répète jusqu'à l'ACK
+        for _ in range(self.MAX_RETRIES):
+            self.rx.clear()
+            self._write(EOT)
+            if self._read_control(self.REPLY_TIMEOUT_S) == ACK:
+                return
+        raise TransferError(f"EOT: no ACK after {self.MAX_RETRIES} attempts")
+
+    def _send_xmodem(self, data) -> None:
+        ymodem = self.protocol == PROTOCOL_YMODEM
+        block_size = 128 if self.protocol == PROTOCOL_XMODEM else 1024
+        crc = self._wait_start(crc_only=self.protocol != PROTOCOL_XMODEM)   # blocs de 1K : CRC obligatoire
+        if ymodem:
+            self._send_block(ymodem_header(os.path.basename(self.path), self.total,
+                                           os.path.getmtime(self.path)), "block 0")
+            self._wait_start(crc_only=True)
+        seq, offset = 1, 0
+        while offset < self.total:
+            remaining = self.total - offset
+            # Fin de fichier : bloc de 128 si le reste y tient (moins de bourrage)
+            size = 128 if block_size == 1024 and remaining <= 128 else block_size
+            block = data[offset:offset + size]
+            self._send_block(xmodem_packet(seq, block, size, crc), f"block {seq}")
+            offset += len(block)
+            self.sent = offset
+            seq += 1
+            self._report()
+        self._send_eot()
+        if ymodem:
+            self._wait_start(crc_only=True)
+            self._send_block(ymodem_header("", 0, 0), "end of batch")
+
+    def _abort_protocol(self) -> None:
+        """Signale l'abandon au récepteur X/YMODEM (CAN CAN)."""
+        try:
+            with self.write_lock:
+                self.serial_port.write(CAN * 3)
+        except (serial.SerialException, OSError, ValueError):
+            pass
+
+    # ---------- Boucle ----------
+    def _apply_flow_control(self):
+        port = self.serial_port
+        saved = (port.rtscts, port.xonxoff)
+        port.rtscts = self.flow_control == FLOW_RTSCTS
+        port.xonxoff = self.flow_control == FLOW_XONXOFF
+        return saved
+
+    def run(self):
+        info = {'error': None, 'cancelled': False}
+        saved_flow = None
+        try:
+            if self.protocol != PROTOCOL_RAW:
+                if self.rx is None:
+                    raise TransferError(f"{self.protocol} needs the RX stream")
+                if self.flow_control == FLOW_XONXOFF:
+                    raise TransferError("XON/XOFF cannot be used with a binary protocol")
+            with open(self.path, 'rb') as f:
+                self.total = os.fstat(f.fileno()).st_size
+                # Tranche d'une projection = copie du seul morceau (pas d'export de tampon à libérer)
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.total else b""
+                try:
+                    saved_flow = self._apply_flow_control()
+                    self._report(force=True)
+                    if self.protocol == PROTOCOL_RAW:
+                        self._send_raw(data)
+                    else:
+                        self._send_xmodem(data)
+                finally:
+                    if self.total:
+                        data.close()
+        except TransferCancelled:
+            info['cancelled'] = True
+            if self.protocol != PROTOCOL_RAW:
+                self._abort_protocol()
+        except TransferError as e:
+            info['error'] = str(e)
+            if self.protocol != PROTOCOL_RAW:
+                self._abort_protocol()
+        except (serial.SerialException, OSError, ValueError) as e:
+            info['error'] = str(e)
+        finally:
+            if saved_flow is not None:
+                try:
+                    self.serial_port.rtscts, self.serial_port.xonxoff = saved_flow
+                except (serial.SerialException, OSError, ValueError):
+                    pass
+            info.update(self._report(force=True))
+            info['ok'] = info['error'] is None and not info['cancelled']
+            self.finished.emit(info)
+
+
+def format_transfer_summary(info: dict) -> str:
+    """Résumé d'un transfert : octets, durée, débit utile et fraction du débit de la ligne."""
+    text = (f"{os.path.basename(info['path'])} ({info['protocol']}): {info['sent']}/{info['total']} bytes "
+            f"in {info['elapsed_s']:.2f} s, {info['rate'] / 1024:.1f} KiB/s")
+    if info['line_rate']:
+        text += f" = {info['line_fraction'] * 100:.1f}% of line rate ({info['line_rate'] / 1024:.1f} KiB/s)"
+    if info['wire_bytes'] != info['sent']:
+        text += f", {info['wire_bytes']} bytes on the wire"
+    if info['retries']:
+        text += f", {info['retries']} retries"
+    if info['cancelled']:
+        text += ", cancelled"
+    if info['error']:
+        text += f", error: {info['error']}"
+    return text
+
+
+def format_transfer_progress(info: dict) -> str:
+    text = f"{info['sent']}/{info['total']} bytes, {info['rate'] / 1024:.1f} KiB/s"
+    if info['line_rate']:
+        text += f" ({info['line_fraction'] * 100:.0f}% of line rate)"
+    if info['eta_s'] is not None:
+        text += f", ETA {info['eta_s']:.0f} s"
+    return text
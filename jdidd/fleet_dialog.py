@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+# Fichier : fleet_dialog.py
+
+from __future__ import annotations
+
+import time
+from typing import Dict, List, Optional
+
+from PyQt6.QtCore import Qt, QThread
+from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QListWidget, QListWidgetItem, QLineEdit, QPushButton,
+    QComboBox, QCheckBox, QLabel, QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView,
+    QFileDialog, QMessageBox
+)
+
+from board_schema import BoardSchema
+from fleet_provisioning import (FleetWorker, BoardResult, profile_tasks, fleet_report, save_report,
+                                STATE_PENDING, STATE_PASS, STATE_FAIL, STATE_ERROR, STATE_CANCELLED)
+from param_snapshot import ParamSnapshot, load_snapshot
+from serial_backend import SerialBackend
+
+BAUDRATES = ["9600", "19200", "38400", "57600", "115200", "230400", "460800", "921600"]
+
+STATE_COLORS = {
+    STATE_PASS: "#2e7d32",
+    STATE_FAIL: "#c62828",
+    STATE_ERROR: "#c62828",
+    STATE_CANCELLED: "#999999",
+}
+
+
+class FleetDialog(QDialog):
+    """
+    Mode production : applique un profil à plusieurs cartes identiques en
+    parallèle (un FleetWorker + QThread par port), grille d'état par carte,
+    rapport OK/ÉCHEC exportable en JSON ou CSV.
+    """
+
+    COLUMNS = ["Port", "État", "Écrits", "Vérifiés", "Connexion (ms)", "Écriture (ms)",
+               "Vérification (ms)", "Total (ms)", "Détail"]
+    COL_STATE, COL_WRITTEN, COL_VERIFIED, COL_CONNECT, COL_WRITE, COL_VERIFY, COL_TOTAL, COL_DETAIL = range(1, 9)
+
+    def __init__(self, schema: BoardSchema, card: str = "", profile: Optional[ParamSnapshot] = None,
+                 busy_ports: Optional[List[str]] = None, baudrate: int = 115200, parent=None) -> None:
+        super().__init__(parent)
+        self.setWindowTitle("Production — provisioning multi-cartes")
+        self.resize(980, 620)
+        self.schema = schema
+        self.profile = profile
+        self.busy_ports = [p for p in (busy_ports or []) if p]
+
+        self._workers: Dict[str, FleetWorker] = {}
+        self._threads: List[QThread] = []
+        self._results: Dict[str, BoardResult] = {}
+        self._rows: Dict[str, int] = {}
+        self._run_card = ""
+        self._run_profile: Optional[ParamSnapshot] = None
+        self._started = 0.0
+        self._wall_ms = 0.0
+
+        root = QVBoxLayout(self)
+        top = QHBoxLayout()
+
+        # --- Ports ---
+        ports_box = QVBoxLayout()
+        ports_box.addWidget(QLabel("Ports :"))
+        self.port_list = QListWidget()
+        ports_box.addWidget(self.port_list, 1)
+        add_row = QHBoxLayout()
+        self.port_edit = QLineEdit()
+        self.port_edit.setPlaceholderText("COM7, /dev/ttyUSB3, socket://hôte:port ...")
+        self.port_edit.returnPressed.connect(self._on_add_port)
+        btn_add = QPushButton("Ajouter")
+        btn_add.clicked.connect(self._on_add_port)
+        btn_refresh = QPushButton("Rafraîchir")
+        btn_refresh.clicked.connect(self.refresh_ports)
+        add_row.addWidget(self.port_edit, 1)
+        add_row.addWidget(btn_add)
+        add_row.addWidget(btn_refresh)
+        ports_box.addLayout(add_row)
+        top.addLayout(ports_box, 1)
+
+        # --- Carte / profil ---
+        form = QFormLayout()
+        self.cmb_card = QComboBox()
+        self.cmb_card.addItems(schema.card_names())
+        if card:
+            self.cmb_card.setCurrentText(profile.card if profile is not None and profile.card else card)
+        self.cmb_card.currentTextChanged.connect(self._update_profile_label)
+        form.addRow("Carte :", self.cmb_card)
+        profile_row = QHBoxLayout()
+        self.profile_lbl = QLabel()
+        self.profile_lbl.setWordWrap(True)
+        btn_profile = QPushButton("Charger...")
+        btn_profile.clicked.connect(self._on_load_profile)
+        profile_row.addWidget(self.profile_lbl, 1)
+        profile_row.addWidget(btn_profile)
+        form.addRow("Profil :", profile_row)
+        self.cmb_baud = QComboBox()
+        self.cmb_baud.setEditable(True)
+        self.cmb_baud.addItems(BAUDRATES)
+        self.cmb_baud.setCurrentText(str(baudrate))
+        form.addRow("Baudrate :", self.cmb_baud)
+        self.chk_verify = QCheckBox("Relire et comparer après écriture")
+        self.chk_verify.setChecked(True)
+        form.addRow("", self.chk_verify)
+        top.addLayout(form, 1)
+        root.addLayout(top)
+
+        # --- Grille d'état ---
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.ResizeToContents)
+        header.setSectionResizeMode(self.COL_DETAIL, QHeaderView.ResizeMode.Stretch)
+        root.addWidget(self.table, 2)
+
+        # --- Boutons ---
+        bottom = QHBoxLayout()
+        self.summary_lbl = QLabel()
+        bottom.addWidget(self.summary_lbl, 1)
+        self.btn_start = QPushButton("Démarrer")
+        self.btn_cancel = QPushButton("Annuler")
+        self.btn_export = QPushButton("Exporter le rapport...")
+        btn_close = QPushButton("Fermer")
+        self.btn_start.clicked.connect(self.start)
+        self.btn_cancel.clicked.connect(self.cancel)
+        self.btn_export.clicked.connect(self._on_export)
+        btn_close.clicked.connect(self.reject)
+        self.btn_cancel.setEnabled(False)
+        self.btn_export.setEnabled(False)
+        for w in (self.btn_start, self.btn_cancel, self.btn_export, btn_close):
+            bottom.addWidget(w)
+        root.addLayout(bottom)
+
+        self.refresh_ports()
+        self._update_profile_label()
+
+    # ---------- Ports ----------
+    def _add_port_item(self, port: str, checked: bool) -> None:
+        if self.port_list.findItems(port, Qt.MatchFlag.MatchExactly):
+            return
+        item = QListWidgetItem(port)
+        if port in self.busy_ports:
+            item.setFlags(item.flags() & ~Qt.ItemFlag.ItemIsEnabled)
+            item.setToolTip("Port déjà ouvert par le Terminal")
+            item.setCheckState(Qt.CheckState.Unchecked)
+        else:
+            item.setCheckState(Qt.CheckState.Checked if checked else Qt.CheckState.Unchecked)
+        self.port_list.addItem(item)
+
+    def refresh_ports(self) -> None:
+        for port in SerialBackend.available_ports():
+            self._add_port_item(port, False)
+
+    def _on_add_port(self) -> None:
+        port = self.port_edit.text().strip()
+        if port:
+            self._add_port_item(port, True)
+            self.port_edit.clear()
+
+    def set_ports(self, ports: List[str]) -> None:
+        """Coche exactement ces ports (ajoutés à la liste si besoin)."""
+        for port in ports:
+            self._add_port_item(port, True)
+        for i in range(self.port_list.count()):
+            item = self.port_list.item(i)
+            if item.flags() & Qt.ItemFlag.ItemIsEnabled:
+                item.setCheckState(Qt.CheckState.Checked if item.text() in ports else Qt.CheckState.Unchecked)
+
+    def selected_ports(self) -> List[str]:
+        items = (self.port_list.item(i) for i in range(self.port_list.count()))
+        return [it.text() for it in items if it.checkState() == Qt.CheckState.Checked]
+
+    # ---------- Profil ----------
+    def _update_profile_label(self) -> None:
+        if self.profile is None:
+            self.profile_lbl.setText("(aucun : chargez un fichier)")
+            return
+        writes, reads, ignored = profile_tasks(self.schema, self.cmb_card.currentText(), self.profile)
+        text = f"{self.profile.source or 'Calibrator'} — {len(writes)} écriture(s), {len(reads)} relecture(s)"
+        if ignored:
+            text += f", {len(ignored)} ignoré(s)"
+        self.profile_lbl.setText(text)
+
+    def _on_load_profile(self) -> None:
+        path, _ = QFileDialog.getOpenFileName(self, "Charger un profil", "", "JSON (*.json)")
+        if not path:
+            return
+        try:
+            self.profile = load_snapshot(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Profil", f"Fichier illisible :\n{e}")
+            return
+        if self.profile.card:
+            self.cmb_card.setCurrentText(self.profile.card)
+        self._update_profile_label()
+
+    # ---------- Exécution ----------
+    def is_running(self) -> bool:
+        return bool(self._workers)
+
+    def _set_cell(self, row: int, col: int, text: str, color: Optional[str] = None) -> None:
+        item = QTableWidgetItem(text)
+        if color:
+            item.setForeground(QColor(color))
+        self.table.setItem(row, col, item)
+
+    def start(self) -> None:
+        if self.is_running():
+            return
+        ports = self.selected_ports()
+        card = self.cmb_card.currentText()
+        if not ports:
+            QMessageBox.warning(self, "Production", "Cochez au moins un port.")
+            return
+        if self.profile is None or self.profile.card not in ("", card):
+            QMessageBox.warning(self, "Production", f"Chargez un profil pour la carte {card}.")
+            return
+        writes, _, _ = profile_tasks(self.schema, card, self.profile)
+        if not writes:
+            QMessageBox.warning(self, "Production", "Le profil ne contient aucun paramètre modifiable pour cette carte.")
+            return
+        try:
+            baudrate = int(self.cmb_baud.currentText())
+        except ValueError:
+            QMessageBox.warning(self, "Production", "Baudrate invalide.")
+            return
+
+        self._run_card = card
+        self._run_profile = self.profile
+        self._results.clear()
+        self._rows.clear()
+        self.table.setRowCount(len(ports))
+        for row, port in enumerate(ports):
+            self._rows[port] = row
+            self._set_cell(row, 0, port)
+            self._set_cell(row, self.COL_STATE, STATE_PENDING)
+            for col in range(self.COL_WRITTEN, len(self.COLUMNS)):
+                self._set_cell(row, col, "")
+
+        self._started = time.monotonic()
+        for port in ports:
+            worker = FleetWorker(port, self.schema, card, self.profile, {"baudrate": baudrate},
+                                 verify=self.chk_verify.isChecked())
+            thread = QThread()
+            worker.moveToThread(thread)
+            thread.started.connect(worker.run)
+            worker.state_changed.connect(self._on_state_changed)
+            worker.finished.connect(self._on_board_finished)
+            worker.finished.connect(thread.quit)
+            worker.finished.connect(worker.deleteLater)
+            thread.finished.connect(thread.deleteLater)
+            thread.finished.connect(self._on_thread_finished)
+            self._workers[port] = worker
+            self._threads.append(thread)
+        for thread in list(self._threads):
+            thread.start()
+        self._set_running(True)
+        self.summary_lbl.setText(f"{len(ports)} carte(s) en cours...")
+
+    def _on_thread_finished(self) -> None:
+        thread = self.sender()
+        if thread in self._threads:
+            self._threads.remove(thread)
+
+    def cancel(self) -> None:
+        for worker in self._workers.values():
+            worker.cancel()
+        self.btn_cancel.setEnabled(False)
+
+    def _set_running(self, running: bool) -> None:
+        self.btn_start.setEnabled(not running)
+        self.btn_cancel.setEnabled(running)
+        self.btn_export.setEnabled(not running and bool(self._results))
+        self.port_list.setEnabled(not running)
+        self.cmb_card.setEnabled(not running)
+
+    def _on_state_changed(self, port: str, state: str, done: int, total: int) -> None:
+        row = self._rows.get(port)
+        if row is None:
+            return
+        text = f"{state} {done}/{total}" if total else state
+        self._set_cell(row, self.COL_STATE, text, STATE_COLORS.get(state))
+
+    def _on_board_finished(self, result: BoardResult) -> None:
+        self._workers.pop(result.port, None)
+        self._results[result.port] = result
+        row = self._rows[result.port]
+        color = STATE_COLORS.get(result.state)
+        self._set_cell(row, self.COL_STATE, result.state, color)
+        self._set_cell(row, self.COL_WRITTEN, str(result.written))
+        self._set_cell(row, self.COL_VERIFIED, str(result.verified))
+        self._set_cell(row, self.COL_CONNECT, f"{result.connect_ms:.0f}")
+        self._set_cell(row, self.COL_WRITE, f"{result.write_ms:.0f}")
+        self._set_cell(row, self.COL_VERIFY, f"{result.verify_ms:.0f}")
+        self._set_cell(row, self.COL_TOTAL, f"{result.total_ms:.0f}")
+        self._set_cell(row, self.COL_DETAIL, result.detail(), color if not result.passed else None)
+        if self._workers:
+            return
+        self._wall_ms = (time.monotonic() - self._started) * 1000.0
+        self._set_running(False)
+        passed = sum(1 for r in self._results.values() if r.passed)
+        board_ms = sum(r.total_ms for r in self._results.values())
+        self.summary_lbl.setText(
+            f"{passed}/{len(self._results)} OK en {self._wall_ms / 1000:.1f} s "
+            f"(somme des cartes {board_ms / 1000:.1f} s, x{board_ms / max(self._wall_ms, 1.0):.1f})"
+        )
+
+    def report(self) -> dict:
+        """Rapport de la dernière exécution (cartes dans l'ordre de la grille)."""
+        results = sorted(self._results.values(), key=lambda r: self._rows.get(r.port, 0))
+        return fleet_report(self._run_card, self._run_profile or ParamSnapshot(), results, self._wall_ms)
+
+    def _on_export(self) -> None:
+        default = f"production-{self._run_card}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+        path, _ = QFileDialog.getSaveFileName(self, "Exporter le rapport", default, "JSON (*.json);;CSV (*.csv)")
+        if not path:
+            return
+        try:
+            save_report(path, self.report())
+        except OSError as e:
+            QMessageBox.critical(self, "Rapport", str(e))
+
+    def reject(self) -> None:
+        # Les QThread doivent finir avant que le dialogue ne disparaisse
+        if self.is_running() or self._threads:
+            self.cancel()
+            self.summary_lbl.setText("Annulation en cours : fermeture possible une fois les cartes libérées.")
+            return
+        super().reject()
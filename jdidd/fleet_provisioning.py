@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+# Fichier : fleet_provisioning.py
+"""
+Provisioning en série de production : un même profil de paramètres appliqué
+puis relu sur plusieurs cartes identiques, une par port série.
+
+Chaque port a son FleetWorker (QObject déplacé dans son QThread) et son
+propre SerialBackend : aucune ressource n'est partagée entre les cartes, le
+débit croît avec le nombre de ports. Les écritures et les relectures passent
+par CalibrationJob (pipeline par module, comme Get/Set All du Calibrator).
+"""
+
+from __future__ import annotations
+
+import csv
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from board_schema import BoardSchema, ParamDef
+from calibration_job import CalibrationJob, CalibSummary, CalibTask
+from param_snapshot import ParamDiff, ParamSnapshot, is_error_reply, normalize_value
+from persistence import write_atomic, write_json_atomic
+from serial_backend import SerialBackend, SerialException, serial
+
+REPORT_FORMAT = "jdidd-fleet-report"
+
+# États d'une carte (affichés tels quels dans la grille)
+STATE_PENDING = "En attente"
+STATE_CONNECTING = "Connexion"
+STATE_WRITING = "Écriture"
+STATE_VERIFYING = "Vérification"
+STATE_PASS = "OK"
+STATE_FAIL = "ÉCHEC"
+STATE_ERROR = "ERREUR"
+STATE_CANCELLED = "Annulé"
+
+FINAL_STATES = (STATE_PASS, STATE_FAIL, STATE_ERROR, STATE_CANCELLED)
+
+
+def expected_value(pdef: ParamDef, value: Any) -> str:
+    """Valeur du profil sous la forme comparée aux relectures (normalize_value)."""
+    return normalize_value(pdef, "" if value is None else str(value))
+
+
+def profile_tasks(schema: BoardSchema, card: str,
+                  profile: ParamSnapshot) -> Tuple[List[CalibTask], List[CalibTask], List[str]]:
+    """
+    (écritures, relectures, paramètres ignorés) pour appliquer profile à card.
+    Les paramètres en lecture seule (numéro de série, cause de reset...) ne
+    font pas partie d'une cible et sont ignorés, comme les clés inconnues et
+    les modules sans chemin shell. Les valeurs écrites sont normalisées
+    (texte, espaces retirés), comme celles relues.
+    """
+    writes: List[CalibTask] = []
+    reads: List[CalibTask] = []
+    ignored: List[str] = []
+    for module, key, value in profile.items():
+        pdef = schema.params(card, module).get(key)
+        if pdef is None or "set" not in pdef.access or not SerialBackend.MODULE_PATHS.get(module.strip()):
+            ignored.append(f"{module}.{key}")
+            continue
+        writes.append(CalibTask(module, key, "set", expected_value(pdef, value)))
+        if "get" in pdef.access:
+            reads.append(CalibTask(module, key, "get"))
+    return writes, reads, ignored
+
+
+@dataclass
+class BoardResult:
+    """Bilan d'une carte (rendu par FleetWorker.finished, une ligne du rapport)."""
+    port: str
+    state: str = STATE_PENDING
+    written: int = 0
+    verified: int = 0
+    write_errors: List[str] = field(default_factory=list)      # "MODULE.KEY: réponse"
+    mismatches: List[ParamDiff] = field(default_factory=list)  # old = attendu, new = relu
+    error: str = ""
+    connect_ms: float = 0.0
+    write_ms: float = 0.0
+    verify_ms: float = 0.0
+    total_ms: float = 0.0
+    started: float = 0.0                                       # time.time()
+
+    @property
+    def passed(self) -> bool:
+        return self.state == STATE_PASS
+
+    def detail(self) -> str:
+        """Résumé court de la cause d'un échec."""
+        if self.error:
+            return self.error
+        parts = list(self.write_errors)
+        parts += [f"{d.module}.{d.key}: attendu {d.old!r}, lu {d.new!r}" for d in self.mismatches]
+        return "; ".join(parts)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "port": self.port,
+            "result": "PASS" if self.passed else "FAIL",
+            "state": self.state,
+            "written": self.written,
+            "verified": self.verified,
+            "write_errors": self.write_errors,
+            "mismatches": [{"param": f"{d.module}.{d.key}", "expected": d.old, "read": d.new}
+                           for d in self.mismatches],
+            "error": self.error,
+            "detail": self.detail(),
+            "connect_ms": round(self.connect_ms, 1),
+            "write_ms": round(self.write_ms, 1),
+            "verify_ms": round(self.verify_ms, 1),
+            "total_ms": round(self.total_ms, 1),
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+        }
+
+
+class FleetWorker(QObject):
+    """
+    Provisionne la carte d'UN port : ouverture, écriture du profil, relecture,
+    fermeture. run() s'exécute dans le QThread du worker ; cancel() est
+    appelable depuis le GUI.
+    """
+
+    state_changed = pyqtSignal(str, str, int, int)   # port, état, faits, total de l'étape
+    finished = pyqtSignal(object)                    # BoardResult
+
+    def __init__(self, port: str, schema: BoardSchema, card: str, profile: ParamSnapshot,
+                 settings: Optional[Dict[str, Any]] = None, verify: bool = True, window: int = 8) -> None:
+        super().__init__()
+        self.port = port
+        self.schema = schema
+        self.card = card
+        self.profile = profile
+        self.settings = dict(settings or {})
+        self.verify = verify
+        self.window = window
+        self._cancel = threading.Event()
+        self._job: Optional[CalibrationJob] = None
+
+    def cancel(self) -> None:
+        self._cancel.set()
+        job = self._job
+        if job is not None:
+            job.cancel()
+
+    def _open(self, backend: SerialBackend) -> None:
+        """Ouvre le port (nom ou URL pyserial). Lève SerialException/OSError."""
+        if serial is None:
+            raise OSError("pyserial absent")
+        ser = serial.serial_for_url(
+            self.port,
+            baudrate=self.settings.get("baudrate", backend.baudrate),
+            bytesize=self.settings.get("bytesize", 8),
+            parity=self.settings.get("parity", "N"),
+            stopbits=self.settings.get("stopbits", 1),
+            timeout=backend.timeout,
+            write_timeout=backend.timeout,
+        )
+        backend.set_physical_serial(ser)
+
+    def _run_job(self, backend: SerialBackend, tasks: List[CalibTask], state: str) -> Tuple[List[Tuple[str, bool]], CalibSummary]:
+        """Exécute tasks dans CE thread ; rend (réponse, ok) par tâche et le bilan."""
+        replies: List[Tuple[str, bool]] = [("", False)] * len(tasks)
+        summaries: List[CalibSummary] = []
+        job = CalibrationJob(backend, tasks, window=self.window, refresh=True)   # relecture = le device
+
+        def on_result(index: int, value: str, ok: bool, _latency_ms: float, _cached: bool) -> None:
+            replies[index] = (value, ok)
+
+        job.result_ready.connect(on_result)
+        job.progress.connect(lambda done, total, _eta: self.state_changed.emit(self.port, state, done, total))
+        job.finished.connect(summaries.append)
+        self.state_changed.emit(self.port, state, 0, len(tasks))
+        self._job = job
+        if self._cancel.is_set():   # annulé entre deux étapes
+            job.cancel()
+        try:
+            job.run()
+        finally:
+            self._job = None
+            job.deleteLater()
+        return replies, summaries[0]
+
+    def run(self) -> None:
+        result = BoardResult(port=self.port, started=time.time())
+        start = time.monotonic()
+        backend = SerialBackend()
+        try:
+            writes, reads, _ = profile_tasks(self.schema, self.card, self.profile)
+            self.state_changed.emit(self.port, STATE_CONNECTING, 0, 0)
+            t0 = time.monotonic()
+            try:
+                self._open(backend)
+            except (SerialException, OSError, ValueError) as e:
+                result.error = f"ouverture impossible: {e}"
+                result.state = STATE_ERROR
+                return
+            result.connect_ms = (time.monotonic() - t0) * 1000.0
+
+            t0 = time.monotonic()
+            replies, summary = self._run_job(backend, writes, STATE_WRITING)
+            result.write_ms = (time.monotonic() - t0) * 1000.0
+            if summary.cancelled:
+                result.state = STATE_CANCELLED
+                return
+            for task, (reply, ok) in zip(writes, replies):
+                if ok and not is_error_reply(reply):
+                    result.written += 1
+                else:
+                    result.write_errors.append(f"{task.module}.{task.key}: {reply or 'pas de réponse'}")
+
+            if self.verify and reads:
+                t0 = time.monotonic()
+                replies, summary = self._run_job(backend, reads, STATE_VERIFYING)
+                result.verify_ms = (time.monotonic() - t0) * 1000.0
+                if summary.cancelled:
+                    result.state = STATE_CANCELLED
+                    return
+                for task, (reply, ok) in zip(reads, replies):
+                    pdef = self.schema.params(self.card, task.module)[task.key]
+                    expected = expected_value(pdef, self.profile.get(task.module, task.key))
+                    actual = normalize_value(pdef, reply) if ok and not is_error_reply(reply) else None
+                    if actual == expected:
+                        result.verified += 1
+                    else:
+                        result.mismatches.append(ParamDiff(task.module, task.key, expected, actual))
+
+            backend.return_to_root()
+            result.state = STATE_FAIL if (result.write_errors or result.mismatches) else STATE_PASS
+        except Exception as e:   # une carte en erreur ne doit pas faire tomber les autres
+            result.error = str(e)
+            result.state = STATE_ERROR
+        finally:
+            backend.disconnect()
+            result.total_ms = (time.monotonic() - start) * 1000.0
+            self.state_changed.emit(self.port, result.state, 0, 0)
+            self.finished.emit(result)
+
+
+# =========================== Rapport ===========================
+
+def fleet_report(card: str, profile: ParamSnapshot, results: List[BoardResult], wall_ms: float) -> Dict[str, Any]:
+    passed = sum(1 for r in results if r.passed)
+    return {
+        "format": REPORT_FORMAT,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "card": card,
+        "profile": profile.source,
+        "params": len(profile),
+        "boards": len(results),
+        "passed": passed,
+        "failed": len(results) - passed,
+        "wall_ms": round(wall_ms, 1),
+        "results": [r.to_dict() for r in results],
+    }
+
+
+def save_report(path: str, report: Dict[str, Any]) -> None:
+    """Rapport JSON, ou CSV (une ligne par carte) si path finit par .csv. Lève OSError."""
+    if not path.lower().endswith(".csv"):
+        write_json_atomic(path, report)
+        return
+    columns = ["port", "result", "state", "written", "verified",
+               "connect_ms", "write_ms", "verify_ms", "total_ms", "started", "detail"]
+
+    def write(f) -> None:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(report["results"])
+
+    write_atomic(path, write, suffix=".csv", newline="")   # pas de rapport tronqué si le process meurt
@@ -0,0 +1,359 @@
+# Fichier : framers.py
+
+import codecs
+
+# Drapeaux d'une trame (stockés avec la trame dans l'anneau RX)
+FRAME_PARTIAL = 0x01    # morceau de trame : la suite viendra (ligne restée ouverte, prompt...)
+FRAME_ERROR = 0x02      # trame invalide (échappement SLIP/COBS, CRC Modbus...)
+
+# Identifiants de découpage (sélectionnables dans SettingsDialog)
+FRAMER_LF = "lf"
+FRAMER_CR = "cr"
+FRAMER_CRLF = "crlf"
+FRAMER_IDLE = "idle"
+FRAMER_FIXED = "fixed"
+FRAMER_LENGTH = "length"
+FRAMER_SLIP = "slip"
+FRAMER_COBS = "cobs"
+FRAMER_MODBUS_RTU = "modbus_rtu"
+
+DEFAULT_MAX_FRAME = 64 * 1024   # au-delà, le début de trame est rendu en FRAME_PARTIAL
+
+
+class Framer:
+    """
+    Découpe le flux RX en trames. Tourne dans le thread du SerialWorker.
+
+    feed(data, now) ajoute les octets lus (now = time.monotonic() de la lecture)
+    et retourne la liste des trames terminées [(drapeaux, octets)]. Le tampon est
+    un bytearray unique : on y cherche les délimiteurs sur place et on ne copie
+    que les trames extraites.
+
+    Les découpages temporels (idle, Modbus RTU, ligne ouverte trop longtemps)
+    exposent idle_timeout_s : le worker rappelle poll(now) quand rien n'arrive.
+
+    decode() (texte, décodeur UTF-8 incrémental) est utilisé côté affichage :
+    un caractère multi-octets coupé entre deux morceaux n'est pas corrompu.
+    """
+
+    idle_timeout_s = None       # None = pas de découpage temporel
+
+    def __init__(self, max_frame: int = DEFAULT_MAX_FRAME):
+        self.max_frame = max_frame
+        self._buf = bytearray()
+        self._last_rx = 0.0
+        self._idle_done = False     # silence déjà traité depuis la dernière lecture
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    def feed(self, data, now: float) -> list:
+        self._last_rx = now
+        self._idle_done = False
+        self._buf += data
+        frames = self._extract()
+        if len(self._buf) > self.max_frame:
+            frames.append((FRAME_PARTIAL, bytes(self._buf)))
+            self._buf.clear()
+        return frames
+
+    def _extract(self) -> list:
+        raise NotImplementedError
+
+    def wait_timeout(self, now: float):
+        """Délai max avant le prochain poll() (None = attendre les données)."""
+        if self.idle_timeout_s is None or not self._buf or self._idle_done:
+            return None
+        return max(0.0, self._last_rx + self.idle_timeout_s - now)
+
+    def poll(self, now: float) -> list:
+        """Appelé sans nouvelles données : libère ce que le silence permet de conclure."""
+        if self.idle_timeout_s is None or not self._buf or now - self._last_rx < self.idle_timeout_s:
+            return []
+        self._idle_done = True
+        return self._on_idle()
+
+    def _on_idle(self) -> list:
+        frame = bytes(self._buf)
+        self._buf.clear()
+        return [(0, frame)]
+
+    def pending(self) -> int:
+        return len(self._buf)
+
+    def reset(self) -> None:
+        self._buf.clear()
+        self._decoder.reset()
+
+    def decode(self, payload: bytes, final: bool = True) -> str:
+        return self._decoder.decode(payload, final)
+
+
+class LineFramer(Framer):
+    """
+    Lignes terminées par un délimiteur (LF, CR ou CRLF), délimiteur retiré.
+    Une ligne restée ouverte plus de idle_ms (prompt, saisie en cours) est
+    rendue en FRAME_PARTIAL pour être affichée tout de suite.
+    """
+
+    def __init__(self, delimiter: bytes = b"\n", idle_ms: int = 50, strip_cr: bool = None, **kwargs):
+        super().__init__(**kwargs)
+        self.delimiter = delimiter
+        # En mode LF, on tolère les fins de ligne CRLF
+        self.strip_cr = (delimiter == b"\n") if strip_cr is None else strip_cr
+        self.idle_timeout_s = idle_ms / 1000.0 if idle_ms > 0 else None
+        self._scan_from = 0
+
+    def _extract(self) -> list:
+        buf = self._buf
+        delim = self.delimiter
+        dlen = len(delim)
+        frames = []
+        start = 0
+        idx = buf.find(delim, max(0, self._scan_from - dlen + 1))
+        while idx >= 0:
+            end = idx
+            if self.strip_cr and end > start and buf[end - 1] == 0x0D:
+                end -= 1
+            frames.append((0, bytes(buf[start:end])))
+            start = idx + dlen
+            idx = buf.find(delim, start)
+        if start:
+            del buf[:start]
+        self._scan_from = len(buf)
+        return frames
+
+    def _on_idle(self) -> list:
+        buf = self._buf
+        # Un CR final peut être le début d'un CRLF : on le garde pour la suite
+        keep = 1 if buf.endswith(b"\r") and (self.delimiter == b"\r\n" or self.strip_cr) else 0
+        if len(buf) <= keep:
+            return []
+        frame = bytes(buf[:len(buf) - keep])
+        del buf[:len(buf) - keep]
+        self._scan_from = 0
+        return [(FRAME_PARTIAL, frame)]
+
+    def feed(self, data, now: float) -> list:
+        frames = super().feed(data, now)
+        if not self._buf:
+            self._scan_from = 0
+        return frames
+
+    def reset(self) -> None:
+        super().reset()
+        self._scan_from = 0
+
+
+class IdleFramer(Framer):
+    """Une trame = tout ce qui arrive jusqu'à un silence de idle_ms."""
+
+    def __init__(self, idle_ms: int = 20, **kwargs):
+        super().__init__(**kwargs)
+        self.idle_timeout_s = max(1, idle_ms) / 1000.0
+
+    def feed(self, data, now: float) -> list:
+        frames = []
+        if self._buf and now - self._last_rx >= self.idle_timeout_s:
+            frames = self._on_idle()     # le silence a eu lieu avant cette lecture
+        return frames + super().feed(data, now)
+
+    def _extract(self) -> list:
+        return []
+
+
+class FixedLengthFramer(Framer):
+    """Trames de longueur fixe."""
+
+    def __init__(self, length: int = 16, **kwargs):
+        super().__init__(**kwargs)
+        self.length = max(1, length)
+
+    def _extract(self) -> list:
+        buf = self._buf
+        n = self.length
+        count = len(buf) // n
+        if not count:
+            return []
+        mv = memoryview(buf)
+        frames = [(0, bytes(mv[i * n:(i + 1) * n])) for i in range(count)]
+        mv.release()
+        del buf[:count * n]
+        return frames
+
+
+class LengthPrefixedFramer(Framer):
+    """
+    Trames précédées de leur longueur (prefix_size octets de 1 à 4, big-endian,
+    longueur de la charge utile seule). La trame rendue contient l'en-tête.
+    Lève ValueError pour une autre taille de préfixe.
+    """
+
+    def __init__(self, prefix_size: int = 2, byteorder: str = "big", **kwargs):
+        super().__init__(**kwargs)
+        if not 1 <= prefix_size <= 4:
+            raise ValueError(f"taille de préfixe invalide : {prefix_size} (1 à 4 octets)")
+        self.prefix_size = prefix_size
+        self.byteorder = byteorder
+
+    def _extract(self) -> list:
+        buf = self._buf
+        p = self.prefix_size
+        frames = []
+        start = 0
+        while len(buf) - start >= p:
+            size = int.from_bytes(buf[start:start + p], self.byteorder)
+            if size + p > self.max_frame:
+                # Longueur aberrante : on se resynchronise sur l'octet suivant
+                frames.append((FRAME_ERROR, bytes(buf[start:start + 1])))
+                start += 1
+                continue
+            end = start + p + size
+            if end > len(buf):
+                break
+            frames.append((0, bytes(buf[start:end])))
+            start = end
+        if start:
+            del buf[:start]
+        return frames
+
+
+class SlipFramer(Framer):
+    """SLIP (RFC 1055) : trames délimitées par 0xC0, échappements 0xDB 0xDC / 0xDB 0xDD."""
+
+    END, ESC, ESC_END, ESC_ESC = 0xC0, 0xDB, 0xDC, 0xDD
+
+    def _extract(self) -> list:
+        buf = self._buf
+        frames = []
+        start = 0
+        idx = buf.find(self.END)
+        while idx >= 0:
+            if idx > start:            # END consécutifs = trames vides, ignorées
+                frames.append(self._unescape(buf[start:idx]))
+            start = idx + 1
+            idx = buf.find(self.END, start)
+        if start:
+            del buf[:start]
+        return frames
+
+    def _unescape(self, raw) -> tuple:
+        if self.ESC not in raw:
+            return (0, bytes(raw))
+        out = bytearray()
+        flags = 0
+        i = 0
+        n = len(raw)
+        while i < n:
+            b = raw[i]
+            if b == self.ESC and i + 1 < n:
+                nxt = raw[i + 1]
+                if nxt == self.ESC_END:
+                    out.append(self.END)
+                elif nxt == self.ESC_ESC:
+                    out.append(self.ESC)
+                else:
+                    flags |= FRAME_ERROR
+                    out.append(nxt)
+                i += 2
+            else:
+                if b == self.ESC:
+                    flags |= FRAME_ERROR
+                out.append(b)
+                i += 1
+        return (flags, bytes(out))
+
+
+class CobsFramer(Framer):
+    """COBS : trames délimitées par 0x00, décodées."""
+
+    def _extract(self) -> list:
+        buf = self._buf
+        frames = []
+        start = 0
+        idx = buf.find(0)
+        while idx >= 0:
+            if idx > start:
+                frames.append(self._decode_cobs(buf[start:idx]))
+            start = idx + 1
+            idx = buf.find(0, start)
+        if start:
+            del buf[:start]
+        return frames
+
+    @staticmethod
+    def _decode_cobs(raw) -> tuple:
+        out = bytearray()
+        i = 0
+        n = len(raw)
+        while i < n:
+            code = raw[i]
+            end = i + code
+            if code == 0 or end > n:
+                return (FRAME_ERROR, bytes(raw))
+            out += raw[i + 1:end]
+            i = end
+            if code < 0xFF and i < n:
+                out.append(0)
+        return (0, bytes(out))
+
+
+def modbus_crc16(data) -> int:
+    crc = 0xFFFF
+    for b in data:
+        crc ^= b
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return crc
+
+
+class ModbusRtuFramer(Framer):
+    """
+    Modbus RTU : une trame se termine après un silence de 3,5 caractères
+    (1,75 ms fixe au-delà de 19200 bauds, comme le prévoit la spécification).
+    Les trames dont le CRC ne correspond pas sont marquées FRAME_ERROR.
+    """
+
+    def __init__(self, baudrate: int = 19200, **kwargs):
+        super().__init__(**kwargs)
+        if baudrate > 19200:
+            self.idle_timeout_s = 0.00175
+        else:
+            self.idle_timeout_s = 3.5 * 11 / max(1, baudrate)   # 11 bits par caractère
+
+    def feed(self, data, now: float) -> list:
+        frames = []
+        if self._buf and now - self._last_rx >= self.idle_timeout_s:
+            frames = self._on_idle()
+        return frames + super().feed(data, now)
+
+    def _extract(self) -> list:
+        return []
+
+    def _on_idle(self) -> list:
+        frame = bytes(self._buf)
+        self._buf.clear()
+        ok = len(frame) >= 4 and modbus_crc16(frame[:-2]) == int.from_bytes(frame[-2:], "little")
+        return [(0 if ok else FRAME_ERROR, frame)]
+
+
+def create_framer(name: str, param: int = 0, baudrate: int = 115200) -> Framer:
+    """
+    Fabrique le découpeur choisi dans SettingsDialog.
+    param : délai de ligne ouverte / silence (ms), longueur fixe ou taille du préfixe selon le mode.
+    """
+    if name == FRAMER_CR:
+        return LineFramer(b"\r", idle_ms=param)
+    if name == FRAMER_CRLF:
+        return LineFramer(b"\r\n", idle_ms=param)
+    if name == FRAMER_IDLE:
+        return IdleFramer(idle_ms=param or 20)
+    if name == FRAMER_FIXED:
+        return FixedLengthFramer(length=param or 16)
+    if name == FRAMER_LENGTH:
+        return LengthPrefixedFramer(prefix_size=param or 2)
+    if name == FRAMER_SLIP:
+        return SlipFramer()
+    if name == FRAMER_COBS:
+        return CobsFramer()
+    if name == FRAMER_MODBUS_RTU:
+        return ModbusRtuFramer(baudrate=baudrate)
+    return LineFramer(b"\n", idle_ms=param)
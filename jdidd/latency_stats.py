@@ -0,0 +1,61 @@
+# Fichier : latency_stats.py
+
+import math
+
+
+class LatencyHistogram:
+    """
+    Histogramme de latences à seaux logarithmiques (puissances de 2, en µs).
+    Mémoire fixe, ajout O(1) : utilisable depuis un thread d'I/O. Les lectures
+    depuis le GUI se font sur une copie (snapshot) ; un léger décalage entre
+    compteurs est sans conséquence pour de la statistique.
+    """
+
+    BUCKETS = 24                    # [0,1) [1,2) [2,4) ... jusqu'à ~8 s
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total_us = 0.0
+        self.min_us = math.inf
+        self.max_us = 0.0
+
+    def add(self, latency_us: float) -> None:
+        i = 0 if latency_us < 1 else min(self.BUCKETS - 1, int(latency_us).bit_length())
+        self.counts[i] += 1
+        self.count += 1
+        self.total_us += latency_us
+        if latency_us < self.min_us:
+            self.min_us = latency_us
+        if latency_us > self.max_us:
+            self.max_us = latency_us
+
+    @staticmethod
+    def bucket_bounds(i: int) -> tuple:
+        """Bornes [basse, haute) du seau i, en µs."""
+        return (0, 1) if i == 0 else (1 << (i - 1), 1 << i)
+
+    def percentile(self, p: float) -> float:
+        """Estimation (borne haute du seau, bornée par le max observé)."""
+        if not self.count:
+            return 0.0
+        target = max(1, math.ceil(p / 100.0 * self.count))
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if seen >= target:
+                return min(float(self.bucket_bounds(i)[1]), self.max_us)
+        return self.max_us
+
+    def mean(self) -> float:
+        return self.total_us / self.count if self.count else 0.0
+
+    def summary(self) -> str:
+        if not self.count:
+            return "n=0"
+        return (f"n={self.count}  min={self.min_us:.0f} µs  p50≤{self.percentile(50):.0f} µs  "
+                f"p99≤{self.percentile(99):.0f} µs  max={self.max_us:.0f} µs")
+
+    def rows(self) -> list:
+        """Seaux non vides : [(basse, haute, nombre)] pour affichage."""
+        return [(*self.bucket_bounds(i), c) for i, c in enumerate(self.counts) if c]
@@ -0,0 +1,398 @@
+# Fichier : log_view.py
+
+import time
+
+from PyQt6.QtWidgets import QAbstractScrollArea, QApplication, QMenu
+from PyQt6.QtCore import Qt, QPointF, QRectF
+from PyQt6.QtGui import QColor, QFont, QFontMetricsF, QPainter, QKeySequence, QPalette
+
+from ansi_parser import ATTR_BOLD, ATTR_ITALIC, ATTR_UNDERLINE, ATTR_STRIKE
+
+DEFAULT_SCROLLBACK_LINES = 100_000
+
+
+class LineStore:
+    """
+    Historique borné de lignes (anneau préalloué, O(1) par ajout et par accès).
+
+    Chaque ligne = texte + horodatage + runs de style [(début, fin, style_id), ...]
+    (None si toute la ligne est dans le style par défaut, le cas le plus courant).
+    Les indices "absolus" ne sont jamais réutilisés : first_index avance quand
+    les plus anciennes lignes sont évincées.
+    """
+
+    def __init__(self, max_lines: int = DEFAULT_SCROLLBACK_LINES):
+        self.max_lines = max(1, max_lines)
+        self._text = [""] * self.max_lines
+        self._runs = [None] * self.max_lines
+        self._ts = [0.0] * self.max_lines
+        self._head = 0              # slot de la plus ancienne ligne
+        self.count = 0
+        self.first_index = 0        # indice absolu de la plus ancienne ligne
+        self.open_line = False      # la dernière ligne attend la suite (pas de '\n')
+
+    def __len__(self):
+        return self.count
+
+    def _slot(self, i: int) -> int:
+        return (self._head + i) % self.max_lines
+
+    def append(self, text: str, runs=None, ts: float = 0.0) -> int:
+        """Ajoute une ligne ; retourne le nombre de lignes évincées (0 ou 1)."""
+        evicted = 0
+        if self.count == self.max_lines:
+            self._head = (self._head + 1) % self.max_lines
+            self.count -= 1
+            self.first_index += 1
+            evicted = 1
+        slot = self._slot(self.count)
+        self._text[slot] = text
+        self._runs[slot] = runs
+        self._ts[slot] = ts
+        self.count += 1
+        return evicted
+
+    def extend_last(self, text: str, runs=None) -> None:
+        """Complète la dernière ligne (ligne restée ouverte)."""
+        slot = self._slot(self.count - 1)
+        base = len(self._text[slot])
+        old = self._runs[slot]
+        if runs is None and old is None:
+            self._text[slot] += text
+            return
+        merged = list(old) if old is not None else [(0, base, 0)]
+        merged.extend((s + base, e + base, st) for s, e, st in (runs or [(0, len(text), 0)]))
+        self._text[slot] += text
+        self._runs[slot] = merged
+
+    def line(self, i: int):
+        """(texte, runs, horodatage) de la i-ème ligne conservée (0 = plus ancienne)."""
+        slot = self._slot(i)
+        return self._text[slot], self._runs[slot], self._ts[slot]
+
+    def text(self, i: int) -> str:
+        return self._text[self._slot(i)]
+
+    def clear(self) -> None:
+        self.first_index += self.count
+        self._head = 0
+        self.count = 0
+        self.open_line = False
+        # libère la mémoire des anciennes lignes
+        self._text = [""] * self.max_lines
+        self._runs = [None] * self.max_lines
+
+
+class LogView(QAbstractScrollArea):
+    """
+    Vue terminal virtualisée : seules les lignes visibles sont peintes.
+
+    - Coût d'ajout constant, quelle que soit la taille de l'historique.
+    - Historique borné (max_lines), les plus anciennes lignes sont évincées.
+    - Défilement automatique sauf si l'utilisateur est remonté dans l'historique.
+    - Sélection à la souris, copie (Ctrl+C / menu), tout sélectionner (Ctrl+A).
+    """
+
+    def __init__(self, parent=None, max_lines: int = DEFAULT_SCROLLBACK_LINES):
+        super().__init__(parent)
+        self.store = LineStore(max_lines)
+        self._styles = [(None, None, 0)]           # style_id -> (QColor fg, QColor bg, attributs) ; 0 = défaut
+        self._style_ids = {(None, None, 0): 0}
+        self._fonts = {}                            # attributs -> QFont
+        self._max_cols = 0
+        self._follow = True                         # collé en bas
+        self._sel_anchor = None                     # (ligne absolue, colonne)
+        self._sel_cursor = None
+        self._selecting = False
+
+        self.setFont(QFont("Consolas", 10))
+        self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
+        self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.customContextMenuRequested.connect(self._show_context_menu)
+        self.viewport().setCursor(Qt.CursorShape.IBeamCursor)
+        self.verticalScrollBar().valueChanged.connect(self._on_scrolled)
+        self.horizontalScrollBar().valueChanged.connect(lambda _: self.viewport().update())
+        self._update_metrics()
+
+    # ---------- Styles ----------
+    def style_id(self, fg=None, bg=None, attrs=0) -> int:
+        """
+        Identifiant (interné) d'un style : chaque style distinct n'est construit qu'une fois.
+        fg/bg = entier 0xRRGGBB ou None (couleur par défaut), attrs = bits ATTR_* (ansi_parser).
+        """
+        key = (fg, bg, attrs)
+        sid = self._style_ids.get(key)
+        if sid is None:
+            sid = len(self._styles)
+            self._styles.append((QColor(fg) if fg is not None else None,
+                                 QColor(bg) if bg is not None else None, attrs))
+            self._style_ids[key] = sid
+        return sid
+
+    def _font_for(self, attrs: int) -> QFont:
+        font = self._fonts.get(attrs)
+        if font is None:
+            font = QFont(self.font())
+            font.setBold(bool(attrs & ATTR_BOLD))
+            font.setItalic(bool(attrs & ATTR_ITALIC))
+            font.setUnderline(bool(attrs & ATTR_UNDERLINE))
+            font.setStrikeOut(bool(attrs & ATTR_STRIKE))
+            self._fonts[attrs] = font
+        return font
+
+    # ---------- Métriques ----------
+    def _update_metrics(self):
+        fm = QFontMetricsF(self.font())
+        self._char_w = fm.horizontalAdvance("M")
+        self._line_h = fm.lineSpacing()
+        self._ascent = fm.ascent()
+        self._fonts = {}
+
+    def changeEvent(self, event):
+        super().changeEvent(event)
+        if event.type() == event.Type.FontChange:
+            self._update_metrics()
+            self._update_scrollbars()
+
+    def _visible_lines(self) -> int:
+        return max(1, int(self.viewport().height() // self._line_h))
+
+    def _update_scrollbars(self):
+        vbar = self.verticalScrollBar()
+        vbar.setPageStep(self._visible_lines())
+        vbar.setRange(0, max(0, self.store.count - self._visible_lines()))
+        hbar = self.horizontalScrollBar()
+        hbar.setPageStep(self.viewport().width())
+        hbar.setRange(0, max(0, int(self._max_cols * self._char_w) - self.viewport().width() + 4))
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_scrollbars()
+        if self._follow:
+            self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+
+    def _on_scrolled(self, value):
+        self._follow = value >= self.verticalScrollBar().maximum()
+        self.viewport().update()
+
+    # ---------- Ajout ----------
+    def append_text(self, text: str, runs=None) -> None:
+        """
+        Ajoute du texte (peut contenir plusieurs '\\n'). Sans '\\n' final, la
+        dernière ligne reste ouverte et le prochain ajout la complète.
+        runs : [(début, fin, style_id)] relatifs à `text`, ou None (style par défaut).
+        """
+        if not text:
+            return
+        store = self.store
+        now = time.time()
+        evicted = 0
+        pos = 0
+        n = len(text)
+        ri = 0                      # runs triés : on avance dedans au fil des lignes
+        n_runs = len(runs) if runs else 0
+        while pos < n:
+            nl = text.find("\n", pos)
+            end = n if nl < 0 else nl
+            seg = text[pos:end]
+            seg_runs = None
+            if n_runs:
+                while ri < n_runs and runs[ri][1] <= pos:
+                    ri += 1
+                j = ri
+                while j < n_runs and runs[j][0] < end:
+                    s, e, st = runs[j]
+                    if st and e > pos:
+                        if seg_runs is None:
+                            seg_runs = []
+                        seg_runs.append((max(s, pos) - pos, min(e, end) - pos, st))
+                    j += 1
+            if store.open_line and store.count:
+                store.extend_last(seg, seg_runs)
+                cols = len(store.text(store.count - 1))
+            else:
+                evicted += store.append(seg, seg_runs, now)
+                cols = len(seg)
+            if cols > self._max_cols:
+                self._max_cols = cols
+            store.open_line = nl < 0
+            if nl < 0:
+                break
+            pos = nl + 1
+            if pos == n:
+                break
+        self._after_append(evicted)
+
+    def _after_append(self, evicted: int) -> None:
+        vbar = self.verticalScrollBar()
+        follow = self._follow
+        value = vbar.value()
+        self._update_scrollbars()
+        if follow:
+            vbar.setValue(vbar.maximum())
+        elif evicted:
+            # Garde le même contenu à l'écran quand le haut de l'historique disparaît
+            vbar.setValue(max(0, value - evicted))
+        self._follow = follow
+        self.viewport().update()
+
+    def clear(self) -> None:
+        self.store.clear()
+        self._max_cols = 0
+        self._sel_anchor = self._sel_cursor = None
+        self._follow = True
+        self._update_scrollbars()
+        self.viewport().update()
+
+    def set_max_lines(self, max_lines: int) -> None:
+        """Change la taille de l'historique (conserve les lignes les plus récentes)."""
+        old = self.store
+        if max(1, max_lines) == old.max_lines:
+            return
+        self.store = LineStore(max_lines)
+        start = max(0, old.count - self.store.max_lines)
+        self.store.first_index = old.first_index + start
+        for i in range(start, old.count):
+            self.store.append(*old.line(i))
+        self.store.open_line = old.open_line
+        self._update_scrollbars()
+        self.viewport().update()
+
+    def to_plain_text(self) -> str:
+        return "\n".join(self.store.text(i) for i in range(self.store.count))
+
+    def ensure_end_visible(self) -> None:
+        self._follow = True
+        self.verticalScrollBar().setValue(self.verticalScrollBar().maximum())
+
+    # ---------- Peinture ----------
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        pal = self.viewport().palette()
+        painter.fillRect(self.viewport().rect(), pal.color(QPalette.ColorRole.Base))
+        store = self.store
+        first = self.verticalScrollBar().value()
+        last = min(store.count, first + self._visible_lines() + 1)
+        x0 = 2 - self.horizontalScrollBar().value()
+        cw, lh, asc = self._char_w, self._line_h, self._ascent
+        sel = self._selection_range()
+        sel_color = pal.color(QPalette.ColorRole.Highlight)
+        normal_font = self.font()
+        default_fg = self.palette().color(QPalette.ColorRole.Text)   # "color" de la feuille de style
+
+        for row, i in enumerate(range(first, last)):
+            text, runs, _ = store.line(i)
+            y = row * lh
+            abs_i = store.first_index + i
+            if sel and sel[0][0] <= abs_i <= sel[1][0]:
+                c0 = sel[0][1] if abs_i == sel[0][0] else 0
+                c1 = sel[1][1] if abs_i == sel[1][0] else len(text) + 1
+                painter.fillRect(QRectF(x0 + c0 * cw, y, max(0, c1 - c0) * cw, lh), sel_color)
+            if runs is None:
+                painter.setFont(normal_font)
+                painter.setPen(default_fg)
+                painter.drawText(QPointF(x0, y + asc), text)
+                continue
+            col = 0
+            for s, e, sid in runs:
+                if s > col:
+                    painter.setFont(normal_font)
+                    painter.setPen(default_fg)
+                    painter.drawText(QPointF(x0 + col * cw, y + asc), text[col:s])
+                fg, bg, attrs = self._styles[sid]
+                if bg is not None:
+                    painter.fillRect(QRectF(x0 + s * cw, y, (e - s) * cw, lh), bg)
+                painter.setFont(self._font_for(attrs) if attrs else normal_font)
+                painter.setPen(fg if fg is not None else default_fg)
+                painter.drawText(QPointF(x0 + s * cw, y + asc), text[s:e])
+                col = e
+            if col < len(text):
+                painter.setFont(normal_font)
+                painter.setPen(default_fg)
+                painter.drawText(QPointF(x0 + col * cw, y + asc), text[col:])
+        painter.end()
+
+    # ---------- Sélection ----------
+    def _pos_at(self, point) -> tuple:
+        store = self.store
+        row = int(point.y() // self._line_h) + self.verticalScrollBar().value()
+        row = max(0, min(store.count - 1, row))
+        col = int(round((point.x() - 2 + self.horizontalScrollBar().value()) / self._char_w))
+        col = max(0, min(len(store.text(row)) if store.count else 0, col))
+        return (store.first_index + row, col)
+
+    def _selection_range(self):
+        if self._sel_anchor is None or self._sel_cursor is None or self._sel_anchor == self._sel_cursor:
+            return None
+        a, b = sorted((self._sel_anchor, self._sel_cursor))
+        first = self.store.first_index
+        if b[0] < first:
+            return None
+        if a[0] < first:
+            a = (first, 0)
+        return a, b
+
+    def selected_text(self) -> str:
+        rng = self._selection_range()
+        if not rng:
+            return ""
+        (l0, c0), (l1, c1) = rng
+        first = self.store.first_index
+        out = []
+        for abs_i in range(l0, l1 + 1):
+            text = self.store.text(abs_i - first)
+            s = c0 if abs_i == l0 else 0
+            e = c1 if abs_i == l1 else len(text)
+            out.append(text[s:e])
+        return "\n".join(out)
+
+    def copy(self) -> None:
+        text = self.selected_text()
+        if text:
+            QApplication.clipboard().setText(text)
+
+    def select_all(self) -> None:
+        if not self.store.count:
+            return
+        last = self.store.count - 1
+        self._sel_anchor = (self.store.first_index, 0)
+        self._sel_cursor = (self.store.first_index + last, len(self.store.text(last)))
+        self.viewport().update()
+
+    def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.LeftButton and self.store.count:
+            self._sel_anchor = self._sel_cursor = self._pos_at(event.position())
+            self._selecting = True
+            self.viewport().update()
+        super().mousePressEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if self._selecting:
+            self._sel_cursor = self._pos_at(event.position())
+            self.viewport().update()
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        self._selecting = False
+        super().mouseReleaseEvent(event)
+
+    def keyPressEvent(self, event):
+        if event.matches(QKeySequence.StandardKey.Copy):
+            self.copy()
+        elif event.matches(QKeySequence.StandardKey.SelectAll):
+            self.select_all()
+        elif event.key() == Qt.Key.Key_End:
+            self.ensure_end_visible()
+        else:
+            super().keyPressEvent(event)
+
+    def _show_context_menu(self, pos):
+        menu = QMenu(self)
+        copy_action = menu.addAction("Copy")
+        copy_action.setEnabled(bool(self._selection_range()))
+        select_all_action = menu.addAction("Select All")
+        action = menu.exec(self.mapToGlobal(pos))
+        if action == copy_action:
+            self.copy()
+        elif action == select_all_action:
+            self.select_all()
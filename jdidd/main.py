@@ -1,12 +1,11 @@
 # Fichier : main.py (version intégrée backend partagé + SettingsDialog)
 
-import sys, json, codecs, time, re
-from datetime import datetime
+import os, sys, json, time, re, threading
 
 import serial, serial.tools.list_ports
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout,
-    QPushButton, QStackedWidget, QMessageBox, QLabel, QButtonGroup
+    QPushButton, QStackedWidget, QMessageBox, QLabel, QButtonGroup, QProgressDialog
 )
 from PyQt6.QtGui import QIcon, QAction
 from PyQt6.QtCore import QThread, QObject, pyqtSignal, QTimer
@@ -17,12 +16,23 @@ from ansi2html import Ansi2HTMLConverter
 
 # Modules locaux
 from colors import Colors
-from settings_dialog import SettingsDialog
+from settings_dialog import SettingsDialog, SERIAL_PORT_KEYS
+from log_view import DEFAULT_SCROLLBACK_LINES
 from terminal_widget import TerminalWidget
 from calibrator_widget import MenzuCalibratorPage   # IMPORTANT : fichier calibrator_widget.py
-from serial_worker import SerialWorker
+from serial_worker import SerialWorker, RX_STRATEGY_AUTO
 from scripting_dialog import ScriptingDialog
-from serial_backend import SerialBackend            # backend partagé pour Calibrator
+from serial_backend import SerialBackend, DEFAULT_PROMPT_REGEX   # backend partagé pour Calibrator
+from rx_ring_buffer import RxRingBuffer
+from tx_writer import TxWriter, TX_PACING_RX_IDLE
+from cyclic_scheduler import CyclicJob, format_cyclic_stats
+from framers import create_framer, FRAMER_LF, FRAME_PARTIAL, FRAME_ERROR
+from auto_responder import AutoResponder, AutoResponseTable, remap_stats, rule_label
+from sequence_codec import encode_sequence
+from rx_subscription import RxSubscription
+from file_transfer import (FileTransfer, PROTOCOL_RAW, line_rate, format_transfer_progress,
+                           format_transfer_summary)
+from file_send_dialog import FileSendDialog
 
 
 # ----------------------- Scripting -----------------------
@@ -31,26 +41,129 @@ class ScriptInterruptException(Exception):
     pass
 
 class ScriptAPI(QObject):
+    """
+    Objet `api` des scripts (exécutés dans le thread du ScriptRunner).
+
+    - send_raw() passe par le thread TX de l'app (ordonné avec les envois du Terminal).
+    - write() écrit directement sur le port depuis le thread du script (verrou
+      d'écriture partagé) : pas d'aller-retour par le GUI. Refusé (RuntimeError)
+      tant que le port est prêté au Calibrator ou à un transfert de fichier.
+    - read() / readline() / expect() / transact() lisent une copie du flux RX
+      (RxSubscription abonnée au SerialWorker, tampon borné) : le Terminal
+      continue d'afficher tout ce qui arrive.
+    Les lectures rendent b"" / "" / None à l'expiration du timeout (en s).
+    """
     log_requested = pyqtSignal(str)
     send_data_requested = pyqtSignal(bytes)
+    tx_logged = pyqtSignal(bytes, str)   # écho terminal d'un write() direct
 
-    def __init__(self, parent=None):
+    DEFAULT_TIMEOUT_S = 1.0
+    ENCODING = "utf-8"
+
+    def __init__(self, port=None, rx=None, write_lock=None, prompt=DEFAULT_PROMPT_REGEX, suspended=None, parent=None):
         super().__init__(parent)
         self.runner = None
+        self.port = port
+        self.rx = rx
+        self.write_lock = write_lock or threading.Lock()
+        self.suspended = suspended or threading.Event()   # positionné par le GUI (_update_background_tx)
+        self.prompt = prompt
+        self.timeout = self.DEFAULT_TIMEOUT_S
+
+    def _check_running(self):
+        if self.runner and not self.runner._is_running:
+            raise ScriptInterruptException("Script stopped by the user.")
+
+    def _require_rx(self):
+        if self.rx is None:
+            raise RuntimeError("RX stream not available (communication not started)")
+
+    def _decode(self, data: bytes) -> str:
+        return data.decode(self.ENCODING, errors="replace")
 
     def log(self, message):
         self.log_requested.emit(str(message))
 
     def send_raw(self, data_str):
-        self.send_data_requested.emit(codecs.decode(data_str, 'unicode_escape').encode('latin-1'))
+        self.send_data_requested.emit(encode_sequence(data_str))
+
+    def write(self, data):
+        """Envoi direct sur le port (str : séquences d'échappement comme send_raw ; bytes : tel quel)."""
+        self._check_running()
+        payload = encode_sequence(data) if isinstance(data, str) else bytes(data)
+        port = self.port
+        if port is None or not port.is_open:
+            raise serial.SerialException("Serial port not open (communication not started)")
+        with self.write_lock:
+            if self.suspended.is_set():   # relu sous le verrou, comme les envois cycliques
+                raise RuntimeError("Serial port in use by the Calibrator or a file transfer")
+            port.write(payload)
+        self.tx_logged.emit(payload, "[SCRIPT-TX]")
+
+    def read(self, size=-1, timeout=None):
+        """
+        Jusqu'à size octets reçus (bytes), attendus au plus timeout secondes ;
+        size=-1 rend ce qui est arrivé dès qu'au moins un octet est là.
+        """
+        self._require_rx()
+        timeout = self.timeout if timeout is None else timeout
+        if size < 0:
+            data = self.rx.read(-1, timeout)
+            self._check_running()
+            return data
+        deadline = time.monotonic() + timeout
+        data = b""
+        while len(data) < size:
+            data += self.rx.read(size - len(data), max(0.0, deadline - time.monotonic()))
+            self._check_running()
+            if time.monotonic() >= deadline or self.rx.closed:
+                break
+        return data
+
+    def readline(self, timeout=None, eol=b"\n"):
+        """Prochaine ligne reçue (str, fin de ligne retirée), ou "" à l'expiration."""
+        self._require_rx()
+        data = self.rx.read_until(eol, self.timeout if timeout is None else timeout)
+        self._check_running()
+        return self._decode(data).rstrip("\r\n")
+
+    def expect(self, pattern, timeout=None):
+        """
+        Attend que le flux reçu corresponde à l'expression régulière pattern ;
+        rend le re.Match (sur le texte consommé jusqu'à la fin de la
+        correspondance) ou None à l'expiration (rien n'est consommé).
+        """
+        self._require_rx()
+        regex = re.compile(pattern.encode(self.ENCODING) if isinstance(pattern, str) else pattern)
+        data, _ = self.rx.read_match(regex, self.timeout if timeout is None else timeout)
+        self._check_running()
+        if not data:
+            return None
+        text_pattern = pattern if isinstance(pattern, str) else self._decode(pattern)
+        return re.search(text_pattern, self._decode(data))
+
+    def transact(self, command, until=None, timeout=None):
+        """
+        Envoie command + CR LF puis attend until (regex, par défaut le prompt
+        du shell) ; rend la réponse sans l'écho ni le prompt, ou None à
+        l'expiration. Les octets reçus avant l'envoi sont jetés.
+        """
+        self._require_rx()
+        self.rx.clear()
+        self.write(command.encode(self.ENCODING) + b"\r\n")
+        m = self.expect(self.prompt if until is None else until, timeout)
+        if m is None:
+            return None
+        lines = m.string[:m.start()].splitlines()
+        if lines and lines[0].strip() == command.strip():
+            lines = lines[1:]
+        return "\n".join(lines).strip()
 
     def pause(self, milliseconds):
-        if self.runner and not self.runner._is_running:
-            raise ScriptInterruptException("Script stopped by the user.")
+        self._check_running()
         end_time = time.time() + milliseconds / 1000.0
         while time.time() < end_time:
-            if self.runner and not self.runner._is_running:
-                raise ScriptInterruptException("Script stopped by the user.")
+            self._check_running()
             time.sleep(0.02)
 
 class ScriptRunner(QObject):
@@ -93,6 +206,9 @@ class ScriptRunner(QObject):
 # ----------------------- Application principale -----------------------
 
 class SerialApp(QMainWindow):
+    RX_RING_CAPACITY = 1 << 20      # 1 Mio entre le thread RX et le GUI
+    RX_DRAIN_INTERVAL_MS = 16       # ~1 vidage par frame (60 Hz)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Sophia-Tech Serial Terminal")
@@ -103,7 +219,23 @@ class SerialApp(QMainWindow):
         self.serial_port = None          # instance serial.Serial pour le Terminal
         self.serial_worker_thread = None
         self.serial_worker = None
-        self.serial_buffer = b''
+        self.rx_framer = None            # découpeur RX (framers.py), actif pendant la connexion
+        self._rx_line_open = False       # dernière ligne RX affichée sans fin de ligne
+        self.auto_responder = None       # réponses automatiques (thread RX), actif pendant la connexion
+        self.auto_response_stats = {}    # indice de règle -> LatencyHistogram (conservé entre connexions)
+        self._cyclic_job_id = 0
+        self.write_lock = None           # verrou d'écriture du port, partagé par les threads qui écrivent
+        self._switch_interval = None     # intervalle du GIL avant connexion (le TxWriter l'abaisse pendant les envois cycliques)
+        self.port_suspended = threading.Event()   # port prêté (Calibrator, transfert) : écritures des scripts refusées
+        self.rx_strategy_active = None   # stratégie RX rapportée par le worker
+
+        # Anneau RX : le worker écrit, le GUI vide à cadence bornée
+        self.rx_ring = RxRingBuffer(self.RX_RING_CAPACITY)
+        self._rx_dropped_reported = 0
+        self._rx_last_drain = 0.0
+        self.rx_drain_timer = QTimer(self)
+        self.rx_drain_timer.setSingleShot(True)
+        self.rx_drain_timer.timeout.connect(self._drain_rx_ring)
 
         # Backend série partagé pour le Calibrator (ne DOIT PAS ouvrir lui-même)
         self.backend = SerialBackend()
@@ -113,27 +245,24 @@ class SerialApp(QMainWindow):
         self.scripting_dialog = None
         self.script_thread = None
         self.script_runner = None
+        self.script_rx = None            # RxSubscription du script en cours
         self.terminal_display_mode = "ASCII"
         self.is_closing = False
 
-        # File d'envoi (Terminal)
-        self.send_queue = []
-        self.send_timer = QTimer(self)
-        self.send_timer.setInterval(100)
-        self.send_timer.timeout.connect(self.process_send_queue)
-
-        # Détection de flux RX pour séquencer TX
-        self.is_receiving_data = False
-        self.rx_timeout_timer = QTimer(self)
-        self.rx_timeout_timer.setInterval(100)
-        self.rx_timeout_timer.setSingleShot(True)
-        self.rx_timeout_timer.timeout.connect(self._on_rx_stream_finished)
-
-        # Buffer processing timer
-        self.buffer_processing_timer = QTimer(self)
-        self.buffer_processing_timer.setSingleShot(True)
-        self.buffer_processing_timer.setInterval(5)
-        self.buffer_processing_timer.timeout.connect(self.process_buffered_data)
+        # Thread d'écriture TX (Terminal)
+        self.tx_writer_thread = None
+        self.tx_writer = None
+
+        # Envoi de fichier (thread dédié)
+        self.file_transfer_thread = None
+        self.file_transfer = None
+        self.file_transfer_rx = None     # abonnement RX (ACK/NAK X/YMODEM)
+        self.file_transfer_dialog = None
+        self._file_send_params = None    # derniers réglages du dialogue
+
+        # Horodatage : "HH:MM:SS" n'est reformaté qu'une fois par seconde
+        self._ts_second = None
+        self._ts_prefix = ""
 
         # UI
         self.setup_ui()
@@ -167,8 +296,10 @@ class SerialApp(QMainWindow):
         self.clear_action = QAction(QIcon("icons/clear.png"), "Clear", self)
         self.settings_action = QAction(QIcon("icons/settings.png"), "Config", self)
         self.scripting_action = QAction(QIcon("icons/script.png"), "Scripting", self)
+        self.send_file_action = QAction(QIcon("icons/upload.png"), "Send File", self)
 
         self.stop_action.setEnabled(False)
+        self.send_file_action.setEnabled(False)
 
         tb = self.addToolBar("Main Toolbar")
         tb.addAction(self.start_action)
@@ -178,6 +309,7 @@ class SerialApp(QMainWindow):
         tb.addSeparator()
         tb.addAction(self.settings_action)
         tb.addAction(self.scripting_action)
+        tb.addAction(self.send_file_action)
 
     def _setup_navigation(self):
         layout = QHBoxLayout()
@@ -223,14 +355,27 @@ class SerialApp(QMainWindow):
         self.start_action.triggered.connect(self.start_communication)
         self.stop_action.triggered.connect(self.stop_communication)
         self.scripting_action.triggered.connect(self.open_scripting_dialog)
+        self.send_file_action.triggered.connect(self.open_send_file_dialog)
 
         self.terminal_page.send_data_to_serial.connect(self.write_to_serial)
         self.terminal_page.send_line_to_serial.connect(self.write_line_to_serial)
         self.terminal_page.display_mode_changed.connect(self._on_terminal_display_mode_changed)
+        self.calibrator_page.busy_changed.connect(self._on_calibrator_busy_changed)
+        self.terminal_page.trigger_stats_requested.connect(self.show_auto_response_stats)
+        self.terminal_page.cyclic_send_requested.connect(self.start_cyclic_send)
+        self.terminal_page.cyclic_stop_requested.connect(self.stop_cyclic_send)
+        self.terminal_page.receive_manager.listeners.append(self._refresh_auto_responses)
+        self.terminal_page.receive_manager.observers.append(self._remap_auto_response_stats)
 
     # ----------------------- Navigation : pause/reprise RX -----------------------
 
     def enter_calibrator_mode(self):
+        if self.file_transfer:
+            # Le worker RX mis en pause affamerait le transfert, et les commandes du backend s'y mêleraient
+            self.btn_terminal.setChecked(True)
+            QMessageBox.warning(self, "Transfer Running",
+                                "A file transfer is running. Cancel it or wait for its end before opening the Calibrator.")
+            return
         self.stacked_widget.setCurrentIndex(1)
 
         # Mettre en pause le lecteur RX du Terminal
@@ -239,6 +384,7 @@ class SerialApp(QMainWindow):
                 self.serial_worker.pause(True)
             except Exception:
                 pass
+        self._update_background_tx()
 
         # Partager physiquement le même port avec le backend du Calibrator
         self._attach_backend_to_terminal_port()
@@ -251,162 +397,334 @@ class SerialApp(QMainWindow):
 
     def enter_terminal_mode(self):
         self.stacked_widget.setCurrentIndex(0)
+        # Le backend laisse le shell dans le dernier module lu : retour à la racine (seulement s'il en a changé, borné)
+        try:
+            self.backend.return_to_root()
+        except Exception:
+            pass
         # Reprendre la lecture RX du Terminal
         if getattr(self, "serial_worker", None):
             try:
                 self.serial_worker.pause(False)
             except Exception:
                 pass
+        self._update_background_tx()
+
+    def _update_background_tx(self):
+        """
+        Envois cycliques, réponses automatiques et écritures directes des
+        scripts suspendus tant que le port est prêté au Calibrator ou à un
+        transfert de fichier (un octet intercalé casserait ses commandes ou les
+        blocs X/YMODEM).
+        """
+        suspended = self.stacked_widget.currentIndex() == 1 or self.file_transfer is not None
+        if suspended:
+            self.port_suspended.set()
+        else:
+            self.port_suspended.clear()
+        if self.tx_writer:
+            self.tx_writer.pause_cyclic(suspended)
+        if self.auto_responder:
+            self.auto_responder.set_paused(suspended)
+
+    def _on_calibrator_busy_changed(self, busy: bool):
+        # Pendant un Get/Set All, le port appartient au job : pas de retour Terminal ni d'arrêt
+        self.btn_terminal.setEnabled(not busy)
+        self.stop_action.setEnabled(not busy and bool(self.serial_port and self.serial_port.is_open))
 
     # ----------------------- Helpers d’affichage -----------------------
 
     def _on_terminal_display_mode_changed(self, new_mode):
         self.terminal_display_mode = new_mode
 
+    def _timestamp(self) -> str:
+        """Horodatage "HH:MM:SS.mmm" (strftime mis en cache pour la seconde courante)."""
+        now = time.time()
+        second = int(now)
+        if second != self._ts_second:
+            self._ts_second = second
+            self._ts_prefix = time.strftime("%H:%M:%S", time.localtime(second))
+        return f"{self._ts_prefix}.{int((now - second) * 1000):03d}"
+
     def log_message_to_terminal(self, message, prefix="", prefix_color="gray", is_html=False):
-        now = datetime.now()
-        timestamp = now.strftime("%H:%M:%S") + f".{now.microsecond // 1000:03d}"
+        self._close_rx_line()
+        timestamp = self._timestamp()
         prefix_ansi = f"\033[1m[{prefix if prefix else '---'}] ->\033[0m "
         line_to_display = f"{timestamp} {prefix_ansi}{message}\n"
         self.terminal_page.append_ansi_text(line_to_display)
 
     # ----------------------- Envoi TX (Terminal) -----------------------
 
-    def process_send_queue(self):
-        if not self.send_queue or self.is_receiving_data:
-            self.send_timer.stop()
+    def write_to_serial(self, sequence_data):
+        mode = sequence_data.get("mode", "ASCII")
+        try:
+            data = self.terminal_page.send_manager.payload(sequence_data)   # octets précompilés (cache)
+        except ValueError as e:
+            QMessageBox.critical(self, "Format Error", f"Invalid sequence for {mode}.\n{e}")
             return
+        self.send_data(data, source_prefix="[TX]")
 
-        item = self.send_queue.pop(0)
+    def write_line_to_serial(self, text_line):
+        self.send_data((text_line + '\r\n').encode('latin-1'), source_prefix="[TX]")
 
-        if item['type'] == 'sequence':
-            seq = item['data']
-            mode = seq.get("mode", "ASCII")
-            text = seq.get("sequence", "")
+    def send_data(self, data_to_send: bytes, source_prefix="[TX]"):
+        """Empile un envoi pour le thread TX (ne bloque jamais le GUI)."""
+        if not (self.serial_port and self.serial_port.is_open and self.tx_writer):
+            QMessageBox.warning(self, "Not Connected", "Communication is not active.")
+            return
+        if self.file_transfer and self.file_transfer.protocol != PROTOCOL_RAW:
+            # Un octet intercalé casserait le protocole (le récepteur attend des blocs)
+            QMessageBox.warning(self, "Transfer Running", "A file transfer is running.")
+            return
+        self.tx_writer.enqueue(data_to_send, prefix=source_prefix)
+
+    def _on_tx_sent(self, data_to_send: bytes, source_prefix: str):
+        """Écho terminal d'un envoi terminé (signal du TxWriter)."""
+        self._close_rx_line()
+        timestamp = self._timestamp()
+        prefix_ansi = f"\033[1;35m{source_prefix} ->\033[0m "  # magenta
+
+        if self.terminal_display_mode == "ASCII":
+            content = data_to_send.decode('latin-1', errors='replace').replace('\n', '\\n').replace('\r', '\\r')
+            line = f"{timestamp} {prefix_ansi}{content}\n"
+            self.terminal_page.append_ansi_text(line)
+        elif self.terminal_display_mode == "HEX":
+            content = data_to_send.hex(' ').upper()
+            line = f"{timestamp} {source_prefix} -> {content}\n"
+            self.terminal_page.append_monospace_text(line)
+        else:
+            content = ' '.join(str(b) for b in data_to_send)
+            line = f"{timestamp} {source_prefix} -> {content}\n"
+            self.terminal_page.append_monospace_text(line)
+
+    def _on_tx_failed(self, error: str, source_prefix: str):
+        self._close_rx_line()
+        timestamp = self._timestamp()
+        self.terminal_page.append_monospace_text(f"{timestamp} [SEND ERROR] {source_prefix} -> {error}\n")
+
+    # ----------------------- Envois cycliques -----------------------
+
+    def start_cyclic_send(self, sequences, params):
+        """Envoi cyclique de séquences (ordonnancé dans le thread TX)."""
+        if not (self.serial_port and self.serial_port.is_open and self.tx_writer):
+            QMessageBox.warning(self, "Not Connected", "Communication is not active.")
+            return
+        if self.file_transfer:
+            QMessageBox.warning(self, "Transfer Running", "A file transfer is running.")
+            return
+        jobs = []
+        for i, seq in enumerate(sequences):
             try:
-                if mode == "ASCII":
-                    data = codecs.decode(text, 'unicode_escape').encode('latin-1')
-                elif mode == "HEX":
-                    data = bytes([int(p, 16) for p in text.replace("0x", "").split() if p])
-                else:  # Decimal
-                    data = bytes([int(p, 10) for p in text.split() if p])
-                self.send_data(data, source_prefix="[TX]")
+                data = self.terminal_page.send_manager.payload(seq)
             except ValueError as e:
-                QMessageBox.critical(self, "Format Error", f"Invalid sequence for {mode}.\n{e}")
-
-        elif item['type'] == 'line':
-            line = item['data']
-            self.send_data((line + '\r\n').encode('latin-1'), source_prefix="[TX]")
+                self.log_message_to_terminal(f"{seq.get('name', '')}: {e}", prefix="CYCLIC ERROR")
+                continue
+            self._cyclic_job_id += 1
+            jobs.append(CyclicJob(
+                self._cyclic_job_id, seq.get('name', '') or f"#{self._cyclic_job_id}", data,
+                period_ms=params['period_ms'], count=params['count'], duration_ms=params['duration_ms'],
+                phase_ms=params['phase_ms'] + i * params['phase_step_ms'], jitter_ms=params['jitter_ms'],
+            ))
+        if not jobs:
+            return
+        self.tx_writer.start_cyclic(jobs)
+        self.log_message_to_terminal(
+            f"{len(jobs)} sequence(s) every {params['period_ms']:.3f} ms", prefix="CYCLIC")
 
-        if not self.send_queue:
-            self.send_timer.stop()
+    def stop_cyclic_send(self):
+        if self.tx_writer:
+            self.tx_writer.stop_cyclic()
 
-    def write_to_serial(self, sequence_data):
-        self.send_queue.append({'type': 'sequence', 'data': sequence_data})
-        if not self.send_timer.isActive():
-            self.send_timer.start()
+    def _on_cyclic_finished(self, stats: dict):
+        self.log_message_to_terminal(format_cyclic_stats(stats), prefix="CYCLIC")
 
-    def write_line_to_serial(self, text_line):
-        self.send_queue.append({'type': 'line', 'data': text_line})
-        if not self.send_timer.isActive():
-            self.send_timer.start()
+    # ----------------------- Envoi de fichier -----------------------
 
-    def send_data(self, data_to_send: bytes, source_prefix="[TX]"):
+    def open_send_file_dialog(self):
         if not (self.serial_port and self.serial_port.is_open):
             QMessageBox.warning(self, "Not Connected", "Communication is not active.")
             return
+        if self.file_transfer:
+            QMessageBox.information(self, "Send File", "A file transfer is already running.")
+            return
+        dialog = FileSendDialog(self._file_send_params, self)
+        if dialog.exec():
+            self._file_send_params = dialog.get_params()
+            self.start_file_transfer(self._file_send_params)
 
-        while self.is_receiving_data:
-            QApplication.processEvents()
-            time.sleep(0.01)
-
-        try:
-            self.serial_port.write(data_to_send)
-
-            now = datetime.now()
-            timestamp = now.strftime("%H:%M:%S") + f".{now.microsecond // 1000:03d}"
-            prefix_ansi = "\033[1;35m[TX] ->\033[0m "  # magenta
-
-            if self.terminal_display_mode == "ASCII":
-                content = data_to_send.decode('latin-1', errors='replace').replace('\n', '\\n').replace('\r', '\\r')
-                line = f"{timestamp} {prefix_ansi}{content}\n"
-                self.terminal_page.append_ansi_text(line)
-            elif self.terminal_display_mode == "HEX":
-                content = data_to_send.hex(' ').upper()
-                line = f"{timestamp} [TX] -> {content}\n"
-                self.terminal_page.append_monospace_text(line)
-            else:
-                content = ' '.join(str(b) for b in data_to_send)
-                line = f"{timestamp} [TX] -> {content}\n"
-                self.terminal_page.append_monospace_text(line)
+    def start_file_transfer(self, params):
+        """Envoi d'un fichier dans un thread dédié (progression / annulation dans un QProgressDialog)."""
+        st = self.serial_settings
+        rate = line_rate(st.get('baudrate', 115200), st.get('bytesize', serial.EIGHTBITS),
+                         st.get('parity', serial.PARITY_NONE), st.get('stopbits', serial.STOPBITS_ONE))
+        self.file_transfer_rx = None
+        if params['protocol'] != PROTOCOL_RAW:
+            self.file_transfer_rx = RxSubscription()
+            self.serial_worker.subscribe(self.file_transfer_rx)
+
+        self.file_transfer_thread = QThread()
+        self.file_transfer = FileTransfer(
+            self.serial_port, params['path'], protocol=params['protocol'], chunk_size=params['chunk_size'],
+            delay_ms=params['delay_ms'], flow_control=params['flow_control'], line_rate_bps=rate,
+            rx=self.file_transfer_rx, write_lock=self.write_lock,
+        )
+        self.file_transfer.moveToThread(self.file_transfer_thread)
+        self.file_transfer_thread.started.connect(self.file_transfer.run)
+        self.file_transfer.progress.connect(self._on_file_transfer_progress)
+        self.file_transfer.finished.connect(self._on_file_transfer_finished)
+        self.file_transfer.finished.connect(self.file_transfer_thread.quit)
+        self.file_transfer.finished.connect(self.file_transfer.deleteLater)
+        self.file_transfer_thread.finished.connect(self.file_transfer_thread.deleteLater)
+
+        name = os.path.basename(params['path'])
+        self.file_transfer_dialog = QProgressDialog(f"Sending {name}...", "Cancel", 0, 1000, self)
+        self.file_transfer_dialog.setWindowTitle("Send File")
+        self.file_transfer_dialog.setAutoClose(False)
+        self.file_transfer_dialog.setAutoReset(False)
+        self.file_transfer_dialog.setMinimumDuration(0)
+        self.file_transfer_dialog.canceled.connect(self.cancel_file_transfer)
+        self.file_transfer_dialog.show()
+
+        self.log_message_to_terminal(f"Sending {params['path']} ({params['protocol']})", prefix="FILE")
+        self._update_background_tx()
+        self.file_transfer_thread.start()
+
+    def cancel_file_transfer(self):
+        if self.file_transfer:
+            self.file_transfer.cancel()
+
+    def _on_file_transfer_progress(self, info: dict):
+        dialog = self.file_transfer_dialog
+        if dialog is None:
+            return
+        dialog.setValue(int(1000 * info['sent'] / info['total']) if info['total'] else 0)
+        dialog.setLabelText(f"{os.path.basename(info['path'])}\n{format_transfer_progress(info)}")
 
-        except Exception as e:
-            now = datetime.now()
-            timestamp = now.strftime("%H:%M:%S") + f".{now.microsecond // 1000:03d}"
-            self.terminal_page.append_monospace_text(f"{timestamp} [SEND ERROR] -> {e}\n")
+    def _on_file_transfer_finished(self, info: dict):
+        if self.file_transfer_rx is not None:
+            try:
+                self.serial_worker.unsubscribe(self.file_transfer_rx)
+            except (AttributeError, RuntimeError):
+                pass
+        self.file_transfer_rx = None
+        self.file_transfer = None        # le thread se termine et se détruit de lui-même (deleteLater)
+        self._update_background_tx()
+        if self.file_transfer_dialog is not None:
+            self.file_transfer_dialog.close()
+            self.file_transfer_dialog.deleteLater()
+            self.file_transfer_dialog = None
+        self.log_message_to_terminal(format_transfer_summary(info), prefix="FILE" if info['ok'] else "FILE ERROR")
 
     # ----------------------- RX Terminal -----------------------
 
-    def _on_rx_stream_finished(self):
-        self.is_receiving_data = False
-
-    def update_terminal(self, data: bytes):
-        self.is_receiving_data = True
-        self.rx_timeout_timer.start()
-        self.serial_buffer += data
-        if not self.buffer_processing_timer.isActive():
-            self.buffer_processing_timer.start()
-
-    def process_buffered_data(self):
-        for _ in range(100):
-            if b'\n' not in self.serial_buffer:
-                break
-            line_bytes, self.serial_buffer = self.serial_buffer.split(b'\n', 1)
-            line_with_newline = line_bytes + b'\n'
-
-            if not line_bytes.strip():
-                self.terminal_page.append_monospace_text("\n")
+    def _schedule_rx_drain(self):
+        """Appelé (au plus une fois par cycle) quand l'anneau RX devient non vide."""
+        if self.rx_drain_timer.isActive():
+            return
+        elapsed_ms = (time.monotonic() - self._rx_last_drain) * 1000.0
+        self.rx_drain_timer.start(max(0, int(self.RX_DRAIN_INTERVAL_MS - elapsed_ms)))
+
+    def _drain_rx_ring(self):
+        """Vide l'anneau RX en une seule remise au traitement terminal."""
+        self._rx_last_drain = time.monotonic()
+        frames = self.rx_ring.drain_frames()
+        dropped = self.rx_ring.dropped_bytes
+        if dropped != self._rx_dropped_reported:
+            self.log_message_to_terminal(
+                f"RX overload: {dropped - self._rx_dropped_reported} bytes dropped "
+                f"(total {dropped}, high-water {self.rx_ring.high_water}/{self.rx_ring.capacity})",
+                prefix="RX OVERFLOW",
+            )
+            self._rx_dropped_reported = dropped
+        if frames:
+            self.update_terminal(frames)
+        # Données arrivées pendant le traitement : le worker n'a pas re-notifié
+        if len(self.rx_ring):
+            self._schedule_rx_drain()
+
+    def _close_rx_line(self):
+        """Termine une ligne RX restée ouverte (trame partielle) avant un autre message."""
+        if self._rx_line_open:
+            self.terminal_page.append_monospace_text("\n")
+            self._rx_line_open = False
+
+    def update_terminal(self, frames):
+        """
+        Affiche les trames découpées par le worker (framers.py) depuis le dernier vidage.
+        Une trame FRAME_PARTIAL laisse la ligne ouverte : la suite la complète.
+        Les lignes sont seulement mises en file côté terminal : l'affichage se
+        fait par lot, une fois par frame (TerminalWidget.flush_display).
+        """
+        timestamp = self._timestamp()
+        mode = self.terminal_display_mode
+        terminal = self.terminal_page
+        framer = self.rx_framer
+
+        for flags, payload in frames:
+            partial = flags & FRAME_PARTIAL
+            if not self._rx_line_open and not partial and not payload.strip():
+                terminal.append_monospace_text("\n")
                 continue
 
-            now = datetime.now()
-            timestamp = now.strftime("%H:%M:%S") + f".{now.microsecond // 1000:03d}"
-            prefix_ansi = "\033[1;32m[RX] ->\033[0m "
-
-            if self.terminal_display_mode == "ASCII":
-                text = line_bytes.decode('utf-8', errors='replace')
-                self.terminal_page.append_ansi_text(f"{timestamp} {prefix_ansi}{text}\n")
-            elif self.terminal_display_mode == "HEX":
-                content = line_bytes.hex(' ').upper()
-                self.terminal_page.append_monospace_text(f"{timestamp} [RX] -> {content}\n")
+            end = "" if partial else "\n"
+            label = "[RX ERR]" if flags & FRAME_ERROR else "[RX]"
+            if mode == "ASCII":
+                text = framer.decode(payload, final=not partial)
+                color = "31" if flags & FRAME_ERROR else "32"
+                header = "" if self._rx_line_open else f"{timestamp} \033[1;{color}m{label} ->\033[0m "
+                terminal.append_rx_text(header, text + end)
             else:
-                content = ' '.join(str(b) for b in line_bytes)
-                self.terminal_page.append_monospace_text(f"{timestamp} [RX] -> {content}\n")
+                if mode == "HEX":
+                    content = payload.hex(' ').upper()
+                else:
+                    content = ' '.join(str(b) for b in payload)
+                header = " " if self._rx_line_open else f"{timestamp} {label} -> "
+                terminal.append_monospace_text(f"{header}{content}{end}")
+            self._rx_line_open = bool(partial)
 
-            # Auto-response manager (si défini côté TerminalWidget)
-            resp = self.terminal_page.receive_manager.check_and_get_response(line_with_newline)
-            if resp:
-                self.write_auto_response(resp)
+    # ----------------------- Réponses automatiques -----------------------
 
-        if b'\n' in self.serial_buffer:
-            self.buffer_processing_timer.start()
+    def _refresh_auto_responses(self):
+        """Recompile les règles pour le thread RX (appelé à chaque modification des triggers)."""
+        if not self.auto_responder:
+            return
+        table = AutoResponseTable(self.terminal_page.receive_manager.get_rules())
+        self.auto_responder.set_table(table)
+        for index, error in table.errors:
+            self.log_message_to_terminal(f"Trigger '{table.labels[index]}' ignored: {error}", prefix="AUTO-TX ERROR")
+
+    def _on_auto_responded(self, label: str, data: bytes, latency_us: float, error: str):
+        """Écho d'une réponse automatique déjà envoyée par le thread RX."""
+        if error:
+            self.log_message_to_terminal(f"{label}: {error}", prefix="AUTO-TX ERROR")
+        else:
+            self._on_tx_sent(data, "[AUTO-TX]")
+
+    def _remap_auto_response_stats(self, op):
+        """Les statistiques suivent leurs règles quand la liste est réordonnée ou réduite."""
+        stats = remap_stats(self.auto_response_stats, op)
+        if stats is not self.auto_response_stats:
+            self.auto_response_stats = stats
+            if self.auto_responder:
+                self.auto_responder.stats = stats
+
+    def show_auto_response_stats(self):
+        """Histogramme des latences trigger -> réponse écrite, par règle."""
+        if not self.auto_response_stats:
+            QMessageBox.information(self, "Auto-response latency", "No auto-response sent yet.")
+            return
+        rules = self.terminal_page.receive_manager.get_rules()
+        lines = []
+        for index, hist in sorted(self.auto_response_stats.items()):
+            label = rule_label(index, rules[index]) if index < len(rules) else f"#{index + 1}"
+            lines.append(f"{label}\n    {hist.summary()}")
+            for low, high, count in hist.rows():
+                lines.append(f"    [{low} - {high}[ µs : {count}")
+        QMessageBox.information(self, "Auto-response latency", "\n".join(lines))
 
     def write_raw_data_to_serial(self, data: bytes):
         self.send_data(data, source_prefix="[SCRIPT-TX]")
 
-    def write_auto_response(self, sequence_data):
-        mode = sequence_data.get("mode", "ASCII")
-        text = sequence_data.get("sequence", "")
-        try:
-            if mode == "ASCII":
-                data = codecs.decode(text, 'unicode_escape').encode('latin-1')
-            elif mode == "HEX":
-                data = bytes([int(p, 16) for p in text.replace("0x", "").split() if p])
-            else:
-                data = bytes([int(p, 10) for p in text.split() if p])
-            self.send_data(data, source_prefix="[AUTO-TX]")
-        except ValueError as e:
-            self.log_message_to_terminal(f"Invalid format for {mode}.\n{e}", prefix="[AUTO-TX ERROR]")
-
     # ----------------------- Scripting -----------------------
 
     def open_scripting_dialog(self):
@@ -423,13 +741,20 @@ class SerialApp(QMainWindow):
             self.scripting_dialog.on_script_finished()
             return
 
+        # Copie du flux RX pour api.read()/expect() (abonnement retiré à la fin du script)
+        self.script_rx = RxSubscription()
+        self.serial_worker.subscribe(self.script_rx)
+
         self.script_thread = QThread()
-        api = ScriptAPI()
+        api = ScriptAPI(self.serial_port, self.script_rx, self.write_lock, self.backend.prompt_regex,
+                        suspended=self.port_suspended)
         self.script_runner = ScriptRunner(script_code, api)
         self.script_runner.moveToThread(self.script_thread)
         api.log_requested.connect(lambda msg: self.log_message_to_terminal(msg, prefix="[SCRIPT]"))
         api.send_data_requested.connect(self.write_raw_data_to_serial)
+        api.tx_logged.connect(self._on_tx_sent)
         self.script_runner.output_logged.connect(self.scripting_dialog.append_to_output)
+        self.script_runner.finished.connect(self._on_script_finished)
         self.script_runner.finished.connect(self.scripting_dialog.on_script_finished)
         self.script_runner.finished.connect(self.script_thread.quit)
         self.script_runner.finished.connect(self.script_runner.deleteLater)
@@ -437,11 +762,19 @@ class SerialApp(QMainWindow):
         self.script_thread.started.connect(self.script_runner.run)
         self.script_thread.start()
 
+    def _on_script_finished(self):
+        if self.script_rx is not None:
+            if self.serial_worker:
+                self.serial_worker.unsubscribe(self.script_rx)
+            self.script_rx = None
+
     def stop_script(self):
         if self.scripting_dialog:
             self.scripting_dialog.on_script_stopped_manually()
         if hasattr(self, 'script_runner') and self.script_runner:
             self.script_runner.stop()
+        if self.script_rx is not None:
+            self.script_rx.close()   # réveille un read()/expect() en attente
 
     # ----------------------- Start/Stop COM -----------------------
 
@@ -470,12 +803,30 @@ class SerialApp(QMainWindow):
         except Exception:
             pass
 
+    def _serial_open_kwargs(self) -> dict:
+        """Ne garde que les réglages compris par serial.Serial (les autres sont des options de l'app)."""
+        return {k: v for k, v in self.serial_settings.items() if k in SERIAL_PORT_KEYS}
+
+    def _on_rx_strategy_selected(self, strategy: str):
+        self.rx_strategy_active = strategy
+        self.log_message_to_terminal(f"RX strategy: {strategy}", prefix="---")
+        self.update_status_bar(is_connected=True)
+
     def start_communication(self):
         if not self.serial_settings:
             QMessageBox.warning(self, "Config Required", "Please configure the port.")
             return
         try:
-            self.serial_port = serial.Serial(**self.serial_settings, timeout=1)
+            rx_framer = create_framer(
+                self.serial_settings.get('rx_framer', FRAMER_LF),
+                self.serial_settings.get('rx_framer_param', 50),
+                self.serial_settings.get('baudrate', 115200),
+            )
+        except ValueError as e:
+            QMessageBox.critical(self, "Invalid Framing", f"RX framing settings are invalid: {e}")
+            return
+        try:
+            self.serial_port = serial.Serial(**self._serial_open_kwargs(), timeout=1)
             # Important : vider le buffer driver pour éviter une première ligne corrompue
             self.serial_port.reset_input_buffer()
         except serial.SerialException as e:
@@ -483,18 +834,55 @@ class SerialApp(QMainWindow):
             return
 
         # Thread RX
-        self.serial_buffer = b''
+        self.rx_ring.clear()
+        self.rx_framer = rx_framer
+        self._rx_line_open = False
+        self.write_lock = threading.Lock()   # réponses automatiques (thread RX), TxWriter, envoi de fichier
+        self.auto_responder = AutoResponder(self.serial_port, self.write_lock)
+        self.auto_responder.stats = self.auto_response_stats
+        self._refresh_auto_responses()
         self.serial_worker_thread = QThread()
-        self.serial_worker = SerialWorker(self.serial_port)
+        self.serial_worker = SerialWorker(
+            self.serial_port,
+            strategy=self.serial_settings.get('rx_strategy', RX_STRATEGY_AUTO),
+            ring=self.rx_ring,
+            framer=self.rx_framer,
+        )
+        self.serial_worker.set_responder(self.auto_responder)
         self.serial_worker.moveToThread(self.serial_worker_thread)
         self.serial_worker_thread.started.connect(self.serial_worker.run)
-        self.serial_worker.data_received.connect(self.update_terminal)
+        self.serial_worker.data_ready.connect(self._schedule_rx_drain)
+        self.serial_worker.strategy_selected.connect(self._on_rx_strategy_selected)
         self.serial_worker.error_occurred.connect(self.handle_error)
+        self.serial_worker.auto_responded.connect(self._on_auto_responded)
         self.serial_worker.finished.connect(self.serial_worker_thread.quit)
         self.serial_worker.finished.connect(self.serial_worker.deleteLater)
         self.serial_worker_thread.finished.connect(self.serial_worker_thread.deleteLater)
         self.serial_worker_thread.start()
 
+        # Thread TX
+        self._switch_interval = sys.getswitchinterval()
+        self.tx_writer_thread = QThread()
+        self.tx_writer = TxWriter(
+            self.serial_port,
+            pacing=self.serial_settings.get('tx_pacing', TX_PACING_RX_IDLE),
+            gap_ms=self.serial_settings.get('tx_delay_ms', 100),
+            rx_idle_ms=self.serial_settings.get('tx_delay_ms', 100),
+            last_rx_time=lambda w=self.serial_worker: w.last_rx_time,
+            write_lock=self.write_lock,
+        )
+        self.tx_writer.moveToThread(self.tx_writer_thread)
+        self.tx_writer_thread.started.connect(self.tx_writer.run)
+        self.tx_writer.sent.connect(self._on_tx_sent)
+        self.tx_writer.send_failed.connect(self._on_tx_failed)
+        self.tx_writer.cyclic_stats.connect(self.terminal_page.set_cyclic_status)
+        self.tx_writer.cyclic_finished.connect(self._on_cyclic_finished)
+        self.tx_writer.finished.connect(self.tx_writer_thread.quit)
+        self.tx_writer.finished.connect(self.tx_writer.deleteLater)
+        self.tx_writer_thread.finished.connect(self.tx_writer_thread.deleteLater)
+        self.tx_writer_thread.start()
+        self._update_background_tx()
+
         # S'assurer que le worker n'est pas en pause
         if hasattr(self.serial_worker, "pause"):
             try:
@@ -506,12 +894,16 @@ class SerialApp(QMainWindow):
         self.start_action.setEnabled(False)
         self.settings_action.setEnabled(False)
         self.stop_action.setEnabled(True)
+        self.send_file_action.setEnabled(True)
         self.log_message_to_terminal(f"Connection open on {self.serial_settings['port']}", prefix="---")
         self.update_status_bar(is_connected=True)
 
         # Branche le backend partagé du Calibrator sur CE port (une seule ouverture physique)
         self._attach_backend_to_terminal_port()
 
+        # Nouvelle connexion : les valeurs lues précédemment ne sont plus fiables
+        self.calibrator_page.reset_device_snapshots()
+
         # Mettre à jour le bandeau d'état du Calibrator
         try:
             self.calibrator_page._update_status_label()
@@ -519,6 +911,30 @@ class SerialApp(QMainWindow):
             pass
 
     def stop_communication(self):
+        try:
+            if self.file_transfer:
+                self.file_transfer.cancel()
+            if self.file_transfer_thread and self.file_transfer_thread.isRunning():
+                self.file_transfer_thread.wait(1000)
+        except RuntimeError:
+            pass
+        try:
+            if self.tx_writer:
+                self.tx_writer.clear()
+                self.tx_writer.stop()
+            if self.tx_writer_thread and self.tx_writer_thread.isRunning():
+                self.tx_writer_thread.quit()
+                self.tx_writer_thread.wait(500)
+        except RuntimeError:
+            pass
+        self.tx_writer = None
+        self.tx_writer_thread = None
+        if self._switch_interval is not None:
+            # Remis ici même si le thread TX n'a pas fini à temps de le restaurer lui-même
+            sys.setswitchinterval(self._switch_interval)
+            self._switch_interval = None
+        self.auto_responder = None
+        self.terminal_page.set_cyclic_status([])
         try:
             if self.serial_worker:
                 self.serial_worker.stop()
@@ -535,6 +951,8 @@ class SerialApp(QMainWindow):
             self.start_action.setEnabled(True)
             self.settings_action.setEnabled(True)
             self.stop_action.setEnabled(False)
+            self.send_file_action.setEnabled(False)
+            self.rx_strategy_active = None
             if self.serial_settings:
                 self.update_status_bar(is_connected=False)
 
@@ -567,6 +985,8 @@ class SerialApp(QMainWindow):
             s = dialog.get_settings()
             if s:
                 self.serial_settings = s
+                self.terminal_page.set_scrollback_lines(s.get('scrollback_lines', DEFAULT_SCROLLBACK_LINES))
+                self.terminal_page.set_save_journal(s.get('save_journal', False))
                 self.update_status_bar()
 
     def update_status_bar(self, is_connected=False):
@@ -595,6 +1015,8 @@ class SerialApp(QMainWindow):
         text = f"{port}  |  {baud} bps  |  {bytesize}{parity}{stopbits}"
 
         if is_connected:
+            if self.rx_strategy_active:
+                text += f"  |  RX: {self.rx_strategy_active}"
             self.status_bar_label.setText(f"Connected: {text}")
             self.status_bar_label.setStyleSheet(
                 "padding: 2px 5px; color:#003300; background-color:#d4edda; "
@@ -615,6 +1037,7 @@ class SerialApp(QMainWindow):
         except Exception:
             pass
         self.stop_communication()
+        self.terminal_page.flush_saves()
         try:
             if self.script_thread and self.script_thread.isRunning():
                 self.script_thread.wait(250)
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# Fichier : param_cache.py
+"""
+Cache des valeurs lues sur le device, clé (chemin module, clé).
+
+Politique par paramètre (champ "cache" de mcu_database.json) :
+- "static"   : constante du firmware (taille d'un log, port matériel) ;
+               gardée jusqu'à la reconnexion.
+- "session"  : fixée pour la session du device (cause du dernier reset) ;
+               perdue aussi quand une commande d'action ("set" sans valeur,
+               séquence libre) a pu changer l'état du device.
+- "volatile" : jamais mise en cache (défaut).
+- un nombre  : durée de vie en secondes.
+
+Un "set" invalide la clé écrite ; une reconnexion vide tout le cache.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+CACHE_STATIC = "static"
+CACHE_SESSION = "session"
+CACHE_VOLATILE = "volatile"
+CACHE_POLICIES = (CACHE_STATIC, CACHE_SESSION, CACHE_VOLATILE)
+
+
+def policy_ttl(policy: Any) -> float:
+    """Durée de vie (s) d'une politique : inf pour static/session, 0 pour volatile."""
+    if policy in (CACHE_STATIC, CACHE_SESSION):
+        return math.inf
+    if isinstance(policy, (int, float)) and not isinstance(policy, bool):
+        return max(0.0, float(policy))
+    return 0.0
+
+
+class ParamCache:
+    """
+    Valeurs lues par (chemin, clé) avec expiration. Appelé par SerialBackend
+    sous son verrou, mais protégé par le sien (stats lues depuis le GUI).
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._policies: Dict[Tuple[str, str], Any] = {}
+        self._entries: Dict[Tuple[str, str], Tuple[str, float]] = {}   # -> (valeur, expiration monotonic)
+        self.hits = 0
+        self.misses = 0
+
+    # ---------- Politiques ----------
+    def set_policies(self, policies: Dict[Tuple[str, str], Any]) -> None:
+        """Remplace toutes les politiques ; les valeurs devenues non cachables sont oubliées."""
+        with self._lock:
+            self._policies = {k: p for k, p in policies.items() if policy_ttl(p) > 0}
+            for k in [k for k in self._entries if k not in self._policies]:
+                del self._entries[k]
+
+    def policy(self, path: str, key: str) -> Any:
+        return self._policies.get((path, key), CACHE_VOLATILE)
+
+    def is_cacheable(self, path: str, key: str) -> bool:
+        return (path, key) in self._policies
+
+    # ---------- Valeurs ----------
+    def lookup(self, path: str, key: str) -> Optional[str]:
+        """Valeur encore valide, ou None. Compte hits/misses pour les paramètres cachables."""
+        k = (path, key)
+        with self._lock:
+            if k not in self._policies:
+                return None
+            entry = self._entries.get(k)
+            if entry is not None and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            self._entries.pop(k, None)
+            self.misses += 1
+            return None
+
+    def store(self, path: str, key: str, value: str) -> None:
+        k = (path, key)
+        with self._lock:
+            policy = self._policies.get(k)
+            if policy is not None:
+                self._entries[k] = (value, time.monotonic() + policy_ttl(policy))
+
+    def invalidate(self, path: str, key: str) -> None:
+        with self._lock:
+            self._entries.pop((path, key), None)
+
+    def drop_session(self) -> None:
+        """Oublie tout sauf les valeurs "static" (l'état du device a pu changer)."""
+        with self._lock:
+            for k in [k for k in self._entries if self._policies.get(k) != CACHE_STATIC]:
+                del self._entries[k]
+
+    def clear(self) -> None:
+        """Oublie toutes les valeurs (reconnexion : ce n'est peut-être plus le même device)."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            self.hits = self.misses = 0
@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+# Fichier : param_snapshot.py
+"""
+Instantanés de paramètres d'une carte (Get All) et profils cibles (Set All).
+
+Fichier JSON :
+    {
+      "format": "jdidd-param-snapshot", "version": 1,
+      "card": "menzu_ijen_samd21j18a",
+      "created": "2025-01-31T10:12:00",
+      "values": {"SYS": {"SN": "1234"}, ...},      # module -> clé -> valeur
+      "times":  {"SYS": {"SN": 1738314720.5}, ...} # module -> clé -> time.time() de la lecture
+    }
+
+Un profil est le même fichier, éventuellement écrit à la main : "times",
+"created" et même l'enveloppe sont facultatifs ({module: {clé: valeur}}).
+
+Les valeurs sont normalisées comme celles qu'écrit un "set" (clé de choix,
+texte nettoyé) : un instantané et un profil se comparent directement.
+"""
+
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, Optional, Tuple
+
+from board_schema import ParamDef
+from persistence import write_json_atomic
+
+SNAPSHOT_FORMAT = "jdidd-param-snapshot"
+SNAPSHOT_VERSION = 1
+
+
+def normalize_value(pdef: ParamDef, reply: str) -> str:
+    """Valeur lue -> valeur telle qu'un "set" l'écrirait (clé de choix reconnue, sinon texte)."""
+    text = (reply or "").strip()
+    if pdef.ptype == "choice" and pdef.choices:
+        idx_key = text.split()[-1] if text else ""
+        if idx_key in pdef.choices:
+            return idx_key
+    return text
+
+
+def is_error_reply(reply: str) -> bool:
+    """Réponse du backend ou du shell qui ne porte pas de valeur (erreur, hors-ligne, annulé)."""
+    return (reply or "").lstrip().startswith(("ERR", "[ERREUR]", "[OFFLINE]", "[ANNULÉ]"))
+
+
+@dataclass
+class ParamSnapshot:
+    card: str = ""
+    values: Dict[str, Dict[str, str]] = field(default_factory=dict)     # module -> clé -> valeur
+    times: Dict[str, Dict[str, float]] = field(default_factory=dict)    # module -> clé -> horodatage
+    created: float = field(default_factory=time.time)
+    source: str = ""                                                    # fichier chargé, le cas échéant
+
+    def get(self, module: str, key: str) -> Optional[str]:
+        return self.values.get(module, {}).get(key)
+
+    def set(self, module: str, key: str, value: str, when: Optional[float] = None) -> None:
+        self.values.setdefault(module, {})[key] = value
+        self.times.setdefault(module, {})[key] = time.time() if when is None else when
+
+    def discard(self, module: str, key: str) -> None:
+        self.values.get(module, {}).pop(key, None)
+        self.times.get(module, {}).pop(key, None)
+
+    def items(self) -> Iterator[Tuple[str, str, str]]:
+        for module, params in self.values.items():
+            for key, value in params.items():
+                yield module, key, value
+
+    def __len__(self) -> int:
+        return sum(len(p) for p in self.values.values())
+
+    def to_dict(self) -> dict:
+        return {
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "card": self.card,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.created)),
+            "values": self.values,
+            "times": self.times,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, source: str = "") -> "ParamSnapshot":
+        """Instantané ou profil (enveloppe facultative). Lève ValueError si la forme est invalide."""
+        if not isinstance(data, dict):
+            raise ValueError("objet JSON attendu")
+        if "values" in data:
+            if data.get("format", SNAPSHOT_FORMAT) != SNAPSHOT_FORMAT:
+                raise ValueError(f"format inconnu '{data.get('format')}'")
+            values, times, card = data["values"], data.get("times", {}), data.get("card", "")
+        else:
+            values, times, card = data, {}, ""
+        if not isinstance(values, dict) or not all(isinstance(p, dict) for p in values.values()):
+            raise ValueError("'values' doit être {module: {clé: valeur}}")
+        snap = cls(card=str(card or ""), source=source)
+        for module, params in values.items():
+            for key, value in params.items():
+                when = times.get(module, {}).get(key) if isinstance(times.get(module), dict) else None
+                snap.set(module, key, "" if value is None else str(value), when if when is not None else 0.0)
+        if "created" in data:
+            try:
+                snap.created = time.mktime(time.strptime(data["created"], "%Y-%m-%dT%H:%M:%S"))
+            except (TypeError, ValueError):
+                pass
+        return snap
+
+
+def save_snapshot(path: str, snapshot: ParamSnapshot) -> None:
+    """Écriture atomique. Lève OSError."""
+    write_json_atomic(path, snapshot.to_dict())
+
+
+def load_snapshot(path: str) -> ParamSnapshot:
+    """Lève OSError, ou ValueError si le fichier n'est pas un instantané / profil."""
+    with open(path, "r", encoding="utf-8") as f:
+        return ParamSnapshot.from_dict(json.load(f), source=path)
+
+
+@dataclass(frozen=True)
+class ParamDiff:
+    module: str
+    key: str
+    old: Optional[str]      # None = absent de l'ancien
+    new: Optional[str]      # None = absent du nouveau
+
+
+def diff_snapshots(old: ParamSnapshot, new: ParamSnapshot, only_common: bool = False) -> list[ParamDiff]:
+    """
+    Différences old -> new, dans l'ordre de old puis des clés propres à new.
+    only_common : ignore les paramètres absents d'un côté (profil partiel).
+    """
+    diffs = []
+    for module, key, value in old.items():
+        other = new.get(module, key)
+        if other is None:
+            if not only_common:
+                diffs.append(ParamDiff(module, key, value, None))
+        elif other != value:
+            diffs.append(ParamDiff(module, key, value, other))
+    if not only_common:
+        for module, key, value in new.items():
+            if old.get(module, key) is None:
+                diffs.append(ParamDiff(module, key, None, value))
+    return diffs
+
+
+def format_diff(diff: ParamDiff) -> str:
+    old = "(absent)" if diff.old is None else repr(diff.old)
+    new = "(absent)" if diff.new is None else repr(diff.new)
+    return f"{diff.module}.{diff.key}: {old} -> {new}"
@@ -0,0 +1,240 @@
+# Fichier : persistence.py
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+DEFAULT_SAVE_DELAY_S = 0.5      # regroupe les modifications rapprochées
+JOURNAL_SUFFIX = ".journal"
+
+
+def write_atomic(path: str, write, suffix: str = ".tmp", newline=None) -> None:
+    """
+    Appelle write(f) sur un fichier texte temporaire du même dossier puis le
+    renomme sur path (os.replace est atomique) : un arrêt pendant l'écriture
+    laisse l'ancien fichier intact. Lève OSError.
+    """
+    folder = os.path.dirname(path) or "."
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".tmp-", suffix=suffix)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline=newline) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_json_atomic(path: str, data) -> None:
+    """data en JSON dans path, écriture atomique (voir write_atomic). Lève OSError."""
+    write_atomic(path, lambda f: json.dump(data, f, indent=4, ensure_ascii=False), suffix=".json")
+
+
+def file_digest(path: str):
+    """Empreinte du contenu de path (None s'il est illisible) : identifie l'instantané d'un journal."""
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+
+def read_journal(path: str) -> list:
+    """
+    Opérations du journal de path (une ligne JSON par opération ; ligne
+    tronquée ignorée). La première ligne {"base": empreinte} désigne
+    l'instantané auquel le journal s'applique : si path a changé depuis
+    (arrêt entre l'écriture de l'instantané et l'effacement du journal), les
+    opérations y sont déjà et le journal est ignoré.
+    """
+    ops = []
+    try:
+        with open(path + JOURNAL_SUFFIX, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    op = json.loads(line)
+                except json.JSONDecodeError:
+                    break           # écriture interrompue : la suite n'est pas fiable
+                if isinstance(op, dict):
+                    if op.get("base") != file_digest(path):
+                        return []
+                    continue
+                ops.append(op)
+    except OSError:
+        pass
+    return ops
+
+
+def replay_journal(entries: list, ops: list) -> list:
+    """Rejoue sur entries les opérations ["add", e] ["edit", i, e] ["delete", i] ["move", src, dst] ["set", i, clé, valeur]."""
+    for op in ops:
+        try:
+            kind = op[0]
+            if kind == "add":
+                entries.append(op[1])
+            elif kind == "edit" and 0 <= op[1] < len(entries):
+                entries[op[1]] = op[2]
+            elif kind == "delete" and 0 <= op[1] < len(entries):
+                del entries[op[1]]
+            elif kind == "move" and 0 <= op[1] < len(entries):
+                entries.insert(op[2], entries.pop(op[1]))
+            elif kind == "set" and 0 <= op[1] < len(entries):
+                entries[op[1]][op[2]] = op[3]
+        except (IndexError, TypeError, KeyError):
+            continue
+    return entries
+
+
+def remove_journal(path: str) -> None:
+    try:
+        os.remove(path + JOURNAL_SUFFIX)
+    except OSError:
+        pass
+
+
+class JsonStore:
+    """
+    Sauvegarde différée des fichiers de séquences / triggers.
+
+    schedule(path, entries) prend un instantané côté GUI (copie de la liste
+    seulement : les managers remplacent une entrée modifiée au lieu de la
+    muter). Un thread d'arrière-plan écrit le dernier instantané de chaque
+    fichier delay_s après la dernière modification (écriture atomique) : des
+    modifications rapprochées ne produisent qu'une écriture.
+
+    Avec journal=True, chaque opération (log) est ajoutée aussitôt au fichier
+    <path>.journal ; il est vidé quand l'instantané correspondant est écrit.
+    Au chargement, le manager rejoue le journal restant (arrêt brutal pendant
+    le délai de regroupement). Le journal commence par l'empreinte de
+    l'instantané qu'il complète (voir read_journal) : le rejeu est sans effet
+    si cet instantané a déjà été remplacé.
+
+    Les erreurs d'écriture sont gardées dans last_error et passées à
+    on_error(message), appelé depuis le thread d'écriture (le GUI doit le
+    relayer par un signal : pas de boîte modale depuis un thread).
+    """
+
+    def __init__(self, delay_s: float = DEFAULT_SAVE_DELAY_S, journal: bool = False, on_error=None):
+        self.delay_s = delay_s
+        self.journal = journal
+        self.on_error = on_error
+        self.last_error = None
+        self.writes = 0                   # nombre d'écritures de fichier effectuées
+        self._cond = threading.Condition()
+        self._pending = {}                # path -> (échéance, instantané)
+        self._ops = {}                    # path -> [opérations à journaliser]
+        self._busy = False
+        self._thread = None
+
+    # ---------- Côté GUI ----------
+    def log(self, path: str, op: list) -> None:
+        if not self.journal:
+            return
+        with self._cond:
+            self._ops.setdefault(path, []).append(op)
+            self._ensure_thread()
+            self._cond.notify()
+
+    def schedule(self, path: str, entries: list) -> None:
+        snapshot = list(entries)
+        with self._cond:
+            self._pending[path] = (time.monotonic() + self.delay_s, snapshot)
+            self._ensure_thread()
+            self._cond.notify()
+
+    def save_now(self, path: str, entries: list) -> bool:
+        """Sauvegarde explicite, synchrone : remplace l'écriture en attente pour path."""
+        with self._cond:
+            self._pending.pop(path, None)
+            self._ops.pop(path, None)
+            while self._busy:             # une écriture de path peut être en cours
+                self._cond.wait()
+            try:
+                write_json_atomic(path, entries)
+            except OSError as e:
+                self.last_error = f"{path}: {e}"
+                return False
+            remove_journal(path)
+            self.writes += 1
+            return True
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Écrit tout de suite ce qui est en attente et attend la fin (fermeture de l'application)."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            for path, (_, snapshot) in self._pending.items():
+                self._pending[path] = (0.0, snapshot)
+            self._cond.notify()
+            while self._pending or self._ops or self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    # ---------- Thread d'écriture ----------
+    def _ensure_thread(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="JsonStore", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while True:
+                    if self._ops:
+                        ops, self._ops = self._ops, {}
+                        due = []
+                        break
+                    now = time.monotonic()
+                    due = [p for p, (t, _) in self._pending.items() if t <= now]
+                    if due:
+                        due = [(p, self._pending.pop(p)[1]) for p in due]
+                        ops = {}
+                        break
+                    if self._pending:
+                        self._cond.wait(min(t for t, _ in self._pending.values()) - now)
+                    else:
+                        self._cond.notify_all()
+                        self._cond.wait()
+                self._busy = True
+            try:
+                for path, path_ops in ops.items():
+                    self._append_journal(path, path_ops)
+                for path, snapshot in due:
+                    # L'instantané contient toutes les opérations journalisées jusqu'ici
+                    write_json_atomic(path, snapshot)
+                    remove_journal(path)
+                    self.writes += 1
+            except OSError as e:
+                self.last_error = f"{e.filename or ''}: {e}"
+                if self.on_error:
+                    self.on_error(self.last_error)
+            finally:
+                with self._cond:
+                    self._busy = False
+                    self._cond.notify_all()
+
+    @staticmethod
+    def _append_journal(path: str, ops: list) -> None:
+        new = not os.path.exists(path + JOURNAL_SUFFIX)
+        with open(path + JOURNAL_SUFFIX, 'a', encoding='utf-8') as f:
+            if new:
+                f.write(json.dumps({"base": file_digest(path)}) + "\n")
+            for op in ops:
+                f.write(json.dumps(op, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
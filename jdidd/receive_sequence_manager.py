@@ -1,38 +1,58 @@
-import os, json
+import json
+from trigger_matcher import TriggerMatcher
+from sequence_codec import encode_sequence, check_entries
+from persistence import JsonStore, read_journal, replay_journal
 class ReceiveSequenceManager:
-    def __init__(self): self.rules = []; self.current_file_path = None
+    """Règles trigger -> réponse. Le jeu est compilé (TriggerMatcher) à la première recherche après chaque modification ; les réponses sont précompilées en octets ; sauvegarde différée (JsonStore). listeners() : toute modification ; observers(op) : opération détaillée pour les vues."""
+    def __init__(self): self._rules = []; self._matcher = None; self.current_file_path = None; self.listeners = []; self.observers = []; self.errors = []; self.store = JsonStore(); self.recovered = 0
+    @property
+    def rules(self): return self._rules
+    @rules.setter
+    def rules(self, value): self._rules = value; self.invalidate(); self._notify(["reset"])
+    def invalidate(self):
+        self._matcher = None; self.errors = check_entries(self._rules, 'response', 'response_mode')
+        for listener in self.listeners: listener()
     def load_from_file(self, path):
         try:
             with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f); self.rules = data if isinstance(data, list) else []
-                self.current_file_path = path; return True
+                data = json.load(f); ops = read_journal(path); self.recovered = len(ops)
+                self.rules = replay_journal(data if isinstance(data, list) else [], ops)
+                self.current_file_path = path
+                if ops: self.store.schedule(path, self.rules)
+                return True
         except (json.JSONDecodeError, IOError, FileNotFoundError): self.rules = []; self.current_file_path = None; return False
     def save_to_file(self, path):
-        try:
-            os.makedirs(os.path.dirname(path), exist_ok=True)
-            with open(path, 'w', encoding='utf-8') as f: json.dump(self.rules, f, indent=4, ensure_ascii=False)
-            self.current_file_path = path; return True
-        except IOError: return False
+        if not self.store.save_now(path, self.rules): return False
+        self.current_file_path = path; return True
     def save_current_file(self):
         if self.current_file_path: return self.save_to_file(self.current_file_path)
         return False
+    def _notify(self, op):
+        for observer in self.observers: observer(op)
+    def _changed(self, *op):
+        """Signale l'opération, la journalise et programme la sauvegarde différée du fichier courant."""
+        self._notify(list(op))
+        if self.current_file_path: self.store.log(self.current_file_path, list(op)); self.store.schedule(self.current_file_path, self.rules)
     def new_set(self): self.rules = []; self.current_file_path = None
     def get_rules(self): return self.rules
-    def add_rule(self, rule): self.rules.append(rule); self.save_current_file()
+    def add_rule(self, rule): self.payload(rule); self.rules.append(rule); self.invalidate(); self._changed("add", rule)
     def edit_rule(self, index, rule):
-        if 0 <= index < len(self.rules): self.rules[index] = rule; self.save_current_file()
+        if 0 <= index < len(self.rules): self.payload(rule); self.rules[index] = rule; self.invalidate(); self._changed("edit", index, rule)
     def delete_rule(self, index):
-        if 0 <= index < len(self.rules): del self.rules[index]; self.save_current_file()
+        if 0 <= index < len(self.rules): del self.rules[index]; self.invalidate(); self._changed("delete", index)
+    def set_enabled(self, index, enabled):
+        if 0 <= index < len(self.rules): self.rules[index] = {**self.rules[index], 'enabled': bool(enabled)}; self.invalidate(); self._changed("set", index, 'enabled', bool(enabled))
+    def move_rule(self, source, dest):
+        if 0 <= source < len(self.rules): self.rules.insert(dest, self.rules.pop(source)); self.invalidate(); self._changed("move", source, dest)
+    @staticmethod
+    def payload(rule):
+        """Octets précompilés de la réponse d'une règle (lève ValueError si invalide)."""
+        return encode_sequence(rule.get('response', ''), rule.get('response_mode', 'ASCII'))
+    def matcher(self):
+        if self._matcher is None: self._matcher = TriggerMatcher(self.rules)
+        return self._matcher
     def check_and_get_response(self, data: bytes):
-        for rule in self.rules:
-            if not rule.get('enabled', True): continue
-            trigger = rule.get('trigger', ''); mode = rule.get('mode', 'ASCII')
-            if self._match(data, trigger, mode): return {'sequence': rule.get('response', ''), 'mode': rule.get('response_mode', 'ASCII')}
-        return None
-    def _match(self, received_data: bytes, trigger: str, mode: str) -> bool:
-        if not trigger: return False
-        try:
-            if mode == 'ASCII': return trigger == received_data.decode('utf-8', errors='replace').strip()
-            elif mode == 'HEX': hex_str = trigger.replace('0x', '').replace('0X', '').replace(',', ' '); return bytes([int(b, 16) for b in hex_str.split() if b]) in received_data
-        except ValueError: return False
-        return False
\ No newline at end of file
+        index = self.matcher().match(data)
+        if index < 0: return None
+        rule = self.rules[index]
+        return {'sequence': rule.get('response', ''), 'mode': rule.get('response_mode', 'ASCII')}
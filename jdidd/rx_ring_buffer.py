@@ -0,0 +1,127 @@
+# Fichier : rx_ring_buffer.py
+
+import struct
+import threading
+
+# En-tête d'un enregistrement "trame" : longueur (uint32) + drapeaux (uint8)
+FRAME_HEADER = struct.Struct("<IB")
+
+
+class RxRingBuffer:
+    """
+    Tampon circulaire préalloué entre le thread RX (producteur) et le thread GUI (consommateur).
+
+    - Mémoire bornée : la capacité est allouée une fois pour toutes.
+    - En cas de saturation, les octets qui ne tiennent pas sont jetés et comptabilisés
+      (dropped_bytes / overflow_events) au lieu de faire grossir la file Qt.
+    - write() indique si le tampon était vide : le producteur ne notifie le GUI
+      qu'une fois par cycle de vidage.
+    """
+
+    def __init__(self, capacity: int = 1 << 20):
+        if capacity <= 0:
+            raise ValueError("capacity doit être > 0")
+        self.capacity = capacity
+        self._buf = bytearray(capacity)
+        self._lock = threading.Lock()
+        self._head = 0          # position de lecture
+        self._size = 0          # octets en attente
+        # Compteurs
+        self.high_water = 0
+        self.total_written = 0
+        self.total_drained = 0
+        self.dropped_bytes = 0
+        self.overflow_events = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def write(self, data) -> bool:
+        """Copie data dans l'anneau. Retourne True si l'anneau était vide avant l'écriture."""
+        n = len(data)
+        if not n:
+            return False
+        with self._lock:
+            was_empty = self._size == 0
+            free = self.capacity - self._size
+            if n > free:
+                self.dropped_bytes += n - free
+                self.overflow_events += 1
+                n = free
+                if not n:
+                    return was_empty
+            mv = memoryview(data)[:n]
+            tail = (self._head + self._size) % self.capacity
+            first = min(n, self.capacity - tail)
+            self._buf[tail:tail + first] = mv[:first]
+            if first < n:
+                self._buf[0:n - first] = mv[first:]
+            self._size += n
+            self.total_written += n
+            if self._size > self.high_water:
+                self.high_water = self._size
+            return was_empty
+
+    def write_frame(self, payload, flags: int = 0) -> bool:
+        """
+        Écrit une trame (en-tête + octets) d'un seul tenant : si elle ne tient
+        pas, elle est jetée entière (comptée dans dropped_bytes). Retourne True
+        si l'anneau était vide avant l'écriture.
+        """
+        n = FRAME_HEADER.size + len(payload)
+        if n > self.capacity - self._size:
+            with self._lock:
+                self.dropped_bytes += len(payload)
+                self.overflow_events += 1
+                return self._size == 0
+        return self.write(FRAME_HEADER.pack(len(payload), flags) + payload)
+
+    def drain_frames(self) -> list:
+        """Retire toutes les trames en attente : [(drapeaux, octets)]."""
+        data = self.drain()
+        frames = []
+        pos = 0
+        unpack = FRAME_HEADER.unpack_from
+        header = FRAME_HEADER.size
+        while pos + header <= len(data):
+            size, flags = unpack(data, pos)
+            pos += header
+            frames.append((flags, data[pos:pos + size]))
+            pos += size
+        return frames
+
+    def drain(self, max_bytes: int = 0) -> bytes:
+        """Retire et retourne tout le contenu (ou au plus max_bytes octets)."""
+        with self._lock:
+            n = self._size if max_bytes <= 0 else min(max_bytes, self._size)
+            if not n:
+                return b""
+            head = self._head
+            first = min(n, self.capacity - head)
+            out = bytes(self._buf[head:head + first])
+            if first < n:
+                out += bytes(self._buf[0:n - first])
+            self._head = (head + n) % self.capacity
+            self._size -= n
+            if not self._size:
+                self._head = 0
+            self.total_drained += n
+            return out
+
+    def clear(self) -> None:
+        with self._lock:
+            self._head = 0
+            self._size = 0
+
+    def stats(self) -> dict:
+        """Photo des compteurs (pour affichage / diagnostic)."""
+        with self._lock:
+            return {
+                "capacity": self.capacity,
+                "used": self._size,
+                "high_water": self.high_water,
+                "total_written": self.total_written,
+                "total_drained": self.total_drained,
+                "dropped_bytes": self.dropped_bytes,
+                "overflow_events": self.overflow_events,
+            }
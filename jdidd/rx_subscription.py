@@ -0,0 +1,114 @@
+# Fichier : rx_subscription.py
+
+import re
+import threading
+import time
+
+DEFAULT_MAX_BYTES = 64 * 1024
+
+
+class RxSubscription:
+    """
+    Copie des octets RX bruts pour un consommateur hors GUI (transfert de
+    fichier, script). feed() est appelé par le thread RX (SerialWorker) à
+    chaque lecture ; le consommateur lit depuis son propre thread avec
+    attente bornée.
+
+    Le tampon est borné à max_bytes : au-delà, les octets les plus anciens
+    sont jetés et comptés dans `dropped` (un abonné lent ne bloque jamais la
+    RX ni ne fait grossir la mémoire).
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max(1, int(max_bytes))
+        self.dropped = 0
+        self._buffer = bytearray()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    # ---------- Thread RX ----------
+    def feed(self, data: bytes) -> None:
+        with self._cond:
+            self._buffer += data
+            excess = len(self._buffer) - self.max_bytes
+            if excess > 0:
+                del self._buffer[:excess]
+                self.dropped += excess
+            self._cond.notify_all()
+
+    # ---------- Thread consommateur ----------
+    def close(self) -> None:
+        """Réveille les lectures en attente (elles rendent ce qui reste)."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def clear(self) -> None:
+        with self._cond:
+            self._buffer.clear()
+
+    def __len__(self):
+        return len(self._buffer)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _wait(self, predicate, timeout) -> bool:
+        """Attend predicate() (verrou tenu) ; timeout None = sans limite."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not predicate():
+            if self._closed:
+                return False
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self._cond.wait(remaining)
+        return True
+
+    def read(self, size: int = -1, timeout: float = 0.0) -> bytes:
+        """
+        Jusqu'à size octets (-1 = tout ce qui est là). Attend au plus timeout
+        secondes qu'au moins un octet soit disponible.
+        """
+        with self._cond:
+            self._wait(lambda: self._buffer, timeout)
+            n = len(self._buffer) if size < 0 else min(size, len(self._buffer))
+            data = bytes(self._buffer[:n])
+            del self._buffer[:n]
+            return data
+
+    def read_until(self, terminator: bytes, timeout: float = None) -> bytes:
+        """
+        Octets jusqu'à terminator inclus ; b"" si absent à l'expiration
+        (le tampon est laissé intact).
+        """
+        with self._cond:
+            if not self._wait(lambda: terminator in self._buffer, timeout):
+                return b""
+            end = self._buffer.index(terminator) + len(terminator)
+            data = bytes(self._buffer[:end])
+            del self._buffer[:end]
+            return data
+
+    def read_match(self, pattern: re.Pattern, timeout: float = None):
+        """
+        (octets jusqu'à la fin de la correspondance, match) pour un motif
+        bytes ; (b"", None) si rien ne correspond à l'expiration (le tampon
+        est laissé intact).
+        """
+        ends = []
+
+        def predicate():
+            m = pattern.search(self._buffer)
+            if m:
+                ends.append(m.end())
+            return m is not None
+
+        with self._cond:
+            if not self._wait(predicate, timeout):
+                return b"", None
+            data = bytes(self._buffer[:ends[-1]])
+            del self._buffer[:ends[-1]]
+        # Match refait sur la copie : celui du tampon pointerait sur des octets déjà retirés
+        return data, pattern.search(data)
@@ -35,7 +35,7 @@ class ScriptingDialog(QDialog):
         script_layout = QVBoxLayout(script_group)
         self.script_editor = QTextEdit()
         self.script_editor.setFontFamily("Consolas, Courier New, monospace")
-        self.script_editor.setPlaceholderText("Écrivez votre script ici...\n\n# Exemple:\n# for i in range(5):\n#     api.log(f'Message {i+1}')\n#     api.send_raw('AT+CMD?\\n')\n#     api.pause(1000)")
+        self.script_editor.setPlaceholderText("Écrivez votre script ici...\n\n# Exemple:\n# for i in range(5):\n#     api.log(f'Message {i+1}')\n#     api.send_raw('AT+CMD?\\n')\n#     api.pause(1000)\n#\n# Lecture du device (timeouts en s) :\n# reply = api.transact('get SN')\n# m = api.expect(r'OK|ERR', timeout=2)\n# line = api.readline()")
         script_layout.addWidget(self.script_editor)
         main_layout.addWidget(script_group, stretch=2)
 
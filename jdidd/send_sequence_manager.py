@@ -1,25 +1,42 @@
-import os, json
+import json
+from sequence_codec import encode_sequence, check_entries
+from persistence import JsonStore, read_journal, replay_journal
 class SendSequenceManager:
-    def __init__(self): self.sequences = []; self.current_file_path = None
+    """Séquences d'envoi. Chaque séquence est compilée en octets (cache de sequence_codec) au chargement et à l'édition ; les modifications sont sauvegardées en différé (JsonStore) et signalées aux observers (opération ["add", e], ["delete", i]... ou ["reset"])."""
+    def __init__(self): self.sequences = []; self.current_file_path = None; self.errors = []; self.store = JsonStore(); self.recovered = 0; self.observers = []
     def load_from_file(self, path):
         try:
             with open(path, 'r', encoding='utf-8') as f:
-                data = json.load(f); self.sequences = data if isinstance(data, list) else []
-                self.current_file_path = path; return True
-        except (json.JSONDecodeError, IOError, FileNotFoundError): self.sequences = []; self.current_file_path = None; return False
+                data = json.load(f); ops = read_journal(path); self.recovered = len(ops)
+                self.sequences = replay_journal(data if isinstance(data, list) else [], ops); self.errors = check_entries(self.sequences, 'sequence', 'mode')
+                self.current_file_path = path; self._notify(["reset"])
+                if ops: self.store.schedule(path, self.sequences)
+                return True
+        except (json.JSONDecodeError, IOError, FileNotFoundError): self.sequences = []; self.errors = []; self.current_file_path = None; self._notify(["reset"]); return False
     def save_to_file(self, path):
-        try:
-            os.makedirs(os.path.dirname(path), exist_ok=True)
-            with open(path, 'w', encoding='utf-8') as f: json.dump(self.sequences, f, indent=4, ensure_ascii=False)
-            self.current_file_path = path; return True
-        except IOError: return False
+        if not self.store.save_now(path, self.sequences): return False
+        self.current_file_path = path; return True
     def save_current_file(self):
         if self.current_file_path: return self.save_to_file(self.current_file_path)
         return False
-    def new_set(self): self.sequences = []; self.current_file_path = None
+    def _notify(self, op):
+        for observer in self.observers: observer(op)
+    def _changed(self, *op):
+        """Signale l'opération, la journalise et programme la sauvegarde différée du fichier courant."""
+        self._notify(list(op))
+        if self.current_file_path: self.store.log(self.current_file_path, list(op)); self.store.schedule(self.current_file_path, self.sequences)
+    def new_set(self): self.sequences = []; self.errors = []; self.current_file_path = None; self._notify(["reset"])
     def get_sequences(self): return self.sequences
-    def add_sequence(self, data): self.sequences.append(data); self.save_current_file()
+    def add_sequence(self, data): self.payload(data); self.sequences.append(data); self._recheck(); self._changed("add", data)
     def edit_sequence(self, index, data):
-        if 0 <= index < len(self.sequences): self.sequences[index] = data; self.save_current_file()
+        if 0 <= index < len(self.sequences): self.payload(data); self.sequences[index] = data; self._recheck(); self._changed("edit", index, data)
     def delete_sequence(self, index):
-        if 0 <= index < len(self.sequences): del self.sequences[index]; self.save_current_file()
\ No newline at end of file
+        if 0 <= index < len(self.sequences): del self.sequences[index]; self._recheck(); self._changed("delete", index)
+    def move_sequence(self, source, dest):
+        if 0 <= source < len(self.sequences): self.sequences.insert(dest, self.sequences.pop(source)); self._recheck(); self._changed("move", source, dest)
+    def _recheck(self):
+        if self.errors: self.errors = check_entries(self.sequences, 'sequence', 'mode')
+    @staticmethod
+    def payload(data):
+        """Octets précompilés d'une séquence (lève ValueError si invalide)."""
+        return encode_sequence(data.get('sequence', ''), data.get('mode', 'ASCII'))
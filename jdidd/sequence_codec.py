@@ -0,0 +1,37 @@
+# Fichier : sequence_codec.py
+
+import codecs
+from functools import lru_cache
+
+# Modes d'écriture d'une séquence / réponse (clés "mode" et "response_mode")
+SEQ_ASCII = "ASCII"        # texte, échappements \r \n \xNN interprétés
+SEQ_HEX = "HEX"
+SEQ_DECIMAL = "Decimal"
+
+CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def encode_sequence(text: str, mode: str = SEQ_ASCII) -> bytes:
+    """
+    Octets à envoyer pour une séquence (texte + mode). Lève ValueError si invalide.
+    Le résultat (bytes, immuable) est mis en cache par (texte, mode) : un envoi
+    répété ou cyclique ne refait pas le décodage.
+    """
+    if mode == SEQ_HEX:
+        return bytes([int(p, 16) for p in text.replace("0x", "").split() if p])
+    if mode == SEQ_DECIMAL:
+        return bytes([int(p, 10) for p in text.split() if p])
+    # UnicodeError (\x incomplet, caractère hors latin-1) est une ValueError
+    return codecs.decode(text, 'unicode_escape').encode('latin-1')
+
+
+def check_entries(entries, text_key: str, mode_key: str) -> list:
+    """Compile chaque entrée ; rend [(indice, message)] pour celles qui sont invalides."""
+    errors = []
+    for index, entry in enumerate(entries):
+        try:
+            encode_sequence(entry.get(text_key, ''), entry.get(mode_key, SEQ_ASCII))
+        except ValueError as e:
+            errors.append((index, str(e)))
+    return errors
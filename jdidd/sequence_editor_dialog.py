@@ -6,6 +6,8 @@ from PyQt6.QtWidgets import (
 )
 from PyQt6.QtGui import QPalette
 
+from sequence_codec import encode_sequence
+
 class SequenceEditorDialog(QDialog):
     def __init__(self, sequence_data, parent=None):
         super().__init__(parent)
@@ -80,8 +82,12 @@ class SequenceEditorDialog(QDialog):
         text = self.sequence_text_edit.toPlainText()
         
         if mode == "ASCII":
-            # Pas de validation pour l'ASCII, on s'assure juste que le style est normal
-            self.set_valid_style()
+            # ASCII : la séquence doit pouvoir être compilée (échappements, latin-1)
+            try:
+                encode_sequence(text, mode)
+                self.set_valid_style()
+            except ValueError as e:
+                self.set_invalid_style(f"Invalid escape or character: {e}")
             return
 
         elif mode == "HEX":
@@ -0,0 +1,240 @@
+# Fichier : sequence_models.py
+
+from PyQt6.QtCore import (Qt, QAbstractTableModel, QModelIndex, QMimeData, QSortFilterProxyModel,
+                          QEvent, QSize, pyqtSignal)
+from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import QStyledItemDelegate, QStyle, QApplication
+
+ROW_MIME_TYPE = "application/x-jdidd-row"
+SORT_ROLE = Qt.ItemDataRole.UserRole     # clé de tri (colonne bouton = ordre du manager)
+BUTTON_ICON_SIZE = 20
+
+
+class EntryTableModel(QAbstractTableModel):
+    """
+    Table d'une liste de manager (séquences ou triggers), sans copie : le modèle
+    lit la liste du manager et suit ses opérations (manager.observers) pour
+    émettre des notifications de ligne ciblées (insertion, suppression,
+    déplacement, modification). Le coût d'une modification ne dépend donc pas
+    de la taille de la bibliothèque ; seul un chargement réinitialise le modèle.
+
+    La colonne 0 est un bouton peint par ButtonDelegate (icône DecorationRole).
+    Le glisser-déposer déplace l'entrée dans le manager.
+    """
+
+    HEADERS = ()
+    KEYS = ()       # clé de l'entrée affichée dans chaque colonne (None = bouton)
+
+    def __init__(self, manager, parent=None):
+        super().__init__(parent)
+        self.manager = manager
+        self._rows = len(self.entries())
+        self._errors = dict(manager.errors)
+        manager.observers.append(self.on_manager_changed)
+
+    # ---------- À spécialiser ----------
+    def entries(self) -> list:
+        raise NotImplementedError
+
+    def button_icon(self, entry):
+        return None
+
+    def button_tooltip(self, entry) -> str:
+        return ""
+
+    def move(self, source: int, dest: int) -> None:
+        raise NotImplementedError
+
+    # ---------- Lecture ----------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        entries = self.entries()
+        row = index.row()
+        if not index.isValid() or row >= len(entries):
+            return None
+        entry = entries[row]
+        key = self.KEYS[index.column()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return None if key is None else str(entry.get(key, ''))
+        if role == SORT_ROLE:
+            return row if key is None else str(entry.get(key, '')).lower()
+        if key is None:
+            if role == Qt.ItemDataRole.DecorationRole:
+                return self.button_icon(entry)
+            if role == Qt.ItemDataRole.ToolTipRole:
+                return self.button_tooltip(entry)
+            return None
+        if row in self._errors:
+            if role == Qt.ItemDataRole.ForegroundRole:
+                return QColor(Qt.GlobalColor.red)
+            if role == Qt.ItemDataRole.ToolTipRole:
+                return self._errors[row]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.ItemIsDropEnabled
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsDragEnabled
+
+    # ---------- Glisser-déposer (réordonnancement) ----------
+    def supportedDropActions(self):
+        return Qt.DropAction.MoveAction
+
+    def mimeTypes(self):
+        return [ROW_MIME_TYPE]
+
+    def mimeData(self, indexes):
+        mime = QMimeData()
+        if indexes:
+            mime.setData(ROW_MIME_TYPE, str(indexes[0].row()).encode())
+        return mime
+
+    def dropMimeData(self, data, action, row, column, parent):
+        if action != Qt.DropAction.MoveAction or not data.hasFormat(ROW_MIME_TYPE):
+            return False
+        source = int(bytes(data.data(ROW_MIME_TYPE)).decode())
+        if row < 0:
+            row = parent.row() if parent.isValid() else self._rows
+        # La destination est donnée avant retrait de la ligne source
+        dest = row - 1 if row > source else row
+        if dest != source:
+            self.move(source, dest)
+        return True
+
+    # ---------- Suivi du manager ----------
+    def on_manager_changed(self, op) -> None:
+        kind = op[0]
+        self._errors = dict(self.manager.errors)
+        if kind == "add":
+            self.beginInsertRows(QModelIndex(), self._rows, self._rows)
+            self._rows += 1
+            self.endInsertRows()
+        elif kind == "delete":
+            self.beginRemoveRows(QModelIndex(), op[1], op[1])
+            self._rows -= 1
+            self.endRemoveRows()
+        elif kind == "move":
+            source, dest = op[1], op[2]
+            # Convention Qt : destination = position avant retrait de la source
+            if self.beginMoveRows(QModelIndex(), source, source, QModelIndex(), dest + 1 if dest > source else dest):
+                self.endMoveRows()
+            else:
+                self._reset()
+        elif kind in ("edit", "set"):
+            self.dataChanged.emit(self.index(op[1], 0), self.index(op[1], len(self.HEADERS) - 1))
+        else:
+            self._reset()
+
+    def _reset(self) -> None:
+        self.beginResetModel()
+        self._rows = len(self.entries())
+        self.endResetModel()
+
+
+class SendSequenceModel(EntryTableModel):
+    HEADERS = ("", "Name", "Sequence")
+    KEYS = (None, 'name', 'sequence')
+
+    def __init__(self, manager, icon_send, parent=None):
+        self.icon_send = icon_send
+        super().__init__(manager, parent)
+
+    def entries(self):
+        return self.manager.get_sequences()
+
+    def button_icon(self, entry):
+        return self.icon_send
+
+    def button_tooltip(self, entry):
+        return "Send this sequence"
+
+    def move(self, source, dest):
+        self.manager.move_sequence(source, dest)
+
+
+class TriggerModel(EntryTableModel):
+    HEADERS = ("Active", "Name", "Trigger", "Answer")
+    KEYS = (None, 'name', 'trigger', 'response')
+
+    def __init__(self, manager, icon_enabled, icon_disabled, parent=None):
+        self.icon_enabled = icon_enabled
+        self.icon_disabled = icon_disabled
+        super().__init__(manager, parent)
+
+    def entries(self):
+        return self.manager.get_rules()
+
+    def button_icon(self, entry):
+        return self.icon_enabled if entry.get('enabled', True) else self.icon_disabled
+
+    def button_tooltip(self, entry):
+        return "Disable this trigger" if entry.get('enabled', True) else "Enable this trigger"
+
+    def move(self, source, dest):
+        self.manager.move_rule(source, dest)
+
+
+class EntryFilterProxy(QSortFilterProxyModel):
+    """
+    Tri par colonne (clé SORT_ROLE) et filtre texte. Le tri croissant sur la
+    colonne bouton est l'ordre du manager : il est rendu sans tri (colonne -1),
+    ce qui évite O(n log n) appels à data() au chargement d'une grosse liste.
+    """
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        if column == 0 and order == Qt.SortOrder.AscendingOrder:
+            column = -1
+        super().sort(column, order)
+
+
+def create_filter_proxy(model, parent=None) -> QSortFilterProxyModel:
+    """Tri (clé SORT_ROLE) et filtre texte insensible à la casse sur toutes les colonnes."""
+    proxy = EntryFilterProxy(parent)
+    proxy.setSourceModel(model)
+    proxy.setSortRole(SORT_ROLE)
+    proxy.setFilterKeyColumn(-1)
+    proxy.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+    proxy.setDynamicSortFilter(True)
+    return proxy
+
+
+class ButtonDelegate(QStyledItemDelegate):
+    """
+    Bouton-icône peint (pas de QPushButton par ligne). clicked(index) est émis
+    au relâchement du clic gauche ; le double-clic est absorbé pour ne pas
+    ouvrir l'éditeur en cliquant vite sur le bouton.
+    """
+
+    clicked = pyqtSignal(QModelIndex)
+
+    def paint(self, painter, option, index):
+        style = option.widget.style() if option.widget else QApplication.style()
+        style.drawPrimitive(QStyle.PrimitiveElement.PE_PanelItemViewItem, option, painter, option.widget)
+        icon = index.data(Qt.ItemDataRole.DecorationRole)
+        if icon is not None:
+            rect = option.rect
+            size = min(BUTTON_ICON_SIZE, rect.height(), rect.width())
+            icon.paint(painter, rect.x() + (rect.width() - size) // 2, rect.y() + (rect.height() - size) // 2, size, size)
+
+    def sizeHint(self, option, index):
+        return QSize(BUTTON_ICON_SIZE + 12, BUTTON_ICON_SIZE + 8)
+
+    def editorEvent(self, event, model, option, index):
+        kind = event.type()
+        if kind == QEvent.Type.MouseButtonDblClick:
+            return True
+        if (kind == QEvent.Type.MouseButtonRelease and event.button() == Qt.MouseButton.LeftButton
+                and option.rect.contains(event.position().toPoint())):
+            self.clicked.emit(index)
+            return True
+        return False
@@ -1,6 +1,15 @@
 # serial_backend.py
 from __future__ import annotations
+import codecs
+import re
+import threading
 import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any
+
+from param_cache import ParamCache
 
 try:
     import serial
@@ -11,13 +20,33 @@ except Exception:  # pyserial non installé
     SerialException = Exception
 
 
+# Prompt du shell embarqué (ex: "user@menzu:/svc/nvm$ "). Surchargeable par instance.
+DEFAULT_PROMPT_REGEX = r"(?:user|root)@[^\r\n]*?[#$>]"
+
+
+@dataclass
+class CommandResult:
+    """Résultat d'une commande shell exécutée via exec_many()."""
+    command: str
+    output: str           # texte brut entre l'envoi et le prompt suivant
+    value: str            # valeur utile extraite (sans echo ni prompt)
+    ok: bool              # prompt reçu (réponse complète)
+    elapsed_ms: float     # de l'écriture de la commande à son prompt
+    cached: bool = False  # valeur servie par le cache (rien n'a été envoyé)
+
+
 class SerialBackend:
     """
     Backend série minimal et robuste.
     - Ne crée PAS de port automatiquement.
     - Peut recevoir un port ouvert depuis l'app (self.ser = serial.Serial(...)).
     - Fournit connect_with_settings() si on veut connecter depuis ici.
-    - do_get/do_set envoient une séquence "cd / ; cd <path> ; get/set ; cd /".
+    - do_get/do_set : une transaction se termine dès que le prompt du shell est vu
+      (prompt_regex) ; le silence (idle_ms) ne sert plus que de filet de secours.
+    - Le répertoire courant du device (cwd) est suivi : des lectures successives
+      dans le même module n'envoient plus de "cd".
+    - Les lectures des paramètres déclarés cachables (configure_cache) sont
+      servies par self.cache (param_cache) ; refresh=True force la relecture.
     """
 
     # Mappage module UI -> chemin shell embarqué
@@ -35,11 +64,53 @@ class SerialBackend:
         "ZigBee": "svc/net/zigbee",
     }
 
-    def __init__(self, default_baud: int = 115200, timeout: float = 1.0) -> None:
+    # Lecture courte pendant une transaction (le timeout du port du Terminal vaut 1 s)
+    READ_SLICE_S = 0.005
+
+    def __init__(
+        self,
+        default_baud: int = 115200,
+        timeout: float = 1.0,
+        prompt_regex: str = DEFAULT_PROMPT_REGEX,
+        idle_ms: int = 250,
+        max_ms: int = 3000,
+    ) -> None:
         self.ser = None           # type: ignore  # sera un serial.Serial
         self.port = None          # ex: "COM20"
         self.baudrate = default_baud
         self.timeout = timeout
+        self.idle_ms = idle_ms    # fin de transaction sur silence (si prompt jamais vu)
+        self.max_ms = max_ms      # borne absolue d'une transaction
+        self.cwd: str | None = None   # répertoire courant du shell ("" = racine, None = inconnu)
+        self.lock = threading.RLock()  # une seule transaction à la fois (GUI, jobs, scripts)
+        self.cache = ParamCache()
+        self.last_get_cached = False   # le dernier do_get a-t-il été servi par le cache ?
+        self.set_prompt_regex(prompt_regex)
+
+    def set_prompt_regex(self, pattern: str) -> None:
+        """Change le motif du prompt (une transaction finit dès que le tampon se termine par lui)."""
+        self.prompt_regex = pattern
+        self._prompt_re = re.compile(pattern)
+        self._prompt_line_re = re.compile(rf"^\s*(?:{pattern})")
+        self._prompt_tail_re = re.compile(rf"(?:{pattern})[ \t]*\Z")
+
+    def set_physical_serial(self, ser) -> None:
+        """Branche (ou débranche avec None) un port déjà ouvert par l'app ; le cwd redevient inconnu."""
+        self.ser = ser
+        self.port = getattr(ser, "port", None) if ser else None
+        if ser is not None and getattr(ser, "baudrate", None):
+            self.baudrate = ser.baudrate
+        self.cwd = None
+        self.cache.clear()
+
+    def configure_cache(self, policies: dict[tuple[str, str], Any]) -> None:
+        """Politiques de cache par (module UI, clé) ; remplace les précédentes."""
+        by_path = {}
+        for (module, key), policy in policies.items():
+            path = self._module_path(module)
+            if path:
+                by_path[(path, key)] = policy
+        self.cache.set_policies(by_path)
 
     # --------------------- état & services ---------------------
     def is_connected(self) -> bool:
@@ -72,6 +143,8 @@ class SerialBackend:
             )
             self.port = settings["port"]
             self.baudrate = settings.get("baudrate", self.baudrate)
+            self.cwd = None
+            self.cache.clear()
             time.sleep(0.2)
             return True
         except (SerialException, OSError, FileNotFoundError) as e:
@@ -88,6 +161,8 @@ class SerialBackend:
                 pass
         self.ser = None
         self.port = None
+        self.cwd = None
+        self.cache.clear()
 
     # --------------------- bas niveau ---------------------
     def _write_line(self, line: str) -> None:
@@ -98,82 +173,326 @@ class SerialBackend:
         self.ser.write(line.replace("\n", "\r\n").encode("utf-8"))
         self.ser.flush()
 
-    def _drain_until_idle(self, idle_ms: int = 120, max_ms: int = 1500) -> str:
-        if not self.is_connected():
-            return ""
-        start = time.time()
+    @contextmanager
+    def _short_timeout(self):
+        """Raccourcit le timeout de read() le temps d'une transaction."""
+        old = self.ser.timeout
+        if old is None or old > self.READ_SLICE_S:
+            self.ser.timeout = self.READ_SLICE_S
+        try:
+            yield
+        finally:
+            try:
+                self.ser.timeout = old
+            except Exception:
+                pass
+
+    @staticmethod
+    def _decode(buf: bytes) -> str:
+        try:
+            return buf.decode("utf-8", errors="replace")
+        except Exception:
+            return buf.decode("latin1", errors="replace")
+
+    def _read_until_prompt(self, idle_ms: int | None = None, max_ms: int | None = None) -> tuple[str, bool]:
+        """
+        Lit jusqu'au prompt (retour immédiat) ou, à défaut, jusqu'à idle_ms de silence.
+        Retourne (texte, prompt_vu).
+        """
+        idle_s = (self.idle_ms if idle_ms is None else idle_ms) / 1000.0
+        max_s = (self.max_ms if max_ms is None else max_ms) / 1000.0
+        start = time.monotonic()
         last = start
         buf = bytearray()
-        while True:
-            chunk = self.ser.read(4096)
-            if chunk:
-                buf.extend(chunk)
-                last = time.time()
-            else:
-                if (time.time() - last) * 1000 >= idle_ms:
+        with self._short_timeout():
+            while True:
+                chunk = self.ser.read(max(1, self.ser.in_waiting))
+                now = time.monotonic()
+                if chunk:
+                    buf.extend(chunk)
+                    last = now
+                    # Le prompt ne peut finir le tampon qu'après un octet reçu
+                    if self._prompt_tail_re.search(self._decode(bytes(buf[-256:]))):
+                        return self._decode(bytes(buf)), True
+                elif now - last >= idle_s:
+                    break
+                if now - start >= max_s:
                     break
-            if (time.time() - start) * 1000 >= max_ms:
-                break
+        return self._decode(bytes(buf)), False
+
+    def _drain_until_idle(self, idle_ms: int = 120, max_ms: int = 1500) -> str:
+        if not self.is_connected():
+            return ""
+        text, _ = self._read_until_prompt(idle_ms=idle_ms, max_ms=max_ms)
+        return text
+
+    def _transact(self, line: str, idle_ms: int | None = None, max_ms: int | None = None) -> tuple[str, bool]:
+        """Envoie une commande et attend sa réponse complète. Retourne (texte, prompt_vu)."""
         try:
-            return buf.decode("utf-8", errors="replace")
+            self.ser.reset_input_buffer()   # jette les restes (prompt orphelin, logs...)
         except Exception:
-            return buf.decode("latin1", errors="replace")
+            pass
+        self._write_line(line)
+        text, prompt_seen = self._read_until_prompt(idle_ms=idle_ms, max_ms=max_ms)
+        if not prompt_seen:
+            self.cwd = None   # état du shell incertain
+        return text, prompt_seen
 
     def _exec_sequence(self, lines: list[str]) -> str:
         if not self.is_connected():
             return "[OFFLINE] Aucun port série connecté"
         out = []
         for ln in lines:
-            self._write_line(ln)
-            time.sleep(0.05)
-            out.append(self._drain_until_idle())
+            out.append(self._transact(ln)[0])
+        self.cwd = None   # séquence arbitraire : on ne sait plus où est le shell
+        self.cache.drop_session()
         return "".join(out).strip()
 
+    def _enter(self, path: str) -> bool:
+        """Place le shell dans <path> ; ne fait rien si le cwd suivi y est déjà."""
+        if self.cwd == path:
+            return True
+        self.cwd = None
+        _, ok_root = self._transact("cd /")
+        _, ok_path = self._transact(f"cd {path}") if path else ("", ok_root)
+        if ok_root and ok_path:
+            self.cwd = path
+        return ok_root and ok_path
+
+    # --------------------- pipeline ---------------------
+    def exec_many(self, commands: list[str], window: int = 8,
+                  idle_ms: int | None = None, max_ms: int | None = None,
+                  on_result=None, should_stop=None) -> list[CommandResult]:
+        """
+        Exécute plusieurs commandes en gardant jusqu'à `window` commandes en vol.
+        Le flux de réponse est découpé sur les prompts : la i-ème réponse est le
+        texte compris entre le (i-1)-ème et le i-ème prompt.
+        Si le device se tait (idle_ms) avant la fin, les commandes restantes sont
+        rendues avec ok=False.
+
+        on_result(index, CommandResult) est appelé dès qu'une réponse est complète.
+        should_stop() -> True arrête l'envoi ; les commandes déjà en vol sont
+        attendues pour garder le flux synchronisé.
+        """
+        if not commands:
+            return []
+        if not self.is_connected():
+            return [CommandResult(c, "", "[OFFLINE] Aucun port série connecté", False, 0.0) for c in commands]
+        with self.lock:
+            return self._exec_many(commands, window, idle_ms, max_ms, on_result, should_stop)
+
+    def _exec_many(self, commands, window, idle_ms, max_ms, on_result, should_stop) -> list[CommandResult]:
+        window = max(1, window)
+        idle_s = (self.idle_ms if idle_ms is None else idle_ms) / 1000.0
+        # borne globale : max_ms par commande
+        max_s = (self.max_ms if max_ms is None else max_ms) / 1000.0 * len(commands)
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+        results: list[CommandResult] = []
+        in_flight: deque[tuple[str, float]] = deque()
+        next_cmd = 0
+        text = ""
+
+        def send(n: int) -> None:
+            nonlocal next_cmd
+            if should_stop and should_stop():
+                return
+            batch = commands[next_cmd:next_cmd + n]
+            if not batch:
+                return
+            payload = "".join(c.rstrip("\n") + "\r\n" for c in batch).encode("utf-8")
+            self.ser.write(payload)
+            now = time.monotonic()
+            in_flight.extend((c, now) for c in batch)
+            next_cmd += len(batch)
+
+        try:
+            self.ser.reset_input_buffer()
+        except Exception:
+            pass
+
+        start = time.monotonic()
+        last = start
+        with self._short_timeout():
+            send(window)
+            while in_flight:
+                chunk = self.ser.read(max(1, self.ser.in_waiting))
+                now = time.monotonic()
+                if chunk:
+                    last = now
+                    text += decoder.decode(chunk)
+                    # Un prompt complet = fin de la réponse en tête de file
+                    while in_flight:
+                        m = self._prompt_re.search(text)
+                        if not m:
+                            break
+                        cmd, t_sent = in_flight.popleft()
+                        out = text[:m.start()]
+                        text = text[m.end():]
+                        res = CommandResult(
+                            cmd, out, self._extract_value_from_chunk(out, cmd), True, (now - t_sent) * 1000.0
+                        )
+                        results.append(res)
+                        if on_result:
+                            on_result(len(results) - 1, res)
+                        send(1)
+                elif now - last >= idle_s:
+                    break
+                if now - start >= max_s:
+                    break
+
+        # Réponses manquantes (silence ou arrêt demandé) : rendues avec ok=False
+        lost = [c for c, _ in in_flight]
+        not_sent = commands[next_cmd:]
+        for i, cmd in enumerate(lost):
+            out = text if i == 0 else ""
+            results.append(CommandResult(cmd, out, self._extract_value_from_chunk(out, cmd) if out else "", False, 0.0))
+            if on_result:
+                on_result(len(results) - 1, results[-1])
+        for cmd in not_sent:
+            results.append(CommandResult(cmd, "", "[ANNULÉ]", False, 0.0))
+            if on_result:
+                on_result(len(results) - 1, results[-1])
+        if lost or any(c.strip().startswith("cd") for c in commands):
+            self.cwd = None
+        return results
+
+    def _batch_in_module(self, module: str, commands: list[str], window: int,
+                         on_result=None, should_stop=None) -> list[CommandResult]:
+        """Préfixe les "cd" nécessaires et exécute le lot dans le module ; met à jour le cwd."""
+        path = self._module_path(module)
+        if not path:
+            err = f"[ERREUR] Chemin inconnu pour module '{module}'"
+            results = [CommandResult(c, "", err, False, 0.0) for c in commands]
+            if on_result:
+                for i, r in enumerate(results):
+                    on_result(i, r)
+            return results
+        with self.lock:
+            prefix = [] if self.cwd == path else ["cd /", f"cd {path}"]
+            n = len(prefix)
+
+            def cb(i: int, res: CommandResult) -> None:
+                if on_result and i >= n:
+                    on_result(i - n, res)
+
+            results = self.exec_many(prefix + commands, window=window, on_result=cb, should_stop=should_stop)
+            if prefix and all(r.ok for r in results):
+                self.cwd = path
+        return results[n:]
+
+    def get_many(self, module: str, keys: list[str], window: int = 8,
+                 on_result=None, should_stop=None, refresh: bool = False) -> list[CommandResult]:
+        """
+        Lit plusieurs paramètres d'un même module en pipeline. Les valeurs
+        valides du cache sont rendues tout de suite (cached=True) et seules les
+        autres partent vers le device ; refresh=True relit tout.
+        """
+        path = self._module_path(module)
+        results: list[CommandResult | None] = [None] * len(keys)
+        pending: list[int] = []
+        for i, key in enumerate(keys):
+            value = None if (refresh or not path) else self.cache.lookup(path, key)
+            if value is None:
+                pending.append(i)
+                continue
+            results[i] = CommandResult(f"get {key}", "", value, True, 0.0, cached=True)
+            if on_result:
+                on_result(i, results[i])
+        if not pending:
+            return results
+
+        def cb(j: int, res: CommandResult) -> None:
+            i = pending[j]
+            if path and self._is_value_reply(res):
+                self.cache.store(path, keys[i], res.value)
+            if on_result:
+                on_result(i, res)
+
+        batch = self._batch_in_module(module, [f"get {keys[i]}" for i in pending], window, cb, should_stop)
+        for i, res in zip(pending, batch):
+            results[i] = res
+        return results
+
+    def set_many(self, module: str, items: list[tuple[str, str]], window: int = 8,
+                 on_result=None, should_stop=None) -> list[CommandResult]:
+        """Écrit plusieurs paramètres d'un même module en pipeline."""
+        cmds = [f"set {k}" if (v is None or str(v) == "") else f"set {k} {v}" for k, v in items]
+        self._invalidate_for_set(module, items)
+        return self._batch_in_module(module, cmds, window, on_result, should_stop)
+
+    @staticmethod
+    def _is_value_reply(res: CommandResult) -> bool:
+        """Réponse complète portant une valeur (ni erreur du shell, ni message du backend)."""
+        return res.ok and not res.value.startswith(("ERR", "["))
+
+    def _invalidate_for_set(self, module: str, items: list[tuple[str, str]]) -> None:
+        """Un "set" invalide la clé écrite ; une action ("set" sans valeur) invalide la session."""
+        path = self._module_path(module)
+        for key, value in items:
+            self.cache.invalidate(path, key)
+            if value is None or str(value) == "":
+                self.cache.drop_session()
+
+    # Borne de return_to_root() : appelé depuis le GUI au retour au Terminal
+    RETURN_TO_ROOT_MAX_MS = 300
+
+    def return_to_root(self) -> None:
+        """
+        Ramène le shell à la racine (ex: avant de rendre la main au Terminal).
+        Seulement si le backend a lui-même changé de répertoire (cwd connu et
+        non racine) : rien n'est injecté sinon. Un seul "cd /", borné à
+        RETURN_TO_ROOT_MAX_MS.
+        """
+        if self.is_connected() and self.cwd not in (None, ""):
+            with self.lock:
+                max_ms = self.RETURN_TO_ROOT_MAX_MS
+                _, ok = self._transact("cd /", idle_ms=min(self.idle_ms, max_ms), max_ms=max_ms)
+                if ok:
+                    self.cwd = ""
+
     def _module_path(self, module: str) -> str:
         return self.MODULE_PATHS.get((module or "").strip(), "")
     
 
-    def _extract_value_from_chunk(self, chunk: str) -> str:
-   
-     for ln in chunk.splitlines():
-        s = ln.strip()
-        if not s:
-            continue
-        if s.startswith("user@") or s.startswith("root@") or s.startswith("root/"):
-            continue
-        # ignore l'echo 'get KEY' éventuel
-        if s.lower().startswith("get "):
-            continue
-        return s
-     return chunk.strip()
-
+    def _extract_value_from_chunk(self, chunk: str, cmd: str | None = None) -> str:
+        for ln in chunk.splitlines():
+            s = ln.strip()
+            if not s:
+                continue
+            if s.startswith("root/") or self._prompt_line_re.match(s):
+                continue
+            # ignore l'echo de la commande ('get KEY', 'set KEY VAL')
+            if s.lower().startswith("get ") or (cmd and s == cmd.strip()):
+                continue
+            return s
+        return chunk.strip()
 
     # --------------------- API GET/SET ---------------------
-    def do_get(self, module: str, key: str) -> str:
+    def do_get(self, module: str, key: str, refresh: bool = False) -> str:
+        """Valeur du paramètre ; servie par le cache si elle y est valide, sauf refresh=True."""
+        self.last_get_cached = False
         path = self._module_path(module)
         if not path:
             return f"[ERREUR] Chemin inconnu pour module '{module}'"
         if not self.is_connected():
             return "[OFFLINE] GET ignoré (aucun port connecté)"
 
-        # Étapes séparées pour ne pas 'écraser' la valeur par le prompt final
-        self._write_line("cd /")
-        self._drain_until_idle()
-        self._write_line(f"cd {path}")
-        self._drain_until_idle()
-
-        # <- la vraie lecture utile
-        self._write_line(f"get {key}")
-        chunk = self._drain_until_idle(idle_ms=250, max_ms=3000)
-        value = self._extract_value_from_chunk(chunk)
-
-        # On retourne à la racine, mais on ignore cette sortie
-        self._write_line("cd /")
-        self._drain_until_idle()
-
+        cmd = f"get {key}"
+        with self.lock:
+            if not refresh:
+                value = self.cache.lookup(path, key)
+                if value is not None:
+                    self.last_get_cached = True
+                    return value
+            # "cd" uniquement si le shell n'est pas déjà dans le bon module
+            self._enter(path)
+            chunk, prompt_seen = self._transact(cmd)
+            value = self._extract_value_from_chunk(chunk, cmd)
+            if self._is_value_reply(CommandResult(cmd, chunk, value, prompt_seen, 0.0)):
+                self.cache.store(path, key, value)
         return value
 
-
     def do_set(self, module: str, key: str, value: str) -> str:
         path = self._module_path(module)
         if not path:
@@ -183,17 +502,8 @@ class SerialBackend:
 
         cmd = f"set {key}" if (value is None or str(value) == "") else f"set {key} {value}"
 
-        self._write_line("cd /")
-        self._drain_until_idle()
-        self._write_line(f"cd {path}")
-        self._drain_until_idle()
-
-        self._write_line(cmd)
-        chunk = self._drain_until_idle(idle_ms=250, max_ms=3000)
-        resp = self._extract_value_from_chunk(chunk)
-
-        self._write_line("cd /")
-        self._drain_until_idle()
-
-        return resp
-
+        with self.lock:
+            self._invalidate_for_set(module, [(key, value)])
+            self._enter(path)
+            chunk, _ = self._transact(cmd)
+        return self._extract_value_from_chunk(chunk, cmd)
@@ -1,33 +1,225 @@
 # Fichier : serial_worker.py
 
+import os
 import time
+import threading
 import serial
 from PyQt6.QtCore import QObject, pyqtSignal
 
+from framers import FRAME_PARTIAL
+
+try:
+    import select
+except ImportError:  # plateformes sans select() sur descripteurs
+    select = None
+
+# Stratégies de lecture RX disponibles
+RX_STRATEGY_AUTO = "auto"
+RX_STRATEGY_SELECT = "select"        # select() sur le fd du port + pipe de réveil (POSIX)
+RX_STRATEGY_BLOCKING = "blocking"    # read() bloquant avec timeout, réveil par cancel_read()
+RX_STRATEGY_POLL = "poll"            # ancien comportement : in_waiting + sleep(10 ms)
+
+RX_STRATEGIES = (RX_STRATEGY_AUTO, RX_STRATEGY_SELECT, RX_STRATEGY_BLOCKING, RX_STRATEGY_POLL)
+
+
 class SerialWorker(QObject):
     """
     Worker tournant dans un thread séparé pour lire le port série.
     Il communique via des signaux (pas d'accès direct à l'UI).
+
+    La lecture est pilotée par événements (select ou read bloquant) : aucun
+    réveil périodique quand le port est inactif. stop()/pause() réveillent
+    immédiatement le thread.
+
+    Si un RxRingBuffer est fourni, les octets y sont copiés et le GUI n'est
+    notifié (data_ready) qu'au premier octet d'un cycle de vidage, au lieu
+    d'un signal inter-thread par read().
+
+    Avec un Framer (framers.py), le découpage en trames se fait ici et l'anneau
+    reçoit des trames (RxRingBuffer.write_frame) au lieu d'octets bruts.
+
+    Avec un AutoResponder (auto_responder.py), les triggers sont évalués ici et
+    la réponse part sur le port avant que le GUI ne soit notifié.
+
+    Les abonnés (subscribe, rx_subscription.RxSubscription) reçoivent une
+    copie des octets bruts dans ce thread (transfert de fichier, scripts).
     """
 
-    data_received = pyqtSignal(bytes)   # données RX
+    data_received = pyqtSignal(bytes)   # données RX (mode sans anneau uniquement)
+    data_ready = pyqtSignal()           # l'anneau RX vient de passer de vide à non vide
     error_occurred = pyqtSignal(str)    # erreur côté série
     finished = pyqtSignal()             # fin du thread
+    strategy_selected = pyqtSignal(str) # stratégie RX effectivement utilisée
+    auto_responded = pyqtSignal(str, bytes, float, str)  # règle, réponse, latence µs, erreur
 
-    def __init__(self, serial_port):
+    POLL_INTERVAL_S = 0.01              # stratégie "poll" uniquement
+    BLOCKING_TIMEOUT_S = 0.5            # borne du read() bloquant (filet si cancel_read absent)
+
+    def __init__(self, serial_port, strategy: str = RX_STRATEGY_AUTO, ring=None, framer=None):
         super().__init__()
         self.serial_port = serial_port      # objet pyserial.Serial déjà ouvert
+        self.ring = ring                    # RxRingBuffer optionnel
+        self.framer = framer                # Framer optionnel (nécessite ring)
+        self.responder = None               # AutoResponder optionnel (set_responder)
+        self.subscribers = ()               # RxSubscription (tuple remplacé, jamais modifié)
+        self.last_rx_time = 0.0             # time.monotonic() du dernier octet reçu
         self._is_running = True             # contrôle d'arrêt
-        self._paused = False                # <-- AJOUT : lecture en pause
+        self._paused = False                # lecture en pause
+        self._resume_event = threading.Event()
+        self._resume_event.set()
+        self.requested_strategy = strategy if strategy in RX_STRATEGIES else RX_STRATEGY_AUTO
+        self.strategy = None                # stratégie active (résolue dans run())
+        self._wake_r = None                 # pipe de réveil (stratégie select)
+        self._wake_w = None
+        self._blocking_long_s = None        # timeouts du read() bloquant (résolus dans run())
+        self._blocking_short_s = None
+
+    # ---------- Stratégie ----------
+    def _port_fileno(self):
+        try:
+            return self.serial_port.fileno()
+        except Exception:
+            return None
+
+    def _resolve_strategy(self) -> str:
+        """Choisit la stratégie effective selon la demande et la plateforme."""
+        can_select = (select is not None and os.name == "posix" and self._port_fileno() is not None)
+        if self.requested_strategy == RX_STRATEGY_SELECT and not can_select:
+            return RX_STRATEGY_BLOCKING
+        if self.requested_strategy == RX_STRATEGY_AUTO:
+            return RX_STRATEGY_SELECT if can_select else RX_STRATEGY_BLOCKING
+        return self.requested_strategy
+
+    # ---------- Réveil ----------
+    def _wake(self) -> None:
+        """Débloque l'attente RX en cours (select ou read bloquant)."""
+        if self._wake_w is not None:
+            try:
+                os.write(self._wake_w, b"\0")
+            except OSError:
+                pass
+        if self.strategy == RX_STRATEGY_BLOCKING:
+            cancel = getattr(self.serial_port, "cancel_read", None)
+            if cancel:
+                try:
+                    cancel()
+                except Exception:
+                    pass
+
+    def _drain_wake_pipe(self) -> None:
+        try:
+            os.read(self._wake_r, 512)
+        except OSError:
+            pass
+
+    def _close_wake_pipe(self) -> None:
+        fds = (self._wake_r, self._wake_w)
+        self._wake_r = self._wake_w = None
+        for fd in fds:
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
 
-    # ------------ AJOUT ---------------
     def pause(self, flag: bool) -> None:
         """Met en pause (True) ou reprend (False) la lecture RX sans fermer le port."""
         self._paused = bool(flag)
-    # ----------------------------------
+        if self._paused:
+            self._resume_event.clear()
+            # Interrompt une lecture en cours pour ne pas "voler" d'octets
+            # au backend qui va utiliser le port pendant la pause.
+            self._wake()
+        else:
+            self._resume_event.set()
+
+    # ---------- Lecture ----------
+    def _read_select(self) -> bytes:
+        fd = self._port_fileno()
+        if fd is None:
+            raise serial.SerialException("descripteur du port indisponible")
+        timeout = self.framer.wait_timeout(time.monotonic()) if self.framer else None
+        readable, _, _ = select.select([fd, self._wake_r], [], [], timeout)
+        if self._wake_r in readable:
+            self._drain_wake_pipe()
+        if fd not in readable or not self._is_running or self._paused:
+            return b""
+        n = self.serial_port.in_waiting
+        return self.serial_port.read(n) if n > 0 else b""
+
+    def _read_blocking(self) -> bytes:
+        # Timeout court seulement si une trame partielle attend son silence de fin ;
+        # sinon attente longue (réveil par cancel_read pour pause/stop).
+        timeout = self._blocking_long_s
+        if self.framer is not None and self.framer.wait_timeout(time.monotonic()) is not None:
+            timeout = self._blocking_short_s
+        if self.serial_port.timeout != timeout:
+            self.serial_port.timeout = timeout
+        # read(1) rend la main dès le premier octet ; on complète avec ce qui est déjà là.
+        data = self.serial_port.read(1)
+        if not data:
+            return b""
+        n = self.serial_port.in_waiting
+        return data + self.serial_port.read(n) if n > 0 else data
+
+    def _read_poll(self) -> bytes:
+        n = self.serial_port.in_waiting
+        if n > 0:
+            return self.serial_port.read(n)
+        time.sleep(self.POLL_INTERVAL_S)  # éviter 100% CPU
+        return b""
+
+    def set_responder(self, responder) -> None:
+        """Branche un AutoResponder (ses notifications sont relayées par auto_responded)."""
+        if responder is not None:
+            responder.notify = self.auto_responded.emit
+        self.responder = responder
+
+    def subscribe(self, subscription) -> None:
+        self.subscribers = self.subscribers + (subscription,)
+
+    def unsubscribe(self, subscription) -> None:
+        self.subscribers = tuple(s for s in self.subscribers if s is not subscription)
+
+    def _push_frames(self, data: bytes, t_rx: float) -> None:
+        """Découpe (ou conclut sur silence) et pousse les trames dans l'anneau."""
+        now = time.monotonic()
+        if data:
+            self.last_rx_time = now
+            frames = self.framer.feed(data, now)
+        else:
+            frames = self.framer.poll(now)
+        notify = False
+        responder = self.responder
+        for flags, payload in frames:
+            if responder is not None:
+                responder.on_frame(payload, bool(flags & FRAME_PARTIAL), t_rx)
+            notify |= self.ring.write_frame(payload, flags)
+        if notify:
+            self.data_ready.emit()
 
     def run(self):
         """Boucle principale de lecture tant que _is_running est True."""
+        self.strategy = self._resolve_strategy()
+        old_timeout = None
+        if self.strategy == RX_STRATEGY_SELECT:
+            self._wake_r, self._wake_w = os.pipe()
+            os.set_blocking(self._wake_w, False)
+            reader = self._read_select
+        elif self.strategy == RX_STRATEGY_BLOCKING:
+            old_timeout = self.serial_port.timeout
+            limit = self.BLOCKING_TIMEOUT_S
+            if old_timeout is not None and old_timeout < limit:
+                limit = old_timeout
+            self._blocking_long_s = limit
+            self._blocking_short_s = limit
+            if self.framer and self.framer.idle_timeout_s is not None:
+                self._blocking_short_s = min(limit, self.framer.idle_timeout_s)
+            reader = self._read_blocking
+        else:
+            reader = self._read_poll
+        self.strategy_selected.emit(self.strategy)
+
         try:
             while self._is_running:
                 # Port fermé ? -> Stop
@@ -35,26 +227,43 @@ class SerialWorker(QObject):
                     self.error_occurred.emit("Le port série a été fermé inopinément.")
                     break
 
-                # Si en pause, ne rien lire (laisser le CPU respirer)
+                # En pause : on dort jusqu'à pause(False) ou stop()
                 if self._paused:
-                    time.sleep(0.02)
+                    self._resume_event.wait()
                     continue
 
                 try:
-                    # Lire tout ce qui est dispo
-                    n = self.serial_port.in_waiting
-                    if n > 0:
-                        data = self.serial_port.read(n)
-                        if data:
+                    data = reader()
+                    t_rx = time.perf_counter()
+                    if data:
+                        if self.responder is not None:
+                            self.responder.on_data(data, t_rx)
+                        for subscription in self.subscribers:
+                            subscription.feed(data)
+                    if self.framer is not None:
+                        self._push_frames(data, t_rx)
+                    elif data:
+                        self.last_rx_time = time.monotonic()
+                        if self.ring is None:
                             self.data_received.emit(data)
-                    else:
-                        time.sleep(0.01)  # éviter 100% CPU
-                except serial.SerialException as e:
+                        elif self.ring.write(data):
+                            self.data_ready.emit()
+                except (serial.SerialException, OSError) as e:
+                    if not self._is_running:
+                        break  # port fermé pendant l'arrêt : pas une erreur
                     self.error_occurred.emit(f"Erreur de lecture du port série : {e}")
                     break
         finally:
+            if self.strategy == RX_STRATEGY_BLOCKING and self.serial_port and self.serial_port.is_open:
+                try:
+                    self.serial_port.timeout = old_timeout
+                except Exception:
+                    pass
+            self._close_wake_pipe()
             self.finished.emit()
 
     def stop(self):
         """Demande l'arrêt du worker."""
         self._is_running = False
+        self._resume_event.set()
+        self._wake()
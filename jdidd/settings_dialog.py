@@ -1,11 +1,57 @@
 # Fichier : settings_dialog.py (Avec mise à jour automatique et corrections)
 
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QFormLayout, QComboBox, 
-                             QPushButton, QDialogButtonBox, QLabel)
+                             QPushButton, QDialogButtonBox, QLabel, QSpinBox, QCheckBox)
 from PyQt6.QtCore import QTimer
 import serial
 import serial.tools.list_ports
 
+from serial_worker import RX_STRATEGY_AUTO
+from tx_writer import TX_PACING_RX_IDLE
+from log_view import DEFAULT_SCROLLBACK_LINES
+from framers import FRAMER_LF
+
+# Clés transmises telles quelles à serial.Serial(...) ; les autres sont des options de l'app.
+SERIAL_PORT_KEYS = ('port', 'baudrate', 'bytesize', 'parity', 'stopbits')
+
+# Libellé UI -> stratégie de lecture du SerialWorker
+RX_STRATEGY_LABELS = {
+    "Auto": "auto",
+    "Event (select)": "select",
+    "Blocking read": "blocking",
+    "Polling (10 ms)": "poll",
+}
+
+# Libellé UI -> découpage RX (framers.py)
+RX_FRAMER_LABELS = {
+    "Line (LF)": "lf",
+    "Line (CR)": "cr",
+    "Line (CRLF)": "crlf",
+    "Idle timeout": "idle",
+    "Fixed length": "fixed",
+    "Length-prefixed": "length",
+    "SLIP": "slip",
+    "COBS": "cobs",
+    "Modbus RTU (3.5 char gap)": "modbus_rtu",
+}
+
+# Découpage -> (libellé du paramètre, suffixe, min, max, défaut) ; absent = pas de paramètre
+RX_FRAMER_PARAMS = {
+    "lf": ("Flush open line after:", " ms", 0, 10000, 50),
+    "cr": ("Flush open line after:", " ms", 0, 10000, 50),
+    "crlf": ("Flush open line after:", " ms", 0, 10000, 50),
+    "idle": ("Idle timeout:", " ms", 1, 10000, 20),
+    "fixed": ("Frame length:", " bytes", 1, 65536, 16),
+    "length": ("Length prefix:", " bytes", 1, 4, 2),
+}
+
+# Libellé UI -> cadencement du TxWriter
+TX_PACING_LABELS = {
+    "Wait RX idle": "rx_idle",
+    "Fixed gap": "gap",
+    "No delay": "none",
+}
+
 class SettingsDialog(QDialog):
     def __init__(self, available_ports, current_settings=None, parent=None):
         super().__init__(parent)
@@ -26,6 +72,14 @@ class SettingsDialog(QDialog):
         self.data_bits_combo = QComboBox()
         self.parity_combo = QComboBox()
         self.stop_bits_combo = QComboBox()
+        self.rx_strategy_combo = QComboBox()
+        self.tx_pacing_combo = QComboBox()
+        self.tx_delay_spin = QSpinBox()
+        self.scrollback_spin = QSpinBox()
+        self.rx_framer_combo = QComboBox()
+        self.rx_framer_param_label = QLabel()
+        self.rx_framer_param_spin = QSpinBox()
+        self.save_journal_check = QCheckBox("Keep a change journal (crash recovery)")
 
         # MODIFIÉ : Ajout des vitesses de transmission plus élevées
         self.baud_rate_combo.addItems([
@@ -35,6 +89,21 @@ class SettingsDialog(QDialog):
         self.data_bits_combo.addItems(["8", "7", "6", "5"])
         self.parity_combo.addItems(["None", "Even", "Odd", "Mark", "Space"])
         self.stop_bits_combo.addItems(["1", "1.5", "2"])
+        self.rx_strategy_combo.addItems(list(RX_STRATEGY_LABELS.keys()))
+        self.tx_pacing_combo.addItems(list(TX_PACING_LABELS.keys()))
+        self.tx_delay_spin.setRange(0, 10000)
+        self.tx_delay_spin.setSuffix(" ms")
+        self.tx_delay_spin.setValue(100)
+        self.tx_delay_spin.setToolTip("Fixed gap: delay between two sends.\nWait RX idle: RX silence required before sending.")
+        self.scrollback_spin.setRange(1000, 10_000_000)
+        self.scrollback_spin.setSingleStep(10000)
+        self.scrollback_spin.setSuffix(" lines")
+        self.scrollback_spin.setValue(DEFAULT_SCROLLBACK_LINES)
+        self.scrollback_spin.setToolTip("Terminal history: oldest lines are dropped beyond this limit.")
+        self.save_journal_check.setToolTip("Sequence and trigger edits are saved in the background after a short delay.\nThe journal also records each edit immediately, and is replayed on load after a crash.")
+        self.rx_framer_combo.addItems(list(RX_FRAMER_LABELS.keys()))
+        self.rx_framer_combo.currentTextChanged.connect(self._update_framer_param)
+        self._update_framer_param(self.rx_framer_combo.currentText())
 
         # Ajout au formulaire
         form_layout.addRow(QLabel("Port:"), self.port_combo)
@@ -42,6 +111,13 @@ class SettingsDialog(QDialog):
         form_layout.addRow(QLabel("Data Bits:"), self.data_bits_combo)
         form_layout.addRow(QLabel("Parity:"), self.parity_combo)
         form_layout.addRow(QLabel("Stop Bits:"), self.stop_bits_combo)
+        form_layout.addRow(QLabel("RX Mode:"), self.rx_strategy_combo)
+        form_layout.addRow(QLabel("RX Framing:"), self.rx_framer_combo)
+        form_layout.addRow(self.rx_framer_param_label, self.rx_framer_param_spin)
+        form_layout.addRow(QLabel("TX Pacing:"), self.tx_pacing_combo)
+        form_layout.addRow(QLabel("TX Delay:"), self.tx_delay_spin)
+        form_layout.addRow(QLabel("Scrollback:"), self.scrollback_spin)
+        form_layout.addRow(QLabel("Files:"), self.save_journal_check)
         main_layout.addLayout(form_layout)
 
         # Boutons OK et Annuler
@@ -124,6 +200,31 @@ class SettingsDialog(QDialog):
         self.parity_combo.setCurrentText(parity_map.get(settings.get('parity', serial.PARITY_NONE)))
         stop_bits_map = {serial.STOPBITS_ONE: "1", serial.STOPBITS_ONE_POINT_FIVE: "1.5", serial.STOPBITS_TWO: "2"}
         self.stop_bits_combo.setCurrentText(stop_bits_map.get(settings.get('stopbits', serial.STOPBITS_ONE)))
+        rx_labels = {v: k for k, v in RX_STRATEGY_LABELS.items()}
+        self.rx_strategy_combo.setCurrentText(rx_labels.get(settings.get('rx_strategy', RX_STRATEGY_AUTO), "Auto"))
+        tx_labels = {v: k for k, v in TX_PACING_LABELS.items()}
+        self.tx_pacing_combo.setCurrentText(tx_labels.get(settings.get('tx_pacing', TX_PACING_RX_IDLE), "Wait RX idle"))
+        self.tx_delay_spin.setValue(int(settings.get('tx_delay_ms', 100)))
+        self.scrollback_spin.setValue(int(settings.get('scrollback_lines', DEFAULT_SCROLLBACK_LINES)))
+        framer_labels = {v: k for k, v in RX_FRAMER_LABELS.items()}
+        self.rx_framer_combo.setCurrentText(framer_labels.get(settings.get('rx_framer', FRAMER_LF), "Line (LF)"))
+        self.save_journal_check.setChecked(bool(settings.get('save_journal', False)))
+        if 'rx_framer_param' in settings:
+            self.rx_framer_param_spin.setValue(int(settings['rx_framer_param']))
+
+    def _update_framer_param(self, label):
+        """Adapte le champ paramètre au découpage choisi (masqué s'il n'en a pas)."""
+        spec = RX_FRAMER_PARAMS.get(RX_FRAMER_LABELS.get(label))
+        self.rx_framer_param_label.setVisible(spec is not None)
+        self.rx_framer_param_spin.setVisible(spec is not None)
+        if spec is None:
+            self.rx_framer_param_spin.setRange(0, 0)
+            return
+        text, suffix, low, high, default = spec
+        self.rx_framer_param_label.setText(text)
+        self.rx_framer_param_spin.setSuffix(suffix)
+        self.rx_framer_param_spin.setRange(low, high)
+        self.rx_framer_param_spin.setValue(default)
 
     def get_settings(self):
         """Retourne les paramètres de configuration sous forme de dictionnaire."""
@@ -138,5 +239,12 @@ class SettingsDialog(QDialog):
             'baudrate': int(self.baud_rate_combo.currentText()),
             'bytesize': int(self.data_bits_combo.currentText()),
             'parity': parity_map[self.parity_combo.currentText()],
-            'stopbits': stop_bits_map[self.stop_bits_combo.currentText()]
+            'stopbits': stop_bits_map[self.stop_bits_combo.currentText()],
+            'rx_strategy': RX_STRATEGY_LABELS[self.rx_strategy_combo.currentText()],
+            'tx_pacing': TX_PACING_LABELS[self.tx_pacing_combo.currentText()],
+            'tx_delay_ms': self.tx_delay_spin.value(),
+            'scrollback_lines': self.scrollback_spin.value(),
+            'rx_framer': RX_FRAMER_LABELS[self.rx_framer_combo.currentText()],
+            'rx_framer_param': self.rx_framer_param_spin.value(),
+            'save_journal': self.save_journal_check.isChecked(),
         }
\ No newline at end of file
@@ -1,109 +1,54 @@
 # Fichier : terminal_widget.py (Version Finale avec Tableaux Interactifs et Correction)
 
 import os
+import time
+from collections import deque
 from PyQt6.QtWidgets import (
     QWidget, QHBoxLayout, QVBoxLayout, QGroupBox, QPushButton, QLabel, 
-    QMessageBox, QMenu, QButtonGroup, QTableWidget, QTableWidgetItem, 
-    QHeaderView, QFileDialog, QToolBar, QTextEdit, QAbstractItemView, QPlainTextEdit, QLineEdit
+    QMessageBox, QMenu, QButtonGroup, QTableView,
+    QHeaderView, QFileDialog, QToolBar, QAbstractItemView, QLineEdit
 )
-from PyQt6.QtCore import pyqtSignal, Qt, QObject, QSize
-from PyQt6.QtGui import QFont, QTextCursor, QIcon, QAction, QTextCharFormat, QColor
-
-import re
-
-ANSI_COLOR_MAP = {
-    30: QColor("#000000"),  # Noir
-    31: QColor("#c91b00"),  # Rouge
-    32: QColor("#00c200"),  # Vert
-    33: QColor("#c7c400"),  # Jaune
-    34: QColor("#2222ee"),  # Bleu
-    35: QColor("#c930c7"),  # Magenta
-    36: QColor("#00c5c7"),  # Cyan
-    37: QColor("#c7c7c7"),  # Gris clair
-    90: QColor("#686868"),  # Gris foncé
-    91: QColor("#ff6c60"),  # Rouge vif
-    92: QColor("#a8ff60"),  # Vert vif
-    93: QColor("#ffffb6"),  # Jaune vif
-    94: QColor("#96cbfe"),  # Bleu vif
-    95: QColor("#ff73fd"),  # Magenta vif
-    96: QColor("#5ffdff"),  # Cyan vif
-    97: QColor("#ffffff"),  # Blanc
-}
-
-ANSI_RE = re.compile(r'\x1b\[([0-9;]*)m')
-
-def append_ansi_text(self, text):
-    import re
-    from PyQt6.QtGui import QTextCharFormat, QColor, QFont, QTextCursor
-
-    # Définition de la map de couleurs...
-    ANSI_COLOR_MAP = {
-        30: QColor("#000000"), 31: QColor("#c91b00"), 32: QColor("#00c200"),
-        33: QColor("#c7c400"), 34: QColor("#2222ee"), 35: QColor("#c930c7"),
-        36: QColor("#00c5c7"), 37: QColor("#c7c7c7"), 90: QColor("#686868"),
-        91: QColor("#ff6c60"), 92: QColor("#a8ff60"), 93: QColor("#ffffb6"),
-        94: QColor("#96cbfe"), 95: QColor("#ff73fd"), 96: QColor("#5ffdff"),
-        97: QColor("#ffffff"),
-    }
-
-    cursor = self.terminal_display.textCursor()
-    
-    # <<< LA CORRECTION CLÉ EST ICI
-    # Déplace le curseur à la toute fin du document.
-    # Cela annule toute sélection et garantit que l'insertion se fera en mode "append".
-    cursor.movePosition(QTextCursor.MoveOperation.End)
-
-    # Création du format par défaut
-    fmt = QTextCharFormat()
-    fmt.setFont(QFont("Consolas"))
-    fmt.setForeground(QColor("#c7c7c7")) # Une couleur par défaut plus visible comme gris clair
-
-    pos = 0
-    # La boucle de traitement reste identique, elle était déjà correcte.
-    for match in re.finditer(r'\x1b\[([0-9;]*)m', text):
-        start, end = match.span()
-        if start > pos:
-            # Maintenant, cette insertion se fait au bon endroit (à la fin)
-            cursor.insertText(text[pos:start], fmt)
-        
-        codes = match.group(1).split(';')
-        if not any(codes) or codes == ['']: # Gère le cas de réinitialisation simple `\x1b[m`
-            codes = ['0']
-            
-        for code_str in codes:
-            if not code_str: continue
-            code = int(code_str)
-            if code == 0:  # Reset
-                fmt = QTextCharFormat()
-                fmt.setFont(QFont("Consolas"))
-                fmt.setForeground(QColor("#c7c7c7"))
-            elif code in ANSI_COLOR_MAP:
-                fmt.setForeground(ANSI_COLOR_MAP[code])
-            elif code == 1:
-                fmt.setFontWeight(QFont.Weight.Bold)
-        pos = end
-        
-    # Insère le reste du texte après la dernière séquence ANSI
-    cursor.insertText(text[pos:], fmt)
-    
-    # Pas besoin de setTextCursor, car les opérations modifient déjà le document.
-    # Il suffit de s'assurer que la vue est correcte.
-    self.terminal_display.ensureCursorVisible()
+from PyQt6.QtCore import pyqtSignal, Qt, QObject, QSize, QTimer
+from PyQt6.QtGui import QFont, QIcon, QAction
+
+
+from log_view import LogView, DEFAULT_SCROLLBACK_LINES
+from ansi_parser import AnsiParser
 
 from sequence_editor_dialog import SequenceEditorDialog
 from receive_sequence_manager import ReceiveSequenceManager
 from send_sequence_manager import SendSequenceManager
 from SequenceEditorDialog2 import SequenceEditorDialog2
+from sequence_models import SendSequenceModel, TriggerModel, ButtonDelegate, create_filter_proxy
+from cyclic_send_dialog import CyclicSendDialog
+from cyclic_scheduler import format_cyclic_stats
+
+# Types d'entrées en attente d'affichage
+ENTRY_APP = 0      # message de l'application (ANSI)
+ENTRY_RX = 1       # ligne reçue : en-tête application + texte device (ANSI du device)
+ENTRY_PLAIN = 2    # texte brut (HEX / Decimal / erreurs)
 
 class TerminalWidget(QWidget):
     send_data_to_serial = pyqtSignal(dict)
     display_mode_changed = pyqtSignal(str)
     send_line_to_serial = pyqtSignal(str)
+    trigger_stats_requested = pyqtSignal()
+    cyclic_send_requested = pyqtSignal(list, dict)   # séquences, paramètres (CyclicSendDialog)
+    cyclic_stop_requested = pyqtSignal()
+    save_failed = pyqtSignal(str)                    # erreur d'une sauvegarde différée (thread JsonStore)
+
+    RENDER_FPS = 60                 # au plus un ajout au document (et un défilement) par frame
+    FRAME_BUDGET_S = 0.008          # temps d'analyse max par frame, le reste attend la suivante
+    MAX_PENDING_LINES = 50_000      # au-delà, les plus anciennes lignes en attente sont abandonnées
+    COLLAPSE_BACKLOG_LINES = 1_000  # au-delà (ou si la frame précédente n'a pas tout affiché), regroupement "(xN)"
     
     def __init__(self):
         super().__init__()
         self.receive_manager = ReceiveSequenceManager()
         self.send_manager = SendSequenceManager()
+        self.send_manager.store.on_error = self.receive_manager.store.on_error = self.save_failed.emit
+        self.save_failed.connect(self._on_save_failed)
+        self._save_error_open = False
         
         # --- Chargement des icônes ---
         script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -137,17 +82,31 @@ class TerminalWidget(QWidget):
             self.mode_button_group.addButton(btn)
         self.btn_ascii.setChecked(True)
         format_selector_layout.addStretch()
+        self.backlog_label = QLabel()
+        self.backlog_label.setStyleSheet("color: #d08000;")
+        self.backlog_label.hide()
+        format_selector_layout.addWidget(self.backlog_label)
         terminal_layout.addLayout(format_selector_layout)
         
         # --- DÉBUT DE LA MODIFICATION POUR L'INTERACTIVITÉ ---
         
-        # 1. Le QTextEdit sert maintenant uniquement à l'affichage.
-        self.terminal_display = QTextEdit()
+        # 1. Vue virtualisée (seules les lignes visibles sont peintes, historique borné).
+        self.terminal_display = LogView(max_lines=DEFAULT_SCROLLBACK_LINES)
         self.terminal_display.setObjectName("TerminalDisplay")
-        self.terminal_display.setReadOnly(True)
         
         font = QFont("Consolas", 10) # On définit une police pour la réutiliser
         self.terminal_display.setFont(font)
+        self._app_ansi = AnsiParser(self.terminal_display.style_id)
+        self._rx_ansi = AnsiParser(self.terminal_display.style_id)
+
+        # Rendu par lot : les ajouts sont mis en file et affichés une fois par frame
+        self._pending = deque()         # [type, en-tête, texte, répétitions]
+        self._skipped_lines = 0
+        self._overloaded = False        # la dernière frame n'a pas tout affiché dans son budget
+        self._last_frame = 0.0
+        self.render_timer = QTimer(self)
+        self.render_timer.setSingleShot(True)
+        self.render_timer.timeout.connect(self.flush_display)
         
         # 2. On ajoute un QLineEdit pour la saisie utilisateur.
         self.input_line = QLineEdit()
@@ -162,8 +121,6 @@ class TerminalWidget(QWidget):
         # --- FIN DE LA MODIFICATION POUR L'INTERACTIVITÉ ---
         
         self.connect_signals()
-        self.refresh_triggers_list()
-        self.refresh_send_sequences_list()
     def create_file_toolbar(self, new_slot, load_slot, save_slot):
         toolbar = QToolBar(); toolbar.setIconSize(QSize(20, 20))
         new_action = QAction(self.icon_add, "New", self); new_action.triggered.connect(new_slot)
@@ -173,80 +130,116 @@ class TerminalWidget(QWidget):
         return toolbar
     def append_ansi_text(self, text):
         """
-    Ajoute du texte contenant des codes ANSI au terminal.
-    Version finale qui gère les couleurs de texte (foreground), de fond (background)
-    et le style (gras), même lorsqu'ils sont combinés.
+    Ajoute du texte contenant des codes ANSI (messages de l'application) au terminal.
+    Gère couleurs 16/256/truecolor, fond et attributs (gras, italique, souligné...).
     """
-        import re
-        from PyQt6.QtGui import QTextCharFormat, QColor, QFont, QTextCursor
-
-    # Map pour les couleurs de TEXTE (foreground)
-        ANSI_FG_COLOR_MAP = {
-            30: QColor("#000000"), 31: QColor("#c91b00"), 32: QColor("#00c200"),
-            33: QColor("#c7c400"), 34: QColor("#2222ee"), 35: QColor("#c930c7"),
-            36: QColor("#00c5c7"), 37: QColor("#c7c7c7"), 90: QColor("#686868"),
-            91: QColor("#ff6c60"), 92: QColor("#a8ff60"), 93: QColor("#ffffb6"),
-            94: QColor("#96cbfe"), 95: QColor("#ff73fd"), 96: QColor("#5ffdff"),
-            97: QColor("#ffffff"),
-        }
-    
-    # --- AJOUT : Map pour les couleurs d'ARRIÈRE-PLAN (background) ---
-        ANSI_BG_COLOR_MAP = {
-            40: QColor("#000000"), 41: QColor("#c91b00"), 42: QColor("#00c200"),
-            43: QColor("#c7c400"), 44: QColor("#2222ee"), 45: QColor("#c930c7"),
-            46: QColor("#00c5c7"), 47: QColor("#c7c7c7"), 100: QColor("#686868"),
-            101: QColor("#ff6c60"), 102: QColor("#a8ff60"), 103: QColor("#ffffb6"),
-            104: QColor("#96cbfe"), 105: QColor("#ff73fd"), 106: QColor("#5ffdff"),
-            107: QColor("#ffffff"),
-        }
-
-        cursor = self.terminal_display.textCursor()
-        cursor.movePosition(QTextCursor.MoveOperation.End)
-
-        # Fonction pour créer un format par défaut propre
-        def create_default_format():
-            fmt = QTextCharFormat()
-            fmt.setFont(QFont("Consolas"))
-        # Couleur du texte par défaut
-            fmt.setForeground(QColor("#c7c7c7")) 
-        # Couleur du fond par défaut (celle du widget lui-même)
-            fmt.setBackground(self.terminal_display.palette().base().color())
-            return fmt
-
-        current_format = create_default_format()
-    
-        pos = 0
-        for match in re.finditer(r'\x1b\[([0-9;]*)m', text):
-            start, end = match.span()
-        
-            if start > pos:
-                cursor.insertText(text[pos:start], current_format)
-                
-            codes = match.group(1).split(';')
-            if not any(codes) or codes == ['']: # Gère le cas de `\x1b[m`
-                codes = ['0']
-            
-            for code_str in codes:
-                if not code_str: continue
-                code = int(code_str)
-
-            # --- LOGIQUE DE TRAITEMENT AMÉLIORÉE ---
-                if code == 0:  # Reset
-                # Réinitialise TOUT au format par défaut
-                    current_format = create_default_format()
-                elif code == 1: # Gras
-                    current_format.setFontWeight(QFont.Weight.Bold)
-                elif code in ANSI_FG_COLOR_MAP: # Couleur du texte
-                    current_format.setForeground(ANSI_FG_COLOR_MAP[code])
-                elif code in ANSI_BG_COLOR_MAP: # Couleur du fond
-                    current_format.setBackground(ANSI_BG_COLOR_MAP[code])
-            
-            pos = end
-        
-        cursor.insertText(text[pos:], current_format)
-    
-        self.terminal_display.ensureCursorVisible()
+        self._enqueue(ENTRY_APP, "", text)
 
+    def append_rx_text(self, header, text):
+        """
+        Ajoute une ligne reçue : `header` (horodatage + préfixe, ANSI de l'application)
+        puis `text` (flux du device). L'état ANSI du device est conservé d'un appel
+        à l'autre : une couleur ou une séquence coupée entre deux morceaux reste correcte.
+        """
+        self._enqueue(ENTRY_RX, header, text)
+
+    # ---------- Rendu par frame ----------
+    def _enqueue(self, kind, header, text):
+        pending = self._pending
+        if pending and (self._overloaded or len(pending) >= self.COLLAPSE_BACKLOG_LINES):
+            last = pending[-1]
+            # En surcharge seulement : lignes identiques consécutives (hors horodatage) -> une seule ligne "(xN)"
+            if last[0] == kind and last[2] == text and kind != ENTRY_APP and text.endswith("\n") and text.strip():
+                last[3] += 1
+                return
+        if len(pending) >= self.MAX_PENDING_LINES:
+            self._skipped_lines += pending.popleft()[3]
+        pending.append([kind, header, text, 1])
+        if not self.render_timer.isActive():
+            elapsed_ms = (time.monotonic() - self._last_frame) * 1000.0
+            self.render_timer.start(max(0, int(1000 / self.RENDER_FPS - elapsed_ms)))
+
+    def flush_display(self):
+        """Affiche tout ce qui est en file en un seul ajout (donc un seul défilement)."""
+        self._last_frame = time.monotonic()
+        deadline = time.perf_counter() + self.FRAME_BUDGET_S
+        pending = self._pending
+        parts = []
+        runs = []
+        length = 0
+
+        if self._skipped_lines:
+            marker = f"\033[1;33m--- {self._skipped_lines} lines not displayed (display overload) ---\033[0m\n"
+            self._skipped_lines = 0
+            pending.appendleft([ENTRY_APP, "", marker, 1])
+
+        done = 0
+        while pending:
+            kind, header, text, count = pending.popleft()
+            if count > 1:
+                text = f"{text[:-1]}  (x{count})\n"
+            if kind == ENTRY_PLAIN:
+                plain, entry_runs = header + text, None
+            elif kind == ENTRY_APP:
+                plain, entry_runs = self._app_ansi.feed(header + text)
+            else:
+                plain, entry_runs = self._app_ansi.feed(header)
+                offset = len(plain)
+                body, body_runs = self._rx_ansi.feed(text)
+                plain += body
+                if body_runs:
+                    body_runs = [(s + offset, e + offset, st) for s, e, st in body_runs]
+                    entry_runs = entry_runs + body_runs if entry_runs else body_runs
+            if entry_runs:
+                runs.extend([(s + length, e + length, st) for s, e, st in entry_runs] if length else entry_runs)
+            parts.append(plain)
+            length += len(plain)
+            done += 1
+            if not done & 63 and time.perf_counter() > deadline:
+                break
+
+        if parts:
+            self.terminal_display.append_text("".join(parts), runs or None)
+        self._overloaded = bool(pending)
+        if pending:
+            self.backlog_label.setText(f"{len(pending)} lines buffered")
+            self.backlog_label.show()
+            self.render_timer.start(max(1, int(1000 / self.RENDER_FPS)))
+        elif self.backlog_label.isVisible():
+            self.backlog_label.hide()
+
+    def _create_entry_table(self, model):
+        """Vue d'une bibliothèque (séquences / triggers) : modèle sans copie, tri et filtre par proxy."""
+        proxy = create_filter_proxy(model, self)
+        table = QTableView()
+        table.setModel(proxy)
+        table.verticalHeader().setVisible(False)
+        table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        table.verticalHeader().setDefaultSectionSize(30)
+        table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        table.setDragEnabled(True)
+        table.setAcceptDrops(True)
+        table.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
+        table.setDragDropOverwriteMode(False)
+        table.setWordWrap(False)
+        delegate = ButtonDelegate(table)
+        table.setItemDelegateForColumn(0, delegate)
+        # Colonne 0 : ordre du manager (priorité des triggers), triée par défaut
+        table.horizontalHeader().setSortIndicator(0, Qt.SortOrder.AscendingOrder)
+        table.setSortingEnabled(True)
+        header = table.horizontalHeader()
+        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Fixed)
+        header.resizeSection(0, 56)
+        for col in range(1, model.columnCount() - 1):
+            header.setSectionResizeMode(col, QHeaderView.ResizeMode.Interactive)
+        header.setSectionResizeMode(model.columnCount() - 1, QHeaderView.ResizeMode.Stretch)
+        filter_edit = QLineEdit()
+        filter_edit.setPlaceholderText("Filter...")
+        filter_edit.setClearButtonEnabled(True)
+        filter_edit.textChanged.connect(proxy.setFilterFixedString)
+        return table, proxy, delegate, filter_edit
 
     def setup_send_sequences_panel(self, parent_layout):
         groupbox = QGroupBox("Send Sequences")
@@ -257,27 +250,21 @@ class TerminalWidget(QWidget):
         self.send_file_label = QLabel("No files loaded")
         self.send_file_label.setStyleSheet("font-style: italic; color: gray;")
         self.add_sequence_btn = QPushButton("Add a Sequence")
-        self.send_sequences_table = QTableWidget()
-        self.send_sequences_table.setColumnCount(2)
-        self.send_sequences_table.setHorizontalHeaderLabels(["Name", "Sequence"])
-        self.send_sequences_table.verticalHeader().setVisible(False)
-        self.send_sequences_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        
-        self.send_sequences_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
-        self.send_sequences_table.setDragEnabled(True)
-        self.send_sequences_table.setAcceptDrops(True)
-        self.send_sequences_table.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
-        self.send_sequences_table.setDragDropOverwriteMode(False)
-        
-        header = self.send_sequences_table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeMode.Interactive)
-        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Stretch)
-        # header.setStretchLastSection(True) # <-- CORRECTION : Ligne supprimée
+        self.send_model = SendSequenceModel(self.send_manager, self.icon_send, self)
+        (self.send_sequences_table, self.send_proxy,
+         self.send_button_delegate, self.send_filter_edit) = self._create_entry_table(self.send_model)
 
         layout.addWidget(self.send_toolbar)
         layout.addWidget(self.send_file_label)
         layout.addWidget(self.add_sequence_btn)
+        layout.addWidget(self.send_filter_edit)
         layout.addWidget(self.send_sequences_table)
+        self.send_sequences_table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.cyclic_status_label = QLabel()
+        self.cyclic_status_label.setStyleSheet("color: #d08000;")
+        self.cyclic_status_label.setWordWrap(True)
+        self.cyclic_status_label.hide()
+        layout.addWidget(self.cyclic_status_label)
 
     def setup_receive_sequences_panel(self, parent_layout):
         groupbox = QGroupBox("Receive Sequences")
@@ -288,236 +275,172 @@ class TerminalWidget(QWidget):
         self.receive_file_label = QLabel("No files loaded")
         self.receive_file_label.setStyleSheet("font-style: italic; color: gray;")
         self.add_trigger_btn = QPushButton("Add a Trigger")
-        self.triggers_table = QTableWidget()
-        self.triggers_table.setColumnCount(4)
-
-        # --- CORRECTION MAJEURE ICI ---
-        # L'en-tête doit avoir un premier élément vide pour la colonne du bouton
-        self.triggers_table.setHorizontalHeaderLabels(["Active", "Name", "Trigger", "Answer"])
-        
-        self.triggers_table.verticalHeader().setVisible(False)
-        self.triggers_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-
-        self.triggers_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
-        self.triggers_table.setDragEnabled(True)
-        self.triggers_table.setAcceptDrops(True)
-        self.triggers_table.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
-        self.triggers_table.setDragDropOverwriteMode(False)
-
-        header = self.triggers_table.horizontalHeader()
-        header.setSectionResizeMode(0, QHeaderView.ResizeMode.ResizeToContents)
-        header.setSectionResizeMode(1, QHeaderView.ResizeMode.Interactive)
-        header.setSectionResizeMode(2, QHeaderView.ResizeMode.Interactive)
-        header.setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)
-        
-
+        self.trigger_model = TriggerModel(self.receive_manager, self.icon_lock_open, self.icon_lock_closed, self)
+        (self.triggers_table, self.trigger_proxy,
+         self.trigger_button_delegate, self.trigger_filter_edit) = self._create_entry_table(self.trigger_model)
 
         layout.addWidget(self.receive_toolbar)
         layout.addWidget(self.receive_file_label)
         layout.addWidget(self.add_trigger_btn)
+        layout.addWidget(self.trigger_filter_edit)
         layout.addWidget(self.triggers_table)
 
     def connect_signals(self):
         self.add_sequence_btn.clicked.connect(self.add_new_sequence)
         self.send_sequences_table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.send_sequences_table.customContextMenuRequested.connect(self.show_context_menu)
-        self.send_sequences_table.itemDoubleClicked.connect(self.edit_sequence)
-        
+        self.send_sequences_table.doubleClicked.connect(lambda index: self.edit_sequence(self._source_row(index)))
+        self.send_button_delegate.clicked.connect(self._on_send_button_clicked)
+
         self.add_trigger_btn.clicked.connect(self.add_new_trigger)
         self.triggers_table.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.triggers_table.customContextMenuRequested.connect(self.show_context_menu)
-        self.triggers_table.itemDoubleClicked.connect(self.edit_trigger)
-        
-        self.mode_button_group.buttonClicked.connect(self._on_display_mode_changed)
+        self.triggers_table.doubleClicked.connect(lambda index: self.edit_trigger(self._source_row(index)))
+        self.trigger_button_delegate.clicked.connect(lambda index: self.toggle_trigger_state(self._source_row(index)))
 
-        self.send_sequences_table.model().rowsMoved.connect(
-            lambda p, start, end, dest, row: self.handle_rows_moved(
-                self.send_manager, start, row
-            )
-        )
-        self.triggers_table.model().rowsMoved.connect(
-            lambda p, start, end, dest, row: self.handle_rows_moved(
-                self.receive_manager, start, row
-            )
-        )
+        self.mode_button_group.buttonClicked.connect(self._on_display_mode_changed)
         self.input_line.returnPressed.connect(self.on_input_line_enter)
 
-    def handle_rows_moved(self, manager, source_row, dest_row):
-        """
-        Gère le déplacement d'une ligne dans le modèle de données sous-jacent.
-        """
-        # La destination peut être l'index APRES la fin de la liste.
-        if dest_row > source_row:
-            dest_row -= 1
-        
-        # --- CORRECTION : Utiliser les bonnes méthodes de manager ---
-        if manager == self.send_manager:
-            data_list = manager.get_sequences()
-        else:
-            data_list = manager.get_rules()
-
-        # Récupérer l'élément déplacé et le retirer de sa position d'origine
-        moved_item = data_list.pop(source_row)
-        # Insérer l'élément à sa nouvelle position
-        data_list.insert(dest_row, moved_item)
+    @staticmethod
+    def _source_row(index):
+        """Ligne du manager correspondant à un index de la vue (triée / filtrée)."""
+        return index.model().mapToSource(index).row() if index.isValid() else -1
 
-        # Rafraîchir l'affichage pour garantir la cohérence
-        if manager == self.send_manager:
-            self.refresh_send_sequences_list()
-        else:
-            self.refresh_triggers_list()
+    def _on_send_button_clicked(self, index):
+        row = self._source_row(index)
+        sequences = self.send_manager.get_sequences()
+        if 0 <= row < len(sequences):
+            self.send_data_to_serial.emit(sequences[row])
 
-
-    def new_send_sequences(self): self.send_manager.new_set(); self.send_file_label.setText("New file (unsaved)"); self.refresh_send_sequences_list()
+    def new_send_sequences(self): self.send_manager.new_set(); self.send_file_label.setText("New file (unsaved)")
     def load_send_sequences(self):
         path, _ = QFileDialog.getOpenFileName(self, "Load Send Sequences", "send_sequences", "Fichiers JSON (*.json)");
-        if path and self.send_manager.load_from_file(path): self.send_file_label.setText(os.path.basename(path)); self.refresh_send_sequences_list()
+        if path and self.send_manager.load_from_file(path): self.send_file_label.setText(os.path.basename(path)); self._warn_invalid_entries(self.send_manager.get_sequences(), self.send_manager.errors); self._notify_recovered(self.send_manager)
     def save_send_sequences(self):
         path = self.send_manager.current_file_path
         if not path: path, _ = QFileDialog.getSaveFileName(self, "Save Send Sequences", "send_sequences", "Fichiers JSON (*.json)");
         if path and self.send_manager.save_to_file(path): self.send_file_label.setText(os.path.basename(path))
 
-    def new_triggers(self): self.receive_manager.new_set(); self.receive_file_label.setText("New file (unsaved)"); self.refresh_triggers_list()
+    def new_triggers(self): self.receive_manager.new_set(); self.receive_file_label.setText("New file (unsaved)")
     def load_triggers(self):
         path, _ = QFileDialog.getOpenFileName(self, "Charger Triggers", "receive_sequences", "Fichiers JSON (*.json)");
-        if path and self.receive_manager.load_from_file(path): self.receive_file_label.setText(os.path.basename(path)); self.refresh_triggers_list()
+        if path and self.receive_manager.load_from_file(path): self.receive_file_label.setText(os.path.basename(path)); self._warn_invalid_entries(self.receive_manager.get_rules(), self.receive_manager.errors); self._notify_recovered(self.receive_manager)
     def save_triggers(self):
         path = self.receive_manager.current_file_path
         if not path: path, _ = QFileDialog.getSaveFileName(self, "Save Triggers", "receive_sequences", "Fichiers JSON (*.json)");
         if path and self.receive_manager.save_to_file(path): self.receive_file_label.setText(os.path.basename(path))
 
+    def _warn_invalid_entries(self, entries, errors):
+        """Signale dès le chargement les entrées qui ne pourront pas être envoyées."""
+        if not errors: return
+        details = "\n".join(f"- {entries[i].get('name', '') or f'#{i + 1}'} : {msg}" for i, msg in errors[:20])
+        QMessageBox.warning(self, "Invalid Entries", f"{len(errors)} entry(ies) cannot be encoded and will not be sent:\n{details}")
+
+    def _on_save_failed(self, message):
+        if self._save_error_open: return   # une seule boîte à la fois (chaque modification réessaie)
+        self._save_error_open = True
+        try: QMessageBox.warning(self, "Save Error", f"Automatic save failed; your changes are not on disk.\n{message}")
+        finally: self._save_error_open = False
+
+    def _notify_recovered(self, manager):
+        if manager.recovered: QMessageBox.information(self, "Recovered Changes", f"{manager.recovered} unsaved change(s) were recovered from the journal of {os.path.basename(manager.current_file_path)}.")
+
     def _on_display_mode_changed(self, button): self.display_mode_changed.emit(button.text())
     
-    def refresh_send_sequences_list(self):
-        self.send_sequences_table.setSortingEnabled(False)
-        self.send_sequences_table.blockSignals(True)
-        self.send_sequences_table.setRowCount(0)
-        
-        for i, data in enumerate(self.send_manager.get_sequences()):
-            row_position = self.send_sequences_table.rowCount()
-            self.send_sequences_table.insertRow(row_position)
-            
-            # --- DÉBUT DE LA MODIFICATION ---
-            # Remplacer le bouton texte par un bouton avec une icône
-            send_button = QPushButton()
-            send_button.setIcon(self.icon_send)             # Utilise l'icône chargée dans __init__
-            send_button.setToolTip("Send this sequence")# Ajoute une aide visuelle au survol
-            send_button.setFlat(True)                       # Pour un design plus moderne
-            send_button.setIconSize(QSize(20, 20))          # Taille de l'icône cohérente
-            
-            # La connexion du signal reste la même
-            send_button.clicked.connect(lambda checked, d=data: self.send_data_to_serial.emit(d))
-            self.send_sequences_table.setCellWidget(row_position, 0, send_button)
-            # --- FIN DE LA MODIFICATION ---
-            
-            self.send_sequences_table.setItem(row_position, 1, QTableWidgetItem(data.get('name', '')))
-            self.send_sequences_table.setItem(row_position, 2, QTableWidgetItem(data.get('sequence', '')))
-            
-        self.send_sequences_table.blockSignals(False)
-        self.send_sequences_table.setSortingEnabled(True)
-
-    def refresh_triggers_list(self):
-        self.triggers_table.setSortingEnabled(False)
-        self.triggers_table.blockSignals(True); self.triggers_table.setRowCount(0)
-        for i, rule in enumerate(self.receive_manager.get_rules()):
-            row_position = self.triggers_table.rowCount(); self.triggers_table.insertRow(row_position)
-            lock_button = QPushButton(); lock_button.setFlat(True); is_enabled = rule.get('enabled', True); lock_button.setIcon(self.icon_lock_open if is_enabled else self.icon_lock_closed); lock_button.clicked.connect(lambda checked, r=i: self.toggle_trigger_state(r))
-            self.triggers_table.setCellWidget(row_position, 0, lock_button)
-            self.triggers_table.setItem(row_position, 1, QTableWidgetItem(rule.get('name', ''))); self.triggers_table.setItem(row_position, 2, QTableWidgetItem(rule.get('trigger', ''))); self.triggers_table.setItem(row_position, 3, QTableWidgetItem(rule.get('response', '')))
-        self.triggers_table.blockSignals(False)
-        self.triggers_table.setSortingEnabled(True)
-    
     def add_new_sequence(self):
         dialog = SequenceEditorDialog({}, self);
-        if dialog.exec(): new_data = dialog.get_data(); self.send_manager.add_sequence(new_data); self.refresh_send_sequences_list()
-    def edit_sequence(self, item):
-        row_index = item.row(); sequence_data = self.send_manager.get_sequences()[row_index]; dialog = SequenceEditorDialog(sequence_data, self);
-        if dialog.exec(): new_data = dialog.get_data(); self.send_manager.edit_sequence(row_index, new_data); self.refresh_send_sequences_list()
+        if dialog.exec(): new_data = dialog.get_data(); self.send_manager.add_sequence(new_data)
+    def edit_sequence(self, row_index):
+        sequences = self.send_manager.get_sequences()
+        if not 0 <= row_index < len(sequences): return
+        dialog = SequenceEditorDialog(sequences[row_index], self);
+        if dialog.exec(): new_data = dialog.get_data(); self.send_manager.edit_sequence(row_index, new_data)
     def add_new_trigger(self):
         dialog = SequenceEditorDialog2(parent=self);
-        if dialog.exec(): rule = dialog.get_data(); rule['enabled'] = True; self.receive_manager.add_rule(rule); self.refresh_triggers_list()
-    def edit_trigger(self, item):
-        row_index = item.row(); rule = self.receive_manager.get_rules()[row_index]; dialog = SequenceEditorDialog2(rule, self);
-        if dialog.exec(): new_rule = dialog.get_data(); new_rule['enabled'] = rule.get('enabled', True); self.receive_manager.edit_rule(row_index, new_rule); self.refresh_triggers_list()
-        
+        if dialog.exec(): rule = dialog.get_data(); rule['enabled'] = True; self.receive_manager.add_rule(rule)
+    def edit_trigger(self, row_index):
+        rules = self.receive_manager.get_rules()
+        if not 0 <= row_index < len(rules): return
+        rule = rules[row_index]; dialog = SequenceEditorDialog2(rule, self);
+        if dialog.exec(): new_rule = dialog.get_data(); new_rule['enabled'] = rule.get('enabled', True); self.receive_manager.edit_rule(row_index, new_rule)
+
     def show_context_menu(self, pos):
-        sender_table = self.sender(); item = sender_table.itemAt(pos)
-        if not item: return
+        sender_table = self.sender(); row_index = self._source_row(sender_table.indexAt(pos))
+        if row_index < 0: return
         menu = QMenu(self); edit_action = menu.addAction("To modify"); delete_action = menu.addAction("DELETE")
+        if sender_table is self.send_sequences_table:
+            menu.addSeparator()
+            cyclic_action = menu.addAction("Cyclic send..."); cyclic_action.triggered.connect(self.request_cyclic_send)
+            stop_action = menu.addAction("Stop cyclic sends"); stop_action.triggered.connect(self.cyclic_stop_requested.emit)
         if sender_table is self.triggers_table:
-            row_index = item.row(); rule = self.receive_manager.get_rules()[row_index]; is_enabled = rule.get('enabled', True)
+            rule = self.receive_manager.get_rules()[row_index]; is_enabled = rule.get('enabled', True)
             toggle_action = QAction("Disable" if is_enabled else "Enable", self); menu.insertAction(edit_action, toggle_action); menu.insertSeparator(edit_action)
             toggle_action.triggered.connect(lambda: self.toggle_trigger_state(row_index))
-        action = menu.exec(sender_table.mapToGlobal(pos))
+            stats_action = menu.addAction("Latency statistics"); stats_action.triggered.connect(self.trigger_stats_requested.emit)
+        action = menu.exec(sender_table.viewport().mapToGlobal(pos))
         if action == edit_action:
-            if sender_table is self.send_sequences_table: self.edit_sequence(item)
-            else: self.edit_trigger(item)
+            if sender_table is self.send_sequences_table: self.edit_sequence(row_index)
+            else: self.edit_trigger(row_index)
         elif action == delete_action:
-            if sender_table is self.send_sequences_table: self.delete_sequence(item)
-            else: self.delete_trigger(item)
-            
-    def delete_sequence(self, item):
-        row_index = item.row(); name = self.send_manager.get_sequences()[row_index].get('name', 'Sequence without a name');
+            if sender_table is self.send_sequences_table: self.delete_sequence(row_index)
+            else: self.delete_trigger(row_index)
+
+    def request_cyclic_send(self):
+        """Envoi cyclique des séquences sélectionnées (phases relatives dans l'ordre de la vue)."""
+        rows = sorted({index.row() for index in self.send_sequences_table.selectionModel().selectedRows()})
+        sequences = self.send_manager.get_sequences()
+        selected = [sequences[r] for r in (self._source_row(self.send_proxy.index(row, 0)) for row in rows) if 0 <= r < len(sequences)]
+        if not selected: return
+        dialog = CyclicSendDialog([s.get('name', '') for s in selected], self)
+        if dialog.exec(): self.cyclic_send_requested.emit(selected, dialog.get_params())
+
+    def set_cyclic_status(self, stats):
+        """Période obtenue / demandée des envois cycliques en cours (statistiques du thread TX)."""
+        if not stats:
+            self.cyclic_status_label.hide(); return
+        lines = [f"{s['label']}: {s['achieved_ms']:.3f} / {s['period_ms']:.3f} ms, sent {s['sent']}, missed {s['missed']}" for s in stats[:4]]
+        if len(stats) > 4: lines.append(f"... +{len(stats) - 4} more")
+        self.cyclic_status_label.setText("Cyclic: " + "\n".join(lines))
+        self.cyclic_status_label.setToolTip("\n".join(format_cyclic_stats(s) for s in stats))
+        self.cyclic_status_label.show()
+
+    def delete_sequence(self, row_index):
+        name = self.send_manager.get_sequences()[row_index].get('name', 'Sequence without a name');
         reply = QMessageBox.question(self, "Confirmation", f"Delete sequence'{name}' ?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
-        if reply == QMessageBox.StandardButton.Yes: self.send_manager.delete_sequence(row_index); self.refresh_send_sequences_list()
-    def delete_trigger(self, item):
-        row_index = item.row(); rule = self.receive_manager.get_rules()[row_index]; name = rule.get('name', '').strip() or 'Unnamed Trigger';
+        if reply == QMessageBox.StandardButton.Yes: self.send_manager.delete_sequence(row_index)
+    def delete_trigger(self, row_index):
+        rule = self.receive_manager.get_rules()[row_index]; name = rule.get('name', '').strip() or 'Unnamed Trigger';
         reply = QMessageBox.question(self, "Confirmation", f"Delete trigger '{name}' ?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No, QMessageBox.StandardButton.No)
-        if reply == QMessageBox.StandardButton.Yes: self.receive_manager.delete_rule(row_index); self.refresh_triggers_list()
-        
+        if reply == QMessageBox.StandardButton.Yes: self.receive_manager.delete_rule(row_index)
+
     def toggle_trigger_state(self, row_index):
         rules = self.receive_manager.get_rules();
         if 0 <= row_index < len(rules):
-            rules[row_index]['enabled'] = not rules[row_index].get('enabled', True); self.receive_manager.save_current_file(); self.refresh_triggers_list()
-    
-# Dans le fichier terminal_widget.py, à la fin de la classe TerminalWidget
-
-        def append_html(self, html_fragment):
-            print("DEBUG: --> 2")
-            """
-            Ajoute du HTML au terminal de manière intelligente :
-            - Si l'utilisateur regarde la fin, on fait défiler.
-            - Si l'utilisateur a scrollé ou sélectionné du texte, on ne le dérange pas.
-            """
-            # On récupère la barre de défilement
-            scrollbar = self.terminal_display.verticalScrollBar()
-            
-            # On regarde si l'utilisateur est TOUT EN BAS avant de faire des changements.
-            # On se donne une petite marge pour être sûr.
-            scroll_est_en_bas = (scrollbar.value() >= scrollbar.maximum() - 5)
-
-            # La méthode .append() gère tout automatiquement :
-            # - Elle va à la fin.
-            # - Elle insère le texte.
-            # - Elle ajoute un saut de ligne.
-            # - ELLE NE DÉTRUIT PAS LA SÉLECTION si la vue n'est pas à la fin.
-            self.terminal_display.append(html_fragment)
-            
-            # On fait défiler vers le bas UNIQUEMENT si l'utilisateur était déjà en bas
-            if scroll_est_en_bas:
-                scrollbar.setValue(scrollbar.maximum())
+            self.receive_manager.set_enabled(row_index, not rules[row_index].get('enabled', True))
+
     def clear_display(self):
+        self._pending.clear()
+        self._skipped_lines = 0
+        self._overloaded = False
+        self.backlog_label.hide()
         self.terminal_display.clear()
-   
+        self._rx_ansi.reset()
+
+    def set_save_journal(self, enabled):
+        """Active le journal des modifications des fichiers de séquences / triggers."""
+        self.send_manager.store.journal = self.receive_manager.store.journal = bool(enabled)
+
+    def flush_saves(self):
+        """Écrit les sauvegardes différées en attente (fermeture)."""
+        return self.send_manager.store.flush() and self.receive_manager.store.flush()
+
+    def set_scrollback_lines(self, max_lines):
+        """Taille maximale de l'historique du terminal (en lignes)."""
+        self.terminal_display.set_max_lines(max_lines)
+
     def append_monospace_text(self, text):
         """Ajoute du texte simple avec la police monospace à la fin du terminal."""
-        from PyQt6.QtGui import QTextCharFormat, QFont, QTextCursor
-
-    # 1. Obtenir le curseur
-        cursor = self.terminal_display.textCursor()
-    
-    # 2. Le déplacer à la fin (la correction essentielle)
-        cursor.movePosition(QTextCursor.MoveOperation.End)
-    
-    # 3. Préparer le format du texte
-        fmt = QTextCharFormat()
-        fmt.setFont(QFont("Consolas"))
-    
-    # 4. Insérer le texte
-        cursor.insertText(text, fmt)
-    
-    # 5. S'assurer que la vue défile
-        self.terminal_display.ensureCursorVisible()
+        self._enqueue(ENTRY_PLAIN, "", text)
 
     def on_input_line_enter(self):
         """Appelée quand l'utilisateur appuie sur Entrée."""
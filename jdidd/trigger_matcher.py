@@ -0,0 +1,172 @@
+# Fichier : trigger_matcher.py
+
+import re
+
+# Modes de trigger (clé "mode" d'une règle)
+TRIGGER_ASCII = "ASCII"        # ligne entière (espaces de bord ignorés)
+TRIGGER_HEX = "HEX"            # suite d'octets contenue dans la ligne
+TRIGGER_DECIMAL = "Decimal"    # idem, octets écrits en décimal
+TRIGGER_REGEX = "Regex"        # expression régulière cherchée dans la ligne (texte)
+
+
+def parse_trigger_bytes(trigger: str, mode: str) -> bytes:
+    """Octets d'un trigger HEX ou Decimal. Lève ValueError si invalide."""
+    if mode == TRIGGER_HEX:
+        text = trigger.replace('0x', '').replace('0X', '').replace(',', ' ')
+        return bytes(int(b, 16) for b in text.split() if b)
+    return bytes(int(b, 10) for b in trigger.replace(',', ' ').split() if b)
+
+
+class AhoCorasick:
+    """
+    Automate d'Aho-Corasick sur octets : une passe sur la donnée, quel que soit
+    le nombre de motifs. Chaque motif porte une priorité (indice de règle) ;
+    search() rend la plus petite priorité parmi les motifs trouvés.
+    """
+
+    NONE = 1 << 62
+
+    def __init__(self, patterns):
+        goto = [{}]
+        best = [self.NONE]        # plus petite priorité se terminant dans cet état
+        for pattern, priority in patterns:
+            state = 0
+            for b in pattern:
+                nxt = goto[state].get(b)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][b] = nxt
+                    goto.append({})
+                    best.append(self.NONE)
+                state = nxt
+            if priority < best[state]:
+                best[state] = priority
+
+        # Liens d'échec (parcours en largeur) ; best hérite de l'état d'échec
+        fail = [0] * len(goto)
+        queue = list(goto[0].values())
+        for state in queue:
+            for b, nxt in goto[state].items():
+                f = fail[state]
+                while f and b not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(b, 0)
+                fail[nxt] = target if target != nxt else 0
+                if best[fail[nxt]] < best[nxt]:
+                    best[nxt] = best[fail[nxt]]
+                queue.append(nxt)
+        self._goto = goto
+        self._fail = fail
+        self._best = best
+        self.min_priority = min(best) if best else self.NONE
+
+    def search(self, data) -> int:
+        """Plus petite priorité des motifs présents dans data (NONE si aucun)."""
+        goto, fail, best = self._goto, self._fail, self._best
+        floor = self.min_priority
+        result = self.NONE
+        state = 0
+        for b in data:
+            nxt = goto[state].get(b)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto[state].get(b)
+            state = nxt or 0
+            p = best[state]
+            if p < result:
+                result = p
+                if p == floor:      # impossible de faire mieux
+                    break
+        return result
+
+    def scan(self, data, state: int = 0):
+        """
+        Recherche en flux : rend ([(fin, priorité)], état). En repassant l'état
+        rendu à l'appel suivant, un motif coupé entre deux morceaux est trouvé.
+        À chaque position, seule la plus petite priorité terminant là est rendue.
+        """
+        goto, fail, best = self._goto, self._fail, self._best
+        none = self.NONE
+        hits = []
+        for pos, b in enumerate(data):
+            nxt = goto[state].get(b)
+            while nxt is None and state:
+                state = fail[state]
+                nxt = goto[state].get(b)
+            state = nxt or 0
+            p = best[state]
+            if p != none:
+                hits.append((pos + 1, p))
+        return hits, state
+
+
+class TriggerMatcher:
+    """
+    Jeu de règles compilé une fois (à chaque modification du jeu) :
+    - ASCII : dictionnaire ligne -> première règle ;
+    - HEX / Decimal : automate d'Aho-Corasick sur les octets ;
+    - Regex : une regex combinée sert de pré-filtre, les regex individuelles ne
+      sont évaluées que si elle trouve quelque chose.
+    La règle activée de plus petit indice l'emporte (même ordre qu'avant).
+    Les règles invalides sont ignorées et listées dans `errors`.
+    modes : ne compiler que ces modes de trigger (None = tous).
+    """
+
+    def __init__(self, rules, modes=None):
+        self.errors = []                  # [(indice, message)]
+        self._exact = {}
+        byte_patterns = []
+        regexes = []
+        for index, rule in enumerate(rules):
+            if not rule.get('enabled', True):
+                continue
+            trigger = rule.get('trigger', '')
+            if not trigger:
+                continue
+            mode = rule.get('mode', TRIGGER_ASCII)
+            if modes is not None and mode not in modes:
+                continue
+            try:
+                if mode == TRIGGER_ASCII:
+                    self._exact.setdefault(trigger, index)
+                elif mode == TRIGGER_REGEX:
+                    regexes.append((index, re.compile(trigger)))
+                else:
+                    pattern = parse_trigger_bytes(trigger, mode)
+                    if pattern:
+                        byte_patterns.append((pattern, index))
+            except (ValueError, re.error) as e:
+                self.errors.append((index, str(e)))
+
+        self._automaton = AhoCorasick(byte_patterns) if byte_patterns else None
+        self._regexes = regexes
+        self._regex_filter = None
+        if regexes:
+            try:
+                self._regex_filter = re.compile("|".join(f"(?:{r.pattern})" for _, r in regexes))
+            except re.error:
+                self._regex_filter = None   # groupes nommés en double, etc. : pas de pré-filtre
+        self.rule_count = len(self._exact) + len(byte_patterns) + len(regexes)
+
+    def match(self, data: bytes) -> int:
+        """Indice de la première règle déclenchée par la ligne `data`, ou -1."""
+        best = AhoCorasick.NONE
+        text = None
+        if self._exact:
+            text = data.decode('utf-8', errors='replace')
+            best = self._exact.get(text.strip(), best)
+        if self._automaton is not None and self._automaton.min_priority < best:
+            found = self._automaton.search(data)
+            if found < best:
+                best = found
+        if self._regexes and self._regexes[0][0] < best:
+            if text is None:
+                text = data.decode('utf-8', errors='replace')
+            if self._regex_filter is None or self._regex_filter.search(text):
+                for index, regex in self._regexes:
+                    if index >= best:
+                        break
+                    if regex.search(text):
+                        best = index
+                        break
+        return best if best != AhoCorasick.NONE else -1
@@ -0,0 +1,292 @@
+# Fichier : tx_writer.py
+
+import queue
+import sys
+import threading
+import time
+
+import serial
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from cyclic_scheduler import CyclicJob, CyclicScheduler, SPIN_S, GIL_SWITCH_INTERVAL_S
+
+# Modes de cadencement TX
+TX_PACING_NONE = "none"          # écrit dès que possible (limité par le baud rate)
+TX_PACING_GAP = "gap"            # intervalle fixe entre deux envois (après vidage du port)
+TX_PACING_RX_IDLE = "rx_idle"    # attend que la RX soit silencieuse depuis rx_idle_ms
+
+TX_PACINGS = (TX_PACING_NONE, TX_PACING_GAP, TX_PACING_RX_IDLE)
+
+
+class TxItem:
+    """Un envoi en file : octets déjà encodés + préfixe d'affichage + callback optionnel."""
+
+    __slots__ = ("data", "prefix", "callback", "queued_at")
+
+    def __init__(self, data: bytes, prefix: str = "[TX]", callback=None):
+        self.data = data
+        self.prefix = prefix
+        self.callback = callback          # callback(item, error) appelé dans le thread TX
+        self.queued_at = time.monotonic()
+
+
+class TxWriter(QObject):
+    """
+    Thread d'écriture série (même schéma que SerialWorker : QObject + moveToThread).
+
+    Le GUI ne fait qu'empiler des TxItem ; l'écriture (éventuellement bloquante)
+    et le cadencement se font ici. Chaque envoi terminé est signalé par `sent`
+    pour l'écho dans le terminal.
+
+    Les envois cycliques (start_cyclic) sont servis par un ordonnanceur à
+    échéances absolues dans ce même thread : attente bloquante jusqu'à
+    SPIN_S avant l'échéance, puis attente active. Ils ne subissent pas le
+    cadencement des envois en file ; leurs statistiques sont publiées par
+    `cyclic_stats` (au plus toutes les STATS_INTERVAL_S) et `cyclic_finished`.
+    pause_cyclic() les suspend sans les arrêter (port prêté au Calibrator) ;
+    à la reprise, les échéances sont décalées de la durée de la pause.
+    """
+
+    sent = pyqtSignal(bytes, str)           # données écrites, préfixe
+    send_failed = pyqtSignal(str, str)      # message d'erreur, préfixe
+    cyclic_stats = pyqtSignal(list)         # [dict] des tâches cycliques actives
+    cyclic_finished = pyqtSignal(dict)      # statistiques finales d'une tâche
+    finished = pyqtSignal()
+
+    RX_IDLE_MAX_WAIT_S = 2.0                # ne pas affamer la TX si le device parle sans arrêt
+    STATS_INTERVAL_S = 0.5
+
+    def __init__(self, serial_port, pacing: str = TX_PACING_RX_IDLE, gap_ms: int = 100,
+                 rx_idle_ms: int = 100, last_rx_time=None, write_lock=None):
+        super().__init__()
+        self.serial_port = serial_port
+        self.pacing = pacing if pacing in TX_PACINGS else TX_PACING_RX_IDLE
+        self.gap_s = max(0, gap_ms) / 1000.0
+        self.rx_idle_s = max(0, rx_idle_ms) / 1000.0
+        self.last_rx_time = last_rx_time    # callable -> time.monotonic() du dernier octet RX
+        # Sérialise toutes les écritures sur le port (partagé avec les réponses automatiques du thread RX)
+        self.write_lock = write_lock or threading.Lock()
+        self._queue = queue.Queue()
+        self._stop_event = threading.Event()
+        self._last_write_end = 0.0
+        self.scheduler = CyclicScheduler()    # n'est manipulé que dans le thread TX
+        self._next_stats = 0.0
+        self._saved_switch_interval = None
+        self._cyclic_paused = threading.Event()
+        self._paused_at = None                # instant de la suspension (thread TX)
+
+    # ---------- API (thread GUI) ----------
+    def enqueue(self, data: bytes, prefix: str = "[TX]", callback=None) -> None:
+        self._queue.put(TxItem(bytes(data), prefix, callback))
+
+    def start_cyclic(self, jobs) -> None:
+        """
+        Démarre des envois cycliques (liste de CyclicJob). Ils partent du même
+        instant de référence : leurs phases sont relatives les unes aux autres.
+        """
+        self._queue.put(("start", list(jobs)))
+
+    def stop_cyclic(self, job_id: int = None) -> None:
+        """Arrête un envoi cyclique, ou tous (job_id None)."""
+        self._queue.put(("stop", job_id))
+
+    def pause_cyclic(self, paused: bool) -> None:
+        """
+        Suspend / reprend les envois cycliques. Effet immédiat : au retour de
+        pause_cyclic(True), plus aucune écriture cyclique n'a lieu (celle en
+        cours éventuelle est terminée).
+        """
+        if paused:
+            self._cyclic_paused.set()
+            with self.write_lock:   # attend la fin d'une écriture cyclique déjà commencée
+                pass
+        else:
+            self._cyclic_paused.clear()
+        self._queue.put(("pause", paused))   # réveille le thread TX (décalage des échéances)
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def clear(self) -> None:
+        """Abandonne les envois encore en file (les commandes cycliques sont conservées)."""
+        kept = []
+        try:
+            while True:
+                item = self._queue.get_nowait()
+                if isinstance(item, tuple):
+                    kept.append(item)
+        except queue.Empty:
+            pass
+        for item in kept:
+            self._queue.put(item)
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self._queue.put(None)   # réveille run()
+
+    # ---------- Cadencement ----------
+    def _sleep(self, seconds: float) -> None:
+        """Attente du cadencement ; les échéances cycliques qui tombent pendant ce temps sont servies."""
+        end = time.perf_counter() + seconds
+        while not self._stop_event.is_set():
+            now = time.perf_counter()
+            if now >= end:
+                return
+            deadline = self._cyclic_deadline()
+            if deadline is None or deadline >= end:
+                self._stop_event.wait(end - now)
+                return
+            self._sleep_until(deadline)
+            self._run_cyclic()
+
+    def _sleep_until(self, deadline: float) -> None:
+        remaining = deadline - time.perf_counter() - SPIN_S
+        if remaining > 0:
+            self._stop_event.wait(remaining)
+        while time.perf_counter() < deadline:
+            pass
+
+    def _wait_pacing(self) -> None:
+        if self.pacing == TX_PACING_GAP and self.gap_s > 0:
+            remaining = self._last_write_end + self.gap_s - time.monotonic()
+            if remaining > 0:
+                self._sleep(remaining)
+        elif self.pacing == TX_PACING_RX_IDLE and self.last_rx_time and self.rx_idle_s > 0:
+            deadline = time.monotonic() + self.RX_IDLE_MAX_WAIT_S
+            while not self._stop_event.is_set():
+                now = time.monotonic()
+                remaining = self.last_rx_time() + self.rx_idle_s - now
+                if remaining <= 0 or now >= deadline:
+                    break
+                self._sleep(min(remaining, deadline - now))
+
+    # ---------- Envois cycliques ----------
+    def _command(self, command) -> None:
+        kind, arg = command
+        if kind == "start":
+            # Démarrées pendant une pause : armées à l'instant de la pause, donc décalées à la reprise
+            now = self._paused_at if self._paused_at is not None else time.perf_counter()
+            for job in arg:
+                self.scheduler.add(job, now)
+        elif kind == "pause":
+            if arg and self._paused_at is None:
+                self._paused_at = time.perf_counter()
+            elif not arg and self._paused_at is not None and not self._cyclic_paused.is_set():
+                self.scheduler.shift(time.perf_counter() - self._paused_at)
+                self._paused_at = None
+        elif kind == "stop":
+            ids = list(self.scheduler.jobs) if arg is None else [arg]
+            for job_id in ids:
+                job = self.scheduler.remove(job_id)
+                if job is not None:
+                    self.cyclic_finished.emit(job.stats())
+        self._update_switch_interval()
+        self._emit_cyclic_stats(force=True)
+
+    def _update_switch_interval(self) -> None:
+        """GIL rendu plus souvent tant que des envois cycliques tournent, hors pause (précision des échéances)."""
+        active = bool(self.scheduler) and self._paused_at is None
+        if active and self._saved_switch_interval is None:
+            self._saved_switch_interval = sys.getswitchinterval()
+            sys.setswitchinterval(min(self._saved_switch_interval, GIL_SWITCH_INTERVAL_S))
+        elif not active and self._saved_switch_interval is not None:
+            sys.setswitchinterval(self._saved_switch_interval)
+            self._saved_switch_interval = None
+
+    def _cyclic_deadline(self):
+        """Prochaine échéance cyclique à servir (None pendant une pause)."""
+        if self._cyclic_paused.is_set():
+            return None
+        return self.scheduler.next_deadline()
+
+    def _run_cyclic(self) -> None:
+        """Envoie les séquences cycliques arrivées à échéance."""
+        scheduler = self.scheduler
+        if not scheduler or self._cyclic_paused.is_set():
+            return
+        ended = False
+        for job in scheduler.pop_due(time.perf_counter()):
+            try:
+                with self.write_lock:
+                    if self._cyclic_paused.is_set():   # suspendu pendant le parcours : échéance gardée
+                        scheduler.reschedule(job)
+                        continue
+                    self.serial_port.write(job.data)
+            except (serial.SerialException, OSError, ValueError) as e:
+                job.error = str(e)
+                job.done = True
+            else:
+                job.record(time.perf_counter())
+                if job.echo:
+                    self.sent.emit(job.data, "[CYCLIC-TX]")
+            scheduler.reschedule(job)
+            if job.done:
+                ended = True
+                self.cyclic_finished.emit(job.stats())
+        if ended:
+            self._update_switch_interval()
+        self._emit_cyclic_stats(force=ended)
+
+    def _emit_cyclic_stats(self, force: bool = False) -> None:
+        now = time.perf_counter()
+        if force or now >= self._next_stats:
+            self._next_stats = now + self.STATS_INTERVAL_S
+            self.cyclic_stats.emit([job.stats() for job in self.scheduler.jobs.values()])
+
+    # ---------- Boucle ----------
+    def _write(self, item: TxItem) -> None:
+        error = None
+        try:
+            with self.write_lock:
+                self.serial_port.write(item.data)
+                if self.pacing == TX_PACING_GAP and self.gap_s > 0:
+                    self.serial_port.flush()   # le gap se mesure à partir de la fin d'émission
+            self._last_write_end = time.monotonic()
+        except (serial.SerialException, OSError, ValueError) as e:
+            error = str(e)
+        if item.callback:
+            try:
+                item.callback(item, error)
+            except Exception:
+                pass
+        if error is None:
+            self.sent.emit(item.data, item.prefix)
+        else:
+            self.send_failed.emit(error, item.prefix)
+
+    def _next_item(self):
+        """Prochain élément de la file, en servant les échéances cycliques en attendant."""
+        while not self._stop_event.is_set():
+            self._run_cyclic()
+            deadline = self._cyclic_deadline()
+            if deadline is None:
+                return self._queue.get()
+            try:
+                wait = deadline - time.perf_counter() - SPIN_S
+                return self._queue.get(timeout=wait) if wait > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                self._sleep_until(deadline)
+        return None
+
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                item = self._next_item()
+                if item is None or self._stop_event.is_set():
+                    break
+                if isinstance(item, tuple):
+                    self._command(item)
+                    continue
+                self._wait_pacing()
+                if self._stop_event.is_set():
+                    break
+                if not (self.serial_port and self.serial_port.is_open):
+                    self.send_failed.emit("port closed", item.prefix)
+                    continue
+                self._write(item)
+        finally:
+            for job in list(self.scheduler.jobs.values()):
+                self.cyclic_finished.emit(job.stats())
+            self.scheduler.jobs.clear()
+            self._update_switch_interval()
+            self.finished.emit()